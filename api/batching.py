@@ -0,0 +1,113 @@
+import asyncio
+from typing import Any, Callable, Dict, List, Optional
+
+from api.executor import QueueFullError
+
+
+class MicroBatcher:
+    """Coalesce concurrent single-row requests into one scoring call.
+
+    The first request to arrive opens a window of ``max_wait_ms``; every request
+    arriving in that window (up to ``max_batch_size``) is scored together by one
+    ``score_fn`` call run in a worker thread, and each caller gets its own result.
+    A lone request therefore waits at most ``max_wait_ms`` longer than it would
+    unbatched, while bursts share a single ``predict_proba`` call.
+
+    Args:
+        score_fn (Callable): Maps a list of records to a list of results, same order.
+        max_batch_size (int): Upper bound on records per scoring call.
+        max_wait_ms (float): How long to hold the first request for companions.
+        executor (Optional[BoundedExecutor]): Where batches are scored; several
+            batches may be scored at once. Defaults to the loop's thread pool.
+        max_queue (Optional[int]): Waiting records beyond which ``submit`` raises
+            ``QueueFullError``.
+    """
+
+    def __init__(
+        self,
+        score_fn: Callable[[List[Dict[str, Any]]], List[Any]],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 2.0,
+        executor=None,
+        max_queue: Optional[int] = None,
+    ):
+        self.score_fn = score_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max_wait_ms / 1000.0
+        self.executor = executor
+        self.max_queue = max_queue
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._scoring = set()
+        self.batches_scored = 0
+        self.records_scored = 0
+
+    def start(self) -> None:
+        """Start the collector task; call from within the running event loop."""
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def submit(self, record: Dict[str, Any]) -> Any:
+        """Queue one record and wait for its result."""
+        if self._worker is None:
+            self.start()
+        if self.max_queue is not None and self._queue.qsize() >= self.max_queue:
+            raise QueueFullError(f"Micro-batch queue is full ({self.max_queue} requests).")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((record, future))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait_s
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            # Score in the background so the next window can open immediately
+            task = asyncio.create_task(self._score(batch))
+            self._scoring.add(task)
+            task.add_done_callback(self._scoring.discard)
+
+    async def _score(self, batch) -> None:
+        records = [record for record, _ in batch]
+        try:
+            if self.executor is not None:
+                results = await self.executor.run(self.score_fn, records)
+            else:
+                results = await asyncio.get_running_loop().run_in_executor(None, self.score_fn, records)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches_scored += 1
+        self.records_scored += len(records)
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "batches_scored": self.batches_scored,
+            "records_scored": self.records_scored,
+            "mean_batch_size": round(self.records_scored / self.batches_scored, 2) if self.batches_scored else 0.0,
+        }
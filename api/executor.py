@@ -0,0 +1,50 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+
+class QueueFullError(Exception):
+    """Raised when a scoring job is refused because too many are already waiting."""
+
+
+class BoundedExecutor:
+    """Run CPU-bound scoring off the event loop with a cap on queued work.
+
+    Jobs run on a dedicated thread pool of ``max_workers`` threads (XGBoost and
+    NumPy release the GIL for the heavy parts). At most ``max_queue`` jobs may be
+    running or waiting at once; beyond that ``run`` raises ``QueueFullError``
+    immediately so the API can answer 429 instead of letting latency grow
+    without bound. The counter is only touched from the event loop thread.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scoring")
+        self.in_flight = 0
+        self.rejected = 0
+        self.completed = 0
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        if self.in_flight >= self.max_queue:
+            self.rejected += 1
+            raise QueueFullError(f"Scoring queue is full ({self.max_queue} jobs).")
+
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.pool, fn, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+
+    def shutdown(self) -> None:
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
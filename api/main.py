@@ -1,30 +1,270 @@
-from fastapi import FastAPI
-from pydantic import BaseModel
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
 import pandas as pd
-from src.inference import load_model, predict_attrition  
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import BaseModel, Field
 
-app = FastAPI()
+from api.batching import MicroBatcher
+from api.executor import BoundedExecutor, QueueFullError
+from src import metrics
+from src.cache import PredictionCache
+from src.data_processing import preprocess_batch
+from src.feature_pipeline import FeaturePipeline
+from src.inference import UNSCORED_LABEL, enable_prediction_log, is_fallback, log_predictions, predict_attrition_batch
+from src.monitoring import API_DRIFT_STATE_PATH, DriftMonitor
+from src.registry import ModelWatcher
 
-# 1. Load Model (Once at startup)
-artifacts = load_model()
+# Server settings (environment variables)
+MICROBATCH_ENABLED = os.getenv("HR_API_MICROBATCH", "0") == "1"
+MICROBATCH_MAX_SIZE = int(os.getenv("HR_API_MICROBATCH_MAX_SIZE", "64"))
+MICROBATCH_WAIT_MS = float(os.getenv("HR_API_MICROBATCH_WAIT_MS", "2"))
+MAX_BATCH_SIZE = int(os.getenv("HR_API_MAX_BATCH_SIZE", "10000"))
+# Scoring threads, and jobs (running + waiting) accepted before answering 429
+MAX_WORKERS = int(os.getenv("HR_API_MAX_WORKERS", str(min(4, os.cpu_count() or 1))))
+MAX_QUEUE = int(os.getenv("HR_API_MAX_QUEUE", "64"))
+# Result cache keyed on the encoded features (0 disables it)
+CACHE_SIZE = int(os.getenv("HR_API_CACHE_SIZE", "10000"))
+CACHE_TTL_S = float(os.getenv("HR_API_CACHE_TTL_S", "3600"))
+# Track feature drift over scored traffic
+DRIFT_ENABLED = os.getenv("HR_API_DRIFT", "1") == "1"
 
-# 2. Define Input Schema 
+# 1. Define Input Schema
+# Omitted fields are filled by the model's feature pipeline (training medians/modes)
 class EmployeeInput(BaseModel):
-    Age: int
-    DailyRate: int
-    DistanceFromHome: int
-    # ... Features ...
+    employee_id: Optional[str] = None
+    Age: Optional[int] = None
+    DailyRate: Optional[int] = None
+    DistanceFromHome: Optional[int] = None
+    MonthlyIncome: Optional[float] = None
+    TotalWorkingYears: Optional[int] = None
+    YearsAtCompany: Optional[int] = None
+    NumCompaniesWorked: Optional[int] = None
+    EnvironmentSatisfaction: Optional[int] = Field(None, ge=1, le=4)
+    JobSatisfaction: Optional[int] = Field(None, ge=1, le=4)
+    WorkLifeBalance: Optional[int] = Field(None, ge=1, le=4)
+    OverTime: Optional[str] = None
+    Gender: Optional[str] = None
+    BusinessTravel: Optional[str] = None
+    Department: Optional[str] = None
+    JobRole: Optional[str] = None
+    MaritalStatus: Optional[str] = None
+    # Remaining HR record fields, used when supplied
+    Education: Optional[int] = Field(None, ge=1, le=5)
+    EducationField: Optional[str] = None
+    HourlyRate: Optional[int] = None
+    JobInvolvement: Optional[int] = Field(None, ge=1, le=4)
+    JobLevel: Optional[int] = Field(None, ge=1, le=5)
+    MonthlyRate: Optional[int] = None
+    PercentSalaryHike: Optional[int] = None
+    PerformanceRating: Optional[int] = Field(None, ge=1, le=4)
+    RelationshipSatisfaction: Optional[int] = Field(None, ge=1, le=4)
+    StockOptionLevel: Optional[int] = Field(None, ge=0, le=3)
+    TrainingTimesLastYear: Optional[int] = None
+    YearsInCurrentRole: Optional[int] = None
+    YearsSinceLastPromotion: Optional[int] = None
+    YearsWithCurrManager: Optional[int] = None
+
+class BatchInput(BaseModel):
+    employees: List[EmployeeInput]
+
+def score_records(
+    model,
+    threshold: float,
+    records: List[dict],
+    cache: Optional[PredictionCache] = None,
+    drift: Optional[DriftMonitor] = None,
+    model_version: Optional[str] = None,
+    pipeline: Optional[FeaturePipeline] = None,
+) -> List[dict]:
+    """Encode and score raw employee records in one predict_proba call.
+
+    Rows already in ``cache`` are answered from it; only the misses reach the model,
+    and only real scores (not the error fallback) are cached. Rows the model failed
+    to score come back with probability ``None`` and ``UNSCORED_LABEL``.
+    Every row, cached or not, is added to the ``drift`` statistics. Results carry
+    ``model_version`` when given. Records are encoded with ``pipeline`` (the
+    model's own) when given.
+    """
+    input_df = pd.DataFrame(records)
+    processed_df, _ = preprocess_batch(input_df, pipeline)
+    if drift is not None:
+        drift.update(processed_df)
+    encoded_rows = processed_df.to_numpy()
+
+    probabilities = [None] * len(records)
+    if cache is not None:
+        for i, row in enumerate(encoded_rows):
+            cached = cache.get(row)
+            if cached is not None:
+                probabilities[i] = cached["probability"]
+
+    # Cache hits never reach predict_attrition_batch, so log them here (by column name, like the misses)
+    hits = [i for i, probability in enumerate(probabilities) if probability is not None]
+    if hits:
+        log_predictions(processed_df.iloc[hits], [probabilities[i] for i in hits], 0.0, "api-cache", [records[i] for i in hits])
+
+    missing = [i for i, probability in enumerate(probabilities) if probability is None]
+    if missing:
+        scored = predict_attrition_batch(model, processed_df.iloc[missing], source="api", inputs=[records[i] for i in missing])
+        # A model swapped in while this call ran has re-keyed the cache; do not store old-model results
+        cacheable = cache is not None and (model_version is None or cache.model_version == model_version)
+        for i, probability in zip(missing, scored):
+            probabilities[i] = probability
+            if cacheable and not is_fallback(probability):
+                cache.put(encoded_rows[i], {"probability": probability})
+
+    results = []
+    for record, probability in zip(records, probabilities):
+        if is_fallback(probability):
+            probability, risk_label = None, UNSCORED_LABEL
+        else:
+            risk_label = "High Risk" if probability >= threshold else "Low Risk"
+        results.append({
+            "employee_id": record.get("employee_id"),
+            "probability": probability,
+            "risk_label": risk_label,
+            "model_version": model_version,
+        })
+    return results
+
+def serving_scorer(watcher: ModelWatcher, cache: Optional[PredictionCache] = None, drift: Optional[DriftMonitor] = None):
+    """``score_records`` bound to whatever model ``watcher`` holds when each call starts."""
+    def score(records: List[dict]) -> List[dict]:
+        serving = watcher.current
+        return score_records(
+            serving.model, serving.threshold, records, cache=cache, drift=drift,
+            model_version=serving.version, pipeline=serving.pipeline,
+        )
+    return score
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 2. Load the current registry version (off the event loop), then follow promotions in the background
+    app.state.prediction_log = await asyncio.to_thread(enable_prediction_log)
+    # Versions come from the registry watcher, not from the files in models/
+    app.state.cache = (
+        PredictionCache(max_entries=CACHE_SIZE, ttl_seconds=CACHE_TTL_S, artifact_paths=()) if CACHE_SIZE > 0 else None
+    )
+
+    def on_swap(serving):
+        # Re-key the result cache and log the new model's encoded columns
+        if app.state.cache is not None:
+            app.state.cache.set_model_version(serving.version)
+        if app.state.prediction_log is not None:
+            app.state.prediction_log.set_feature_names(serving.pipeline.feature_names)
+
+    app.state.model = ModelWatcher(on_swap=on_swap)
+    serving = await asyncio.to_thread(app.state.model.load)
+    on_swap(serving)
+    app.state.model.start()
+
+    app.state.drift = None
+    if DRIFT_ENABLED:
+        # Saved every HR_DRIFT_SAVE_S seconds so a crash loses at most one interval of counts
+        drift = await asyncio.to_thread(DriftMonitor.load, state_path=API_DRIFT_STATE_PATH)
+        app.state.drift = drift.start_autosave()
+    app.state.score = serving_scorer(app.state.model, cache=app.state.cache, drift=app.state.drift)
+    app.state.executor = BoundedExecutor(MAX_WORKERS, MAX_QUEUE)
+    app.state.batcher = None
+    if MICROBATCH_ENABLED:
+        app.state.batcher = MicroBatcher(
+            app.state.score,
+            MICROBATCH_MAX_SIZE,
+            MICROBATCH_WAIT_MS,
+            executor=app.state.executor,
+            max_queue=MAX_QUEUE * MICROBATCH_MAX_SIZE,
+        )
+        app.state.batcher.start()
+
+    yield
+
+    if app.state.batcher is not None:
+        await app.state.batcher.stop()
+    app.state.executor.shutdown()
+    app.state.model.stop()
+    if app.state.drift is not None:
+        app.state.drift.save()
+    if app.state.prediction_log is not None:
+        await asyncio.to_thread(app.state.prediction_log.flush)
+
+app = FastAPI(lifespan=lifespan)
+
+@app.middleware("http")
+async def time_requests(request: Request, call_next):
+    if not metrics.ENABLED:
+        return await call_next(request)
+    start = time.perf_counter()
+    response = await call_next(request)
+    # Name the histogram after the route template, not the raw URL, so unknown paths cannot add series
+    route = request.scope.get("route")
+    metrics.observe(f"http {route.path}" if route is not None else "http unmatched", time.perf_counter() - start)
+    if response.status_code == 429:
+        metrics.count("http_429")
+    return response
+
+@app.exception_handler(QueueFullError)
+async def queue_full_handler(request: Request, exc: QueueFullError):
+    return JSONResponse(status_code=429, content={"detail": str(exc)}, headers={"Retry-After": "1"})
 
 @app.post("/predict")
-def predict(data: EmployeeInput):
-    # 3. Convert input to DataFrame 
-    input_df = pd.DataFrame([data.model_dump()])
-    
-    # 4. Use your existing logic!
-    probability = predict_attrition(artifacts, input_df)
-    
-    # 5. Return JSON
+async def predict(data: EmployeeInput, request: Request):
+    # 3. Score through the micro-batcher when enabled, otherwise on its own
+    state = request.app.state
+    record = data.model_dump(exclude_none=True)
+    if state.batcher is not None:
+        result = await state.batcher.submit(record)
+    else:
+        result = (await state.executor.run(state.score, [record]))[0]
+
+    # 4. Return JSON
+    return {"probability": result["probability"], "risk_label": result["risk_label"], "model_version": result["model_version"]}
+
+@app.post("/predict/batch")
+async def predict_batch(data: BatchInput, request: Request):
+    if len(data.employees) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {MAX_BATCH_SIZE} employees.")
+    state = request.app.state
+    if not data.employees:
+        return {"model_version": state.model.current.version, "results": []}
+
+    records = [employee.model_dump(exclude_none=True) for employee in data.employees]
+    results = await state.executor.run(state.score, records)
+    return {"model_version": results[0]["model_version"], "results": results}
+
+@app.get("/health")
+async def health(request: Request):
+    state = request.app.state
     return {
-        "probability": probability,
-        "risk_label": "High Risk" if probability >= 0.3 else "Low Risk"
-    }
\ No newline at end of file
+        "status": "ok",
+        "model": state.model.stats(),
+        "executor": state.executor.stats(),
+        "microbatch": state.batcher.stats() if state.batcher is not None else None,
+        "cache": state.cache.stats() if state.cache is not None else None,
+        "prediction_log": state.prediction_log.stats() if state.prediction_log is not None else None,
+    }
+
+@app.get("/drift")
+async def drift(request: Request):
+    monitor = request.app.state.drift
+    if monitor is None:
+        raise HTTPException(status_code=404, detail="Drift monitoring is disabled (HR_API_DRIFT=0).")
+    return {**monitor.status(), "features": monitor.summary().to_dict(orient="records")}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics(request: Request):
+    state = request.app.state
+    gauges = {
+        "model_swaps": state.model.swaps,
+        "executor_in_flight": state.executor.in_flight,
+        "executor_rejected": state.executor.rejected,
+    }
+    if state.cache is not None:
+        gauges["prediction_cache_hit_rate"] = state.cache.stats()["hit_rate"]
+    if state.prediction_log is not None:
+        gauges["prediction_log_dropped_batches"] = state.prediction_log.dropped_batches
+    return metrics.render_prometheus(gauges)
\ No newline at end of file
@@ -0,0 +1,65 @@
+"""Per-explanation latency: legacy KernelExplainer vs. the exact TreeSHAP engine,
+plus batch throughput of ``TreeShapEngine.explain_batch``.
+
+Run from the repository root:
+    python -m benchmarks.bench_explainability --repeat 20 --batch-rows 20000
+"""
+import argparse
+import time
+
+from benchmarks.bench_preprocess import make_batch
+from benchmarks.common import format_stats, time_calls
+from src.data_processing import preprocess_batch, preprocess_input
+from src.explainability import TreeShapEngine, explain_single_instance
+from src.inference import load_model
+
+SAMPLE_EMPLOYEE = {
+    'Age': 29, 'MonthlyIncome': 2800, 'OverTime': 'Yes',
+    'TotalWorkingYears': 4, 'YearsAtCompany': 2, 'NumCompaniesWorked': 3,
+    'DistanceFromHome': 18, 'EnvironmentSatisfaction': 2, 'JobSatisfaction': 2,
+    'WorkLifeBalance': 2, 'JobRole': 'Sales Representative', 'Gender': 'Male',
+    'BusinessTravel': 'Travel_Frequently', 'MaritalStatus': 'Single',
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20, help="Timed explanations per engine.")
+    parser.add_argument("--kernel-repeat", type=int, default=3, help="Timed KernelExplainer calls (slow).")
+    parser.add_argument("--batch-rows", type=int, default=20_000, help="Rows for the batch throughput run.")
+    args = parser.parse_args()
+
+    model = load_model()
+    processed_input, feature_names = preprocess_input(SAMPLE_EMPLOYEE)
+
+    start = time.perf_counter()
+    engine = TreeShapEngine.from_saved_model(feature_names)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    kernel_stats = time_calls(
+        lambda: explain_single_instance(model, processed_input, feature_names),
+        repeat=args.kernel_repeat,
+        warmup=0,
+    )
+    tree_stats = time_calls(
+        lambda: explain_single_instance(model, processed_input, feature_names, engine=engine),
+        repeat=args.repeat,
+    )
+
+    print(f"TreeShapEngine one-off build: {build_ms:.1f} ms")
+    print(format_stats("KernelExplainer (per call)", kernel_stats))
+    print(format_stats("TreeShapEngine (per call)", tree_stats))
+    print(f"Speed-up (mean): {kernel_stats['mean_ms'] / tree_stats['mean_ms']:.1f}x")
+
+    print("\nKernel factors:", explain_single_instance(model, processed_input, feature_names))
+    print("Tree factors:  ", engine.explain(processed_input))
+
+    processed_batch, _ = preprocess_batch(make_batch(args.batch_rows))
+    start = time.perf_counter()
+    drivers = engine.explain_batch(processed_batch, top_k=3)
+    elapsed = time.perf_counter() - start
+    print(f"\nexplain_batch: {len(drivers):,} rows in {elapsed:.2f}s ({len(drivers) / elapsed:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
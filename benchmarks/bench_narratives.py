@@ -0,0 +1,63 @@
+"""Serial vs concurrent per-employee narratives against the stub LLM server.
+
+Starts ``benchmarks.stub_llm_server`` in-process and points a real ``ChatGroq``
+client at it, so the full agent -> HTTP path is exercised without network
+access or API cost. The LLM response cache is disabled and every employee gets
+distinct factors, so each row costs one round-trip.
+
+Run from the repository root:
+    python -m benchmarks.bench_narratives --rows 40 --latency-ms 500 --concurrency 16 --rate-limit-prob 0.1
+"""
+import argparse
+import time
+
+import pandas as pd
+from langchain_groq import ChatGroq
+
+from benchmarks.stub_llm_server import StubLLMServer
+from src.agent import HRAgent
+from src.narratives import generate_narratives
+
+
+def make_results(n_rows: int):
+    results_df = pd.DataFrame({
+        "employee_id": [f"E{i:05d}" for i in range(n_rows)],
+        "Risk_Score_Pct": [50.0 + (i % 50) for i in range(n_rows)],
+    })
+    factors = {i: [f"OverTime_Yes (Value: 1) increases risk", f"Age (Value: {20 + i}) increases risk"] for i in range(n_rows)}
+    return results_df, factors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=40)
+    parser.add_argument("--latency-ms", type=float, default=500.0)
+    parser.add_argument("--rate-limit-prob", type=float, default=0.0)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    server = StubLLMServer(args.port, args.latency_ms, rate_limit_prob=args.rate_limit_prob)
+    server.start_in_thread()
+    # Client-side retries off so rate limits reach our backoff
+    llm = ChatGroq(groq_api_base=f"http://127.0.0.1:{args.port}", groq_api_key="stub", model_name="stub", max_retries=0)
+    agent = HRAgent(llm=llm, cache=False)
+
+    try:
+        for concurrency in (1, args.concurrency):
+            results_df, factors = make_results(args.rows)
+            server.rate_limited = 0
+            start = time.perf_counter()
+            results_df = generate_narratives(agent, results_df, factors, concurrency=concurrency, base_delay_s=0.2)
+            elapsed = time.perf_counter() - start
+            errors = results_df["AI_Narrative"].str.startswith("Error").sum()
+            print(
+                f"concurrency={concurrency:<3} rows={args.rows} time={elapsed:.2f}s "
+                f"({args.rows / elapsed:.1f} narratives/s) 429s={server.rate_limited} errors={errors}"
+            )
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
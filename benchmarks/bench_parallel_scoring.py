@@ -0,0 +1,56 @@
+"""Scaling of ParallelScorer with the number of worker processes.
+
+Run from the repository root:
+    python -m benchmarks.bench_parallel_scoring --rows 1000000 --workers 1 2 4 8 16 32
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from src.batch_score import score_frame
+from src.inference import load_booster_model, load_threshold
+from src.parallel_scoring import ParallelScorer
+from src.synthetic import generate_workforce
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--chunksize", type=int, default=25_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    batch_df = generate_workforce(args.rows)
+    threshold = load_threshold()
+    print(f"{args.rows:,} rows, chunksize {args.chunksize:,}, {os.cpu_count()} CPUs\n")
+
+    # Single-process reference, also used to check ordering and values
+    model = load_booster_model()
+    start = time.perf_counter()
+    expected = score_frame(model, batch_df, threshold)
+    serial_s = time.perf_counter() - start
+    print(f"{'in-process':>10}: {serial_s:7.2f}s  {args.rows / serial_s:12,.0f} rows/s")
+
+    print(f"\n{'workers':>10} {'wall (s)':>9} {'rows/s':>12} {'speed-up':>9} {'efficiency':>11}")
+    base_s = None
+    for workers in args.workers:
+        scorer = ParallelScorer(workers=workers, threshold=threshold)
+        start = time.perf_counter()
+        results_df = scorer.score_frame(batch_df, chunksize=args.chunksize)
+        wall_s = time.perf_counter() - start
+
+        assert results_df.index.equals(expected.index)
+        assert np.allclose(results_df["Attrition_Probability"], expected["Attrition_Probability"])
+
+        base_s = base_s or wall_s * args.workers[0]
+        speed_up = base_s / wall_s
+        print(f"{workers:>10} {wall_s:9.2f} {args.rows / wall_s:12,.0f} {speed_up:8.2f}x {speed_up / workers:10.0%}")
+
+    print("\nPer-worker throughput of the last run:")
+    print(scorer.worker_throughput().to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
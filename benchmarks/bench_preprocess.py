@@ -0,0 +1,78 @@
+"""Encoding throughput: row-by-row preprocess_input vs. columnar preprocess_batch.
+
+Run from the repository root:
+    python -m benchmarks.bench_preprocess --sizes 1000 100000 1000000
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.data_processing import preprocess_batch, preprocess_input
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_PATH = os.path.join(BASE_DIR, "hr_guardian_batch_test.csv")
+
+
+def make_batch(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """Tile the sample batch CSV up to ``n_rows`` rows in shuffled order."""
+    sample = pd.read_csv(SAMPLE_PATH)
+    rng = np.random.default_rng(seed)
+    return sample.iloc[rng.integers(0, len(sample), size=n_rows)].reset_index(drop=True)
+
+
+def rowwise(batch_df: pd.DataFrame) -> pd.DataFrame:
+    """The original Batch Prediction tab loop."""
+    processed_rows = []
+    for row in batch_df.to_dict(orient="records"):
+        processed_row, _ = preprocess_input(row)
+        processed_rows.append(processed_row.iloc[0])
+    return pd.DataFrame(processed_rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--max-rowwise", type=int, default=10_000,
+                        help="Largest size to run the row-wise path on; larger sizes are extrapolated.")
+    args = parser.parse_args()
+
+    # Parity check on a small batch before timing anything
+    check_df = make_batch(1_000, seed=1)
+    expected = rowwise(check_df).reset_index(drop=True)
+    actual, _ = preprocess_batch(check_df)
+    assert expected.columns.tolist() == actual.columns.tolist()
+    assert (expected.dtypes == actual.dtypes).all()
+    assert np.array_equal(expected.to_numpy(), actual.to_numpy())
+    print("Parity check passed: preprocess_batch == stacked preprocess_input\n")
+
+    print(f"{'rows':>10} {'row-wise (s)':>14} {'batch (s)':>11} {'batch rows/s':>14} {'speed-up':>9}")
+    rowwise_per_row = None
+    for n_rows in args.sizes:
+        batch_df = make_batch(n_rows)
+
+        start = time.perf_counter()
+        preprocess_batch(batch_df)
+        batch_s = time.perf_counter() - start
+
+        if n_rows <= args.max_rowwise:
+            start = time.perf_counter()
+            rowwise(batch_df)
+            rowwise_s = time.perf_counter() - start
+            rowwise_per_row = rowwise_s / n_rows
+            rowwise_label = f"{rowwise_s:14.3f}"
+        elif rowwise_per_row is not None:
+            rowwise_s = rowwise_per_row * n_rows
+            rowwise_label = f"{rowwise_s:13.1f}*"
+        else:
+            rowwise_s, rowwise_label = float("nan"), f"{'-':>14}"
+
+        print(f"{n_rows:>10} {rowwise_label} {batch_s:11.3f} {n_rows / batch_s:14,.0f} {rowwise_s / batch_s:8.0f}x")
+
+    print("\n* extrapolated from the largest measured row-wise run")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Cold-start benchmark: import time and time to first prediction.
+
+Every measurement runs in a fresh interpreter so module caches do not hide
+import cost. For each scenario it reports the median over ``--runs`` of the
+import time, model/threshold load time and first-prediction time, plus which
+heavy libraries ended up imported.
+
+Run from the repository root:
+    python -m benchmarks.bench_startup --runs 3
+    python -m benchmarks.bench_startup --json startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ["shap", "evidently", "langchain_core", "langchain_groq", "sklearn", "xgboost", "pyarrow"]
+
+# Modules the dashboard imports at startup (frontend/app.py minus streamlit itself)
+DASHBOARD_IMPORTS = (
+    "src.inference, src.data_processing, src.explainability, src.agent, src.monitoring, "
+    "src.batch_score, src.cache, src.narratives, src.metrics"
+)
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {imports}
+imported = time.perf_counter()
+from src.data_processing import preprocess_input
+from src.inference import load_serving_model, load_threshold, predict_attrition
+model = load_serving_model({backend!r})
+threshold = load_threshold()
+loaded = time.perf_counter()
+processed, _ = preprocess_input({{"Age": 29, "OverTime": "Yes", "MonthlyIncome": 2800}})
+predict_attrition(model, processed)
+predicted = time.perf_counter()
+print(json.dumps({{
+    "import_s": imported - start,
+    "load_s": loaded - imported,
+    "first_prediction_s": predicted - loaded,
+    "total_s": predicted - start,
+    "heavy_imported": [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+SCENARIOS = {
+    "api (booster)": ("api.main", "booster"),
+    "api (numpy)": ("api.main", "numpy"),
+    "api (sklearn pickle)": ("api.main", "sklearn"),
+    "dashboard modules (booster)": (DASHBOARD_IMPORTS, "booster"),
+}
+
+
+def run_probe(imports: str, backend: str) -> dict:
+    code = PROBE.format(imports=imports, backend=backend, heavy=HEAVY_MODULES)
+    env = dict(os.environ, HR_PREDICTION_LOG="0", PYTHONWARNINGS="ignore")
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True, env=env
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters per scenario.")
+    parser.add_argument("--json", default=None, help="Also write the results to this file.")
+    args = parser.parse_args()
+
+    results = {}
+    for label, (imports, backend) in SCENARIOS.items():
+        runs = [run_probe(imports, backend) for _ in range(args.runs)]
+        results[label] = {
+            key: round(statistics.median(run[key] for run in runs), 4)
+            for key in ("import_s", "load_s", "first_prediction_s", "total_s")
+        }
+        results[label]["heavy_imported"] = runs[-1]["heavy_imported"]
+        row = results[label]
+        print(
+            f"{label:<30} import={row['import_s']:.2f}s load={row['load_s']:.2f}s "
+            f"first_prediction={row['first_prediction_s'] * 1000:.1f}ms total={row['total_s']:.2f}s "
+            f"heavy={','.join(row['heavy_imported']) or '-'}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Single-row latency of each inference backend, with a parity check.
+
+The compiled NumPy evaluator must match the sklearn wrapper's predict_proba
+to 1e-6 on the training data (and on perturbed rows with missing values).
+
+Run from the repository root:
+    python -m benchmarks.bench_tree_evaluator --repeat 2000
+"""
+import argparse
+
+import numpy as np
+
+from benchmarks.common import format_stats, time_calls
+from src.data_loader import load_data, preprocess_data
+from src.explainability import DATA_PATH
+from src.inference import load_booster_model, load_compiled_model, load_model, predict_attrition
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--tolerance", type=float, default=1e-6)
+    args = parser.parse_args()
+
+    sklearn_model = load_model()
+    booster_model = load_booster_model()
+    compiled = load_compiled_model()
+
+    X, _, _ = preprocess_data(load_data(DATA_PATH))
+    X = X[compiled.feature_names]
+
+    # Parity: training rows, then the same rows with noise and ~5% missing values
+    rng = np.random.default_rng(0)
+    perturbed = X.astype(float) * rng.uniform(0.8, 1.2, size=X.shape)
+    perturbed = perturbed.mask(rng.random(X.shape) < 0.05)
+    for label, data in [("training rows", X), ("perturbed + NaN", perturbed)]:
+        expected = sklearn_model.predict_proba(data)[:, 1]
+        actual = compiled.predict_proba(data)[:, 1]
+        error = np.abs(expected - actual).max()
+        status = "OK" if error <= args.tolerance else "FAIL"
+        print(f"parity {label:<16} max |diff| = {error:.2e}  [{status}]")
+        assert error <= args.tolerance
+
+    row_values = X.iloc[0].to_numpy(dtype=np.float32)
+    assert abs(compiled.predict_proba_row(row_values) - sklearn_model.predict_proba(X.iloc[[0]])[0, 1]) <= args.tolerance
+    row_frame = X.iloc[[0]]
+    print()
+
+    cases = [
+        ("sklearn predict_attrition", lambda: predict_attrition(sklearn_model, row_frame)),
+        ("booster predict_attrition", lambda: predict_attrition(booster_model, row_frame)),
+        ("numpy predict_attrition", lambda: predict_attrition(compiled, row_frame)),
+        ("numpy predict_proba_row", lambda: compiled.predict_proba_row(row_values)),
+    ]
+    for label, fn in cases:
+        print(format_stats(label, time_calls(fn, repeat=args.repeat, warmup=50)))
+
+
+if __name__ == "__main__":
+    main()
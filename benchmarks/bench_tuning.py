@@ -0,0 +1,42 @@
+"""Wall time of the cross-validated hyperparameter search against worker count.
+
+Nothing is saved; the same trials run at every worker count, so only the
+schedule (and which trials get pruned) changes.
+
+Run from the repository root:
+    python -m benchmarks.bench_tuning --trials 16 --workers 1 2 4 8
+"""
+import argparse
+import os
+import time
+
+from src.tuning import HyperparameterSearch, sample_trials, split_training_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--trials", type=int, default=16)
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--no-prune", action="store_true")
+    args = parser.parse_args()
+
+    _, train_rows, _ = split_training_store()
+    trials = sample_trials(args.trials)
+    print(f"{args.trials} trials x {args.folds} folds on {len(train_rows)} rows, {os.cpu_count()} CPUs\n")
+
+    print(f"{'workers':>8} {'nthread':>8} {'wall (s)':>9} {'speed-up':>9} {'pruned':>7} {'best PR-AUC':>12}")
+    base_s = None
+    for workers in args.workers:
+        search = HyperparameterSearch(n_splits=args.folds, workers=workers, prune=not args.no_prune)
+        start = time.perf_counter()
+        board = search.run(trials, train_rows)
+        wall_s = time.perf_counter() - start
+
+        base_s = base_s or wall_s * args.workers[0]
+        pruned = int((board["status"] == "pruned").sum())
+        print(f"{workers:>8} {search.nthread:>8} {wall_s:9.2f} {base_s / wall_s:8.2f}x {pruned:>7} {board['cv_pr_auc'].iloc[0]:12.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""What-if surface build time against grid size, compared with scoring point by point.
+
+Run from the repository root:
+    python -m benchmarks.bench_whatif --points 10 50 100 200
+"""
+import argparse
+
+from benchmarks.common import format_stats, time_calls
+from src.data_processing import preprocess_input
+from src.inference import load_serving_model, load_threshold
+from src.whatif import WhatIfSurface
+
+BASE_PROFILE = {
+    'Age': 30, 'MonthlyIncome': 5000, 'OverTime': 'Yes', 'TotalWorkingYears': 5, 'YearsAtCompany': 3,
+    'NumCompaniesWorked': 1, 'DistanceFromHome': 10, 'EnvironmentSatisfaction': 3, 'JobSatisfaction': 3,
+    'WorkLifeBalance': 3, 'JobRole': 'Sales Executive', 'Gender': 'Male', 'BusinessTravel': 'Travel_Rarely',
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backend", default=None, help="Inference backend (defaults to HR_INFERENCE_BACKEND).")
+    parser.add_argument("--points", type=int, nargs="+", default=[10, 50, 100])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    model = load_serving_model(args.backend)
+    threshold = load_threshold()
+    features = ["MonthlyIncome", "Age"]
+
+    for points in args.points:
+        surface = WhatIfSurface.build(model, BASE_PROFILE, features, threshold, points=points)
+        n = surface.probabilities.size
+        stats = time_calls(lambda: WhatIfSurface.build(model, BASE_PROFILE, features, threshold, points=points), repeat=args.repeat)
+        print(format_stats(f"grid {n:>6} points", stats))
+
+    # Reference: one preprocess + predict per point, as the dashboard did before
+    surface = WhatIfSurface.build(model, BASE_PROFILE, features, threshold, points=10)
+    records = [dict(BASE_PROFILE, MonthlyIncome=row.MonthlyIncome, Age=row.Age) for row in surface.to_frame().itertuples()]
+    stats = time_calls(lambda: [model.predict_proba(preprocess_input(r)[0]) for r in records], repeat=3)
+    print(format_stats(f"loop   {len(records):>6} points", stats))
+    lookup = time_calls(lambda: surface.lookup(MonthlyIncome=12000, Age=45), repeat=1000)
+    print(format_stats("surface lookup", lookup))
+
+
+if __name__ == "__main__":
+    main()
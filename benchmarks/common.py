@@ -0,0 +1,40 @@
+import time
+import numpy as np
+from typing import Callable, Dict
+
+
+def time_calls(fn: Callable[[], object], repeat: int = 20, warmup: int = 1) -> Dict[str, float]:
+    """Time repeated calls of ``fn`` and summarize the latency distribution.
+
+    Args:
+        fn (Callable): Zero-argument callable to measure.
+        repeat (int): Number of timed calls.
+        warmup (int): Untimed calls made first (imports, caches, JIT).
+
+    Returns:
+        Dict[str, float]: Mean, p50, p95, p99 and max latency in milliseconds.
+    """
+    for _ in range(warmup):
+        fn()
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    timings = np.array(timings)
+    return {
+        "mean_ms": float(timings.mean()),
+        "p50_ms": float(np.percentile(timings, 50)),
+        "p95_ms": float(np.percentile(timings, 95)),
+        "p99_ms": float(np.percentile(timings, 99)),
+        "max_ms": float(timings.max()),
+    }
+
+
+def format_stats(label: str, stats: Dict[str, float]) -> str:
+    return (
+        f"{label:<28} mean={stats['mean_ms']:9.3f} ms  p50={stats['p50_ms']:9.3f} ms  "
+        f"p95={stats['p95_ms']:9.3f} ms  max={stats['max_ms']:9.3f} ms"
+    )
@@ -0,0 +1,151 @@
+"""Closed-loop load test for the scoring API.
+
+Starts a local uvicorn server (unless --url is given), then keeps
+``--concurrency`` clients busy sending /predict requests for ``--duration``
+seconds and reports throughput, latency percentiles and status codes.
+
+Run from the repository root:
+    python -m benchmarks.load_test_api --concurrency 64 --duration 20
+    HR_API_MICROBATCH=1 python -m benchmarks.load_test_api --concurrency 64
+    python -m benchmarks.load_test_api --url http://127.0.0.1:8000 --endpoint /predict/batch --batch-size 100
+    python -m benchmarks.load_test_api --workforce 100000 --drift OverTime:Yes=0.6   # distinct synthetic employees
+"""
+import argparse
+import http.client
+import itertools
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlparse
+
+import numpy as np
+
+SAMPLE_EMPLOYEE = {
+    "Age": 29, "MonthlyIncome": 2800, "OverTime": "Yes", "TotalWorkingYears": 4,
+    "YearsAtCompany": 2, "NumCompaniesWorked": 3, "DistanceFromHome": 18,
+    "JobRole": "Sales Representative", "Department": "Sales", "MaritalStatus": "Single",
+}
+
+
+def wait_until_ready(host: str, port: int, timeout_s: float = 60.0) -> None:
+    deadline = time.time() + timeout_s
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=2)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.25)
+    raise TimeoutError(f"API at {host}:{port} did not become ready in {timeout_s}s")
+
+
+def run_client(host, port, path, bodies, stop_at, latencies, statuses, lock):
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    next_body = itertools.cycle(bodies)
+    headers = {"Content-Type": "application/json"}
+    local_latencies, local_statuses = [], Counter()
+    while time.perf_counter() < stop_at:
+        start = time.perf_counter()
+        try:
+            conn.request("POST", path, body=next(next_body), headers=headers)
+            response = conn.getresponse()
+            response.read()
+            status = response.status
+        except OSError:
+            status = "error"
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=30)
+        local_statuses[status] += 1
+        if status == 200:
+            local_latencies.append((time.perf_counter() - start) * 1000)
+    conn.close()
+    with lock:
+        latencies.extend(local_latencies)
+        statuses.update(local_statuses)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="Target an already running server instead of spawning one.")
+    parser.add_argument("--port", type=int, default=8765, help="Port for the spawned server.")
+    parser.add_argument("--endpoint", default="/predict", choices=["/predict", "/predict/batch"])
+    parser.add_argument("--batch-size", type=int, default=50, help="Records per /predict/batch request.")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds of load.")
+    parser.add_argument("--workforce", type=int, default=0,
+                        help="Send this many distinct synthetic employees (src.synthetic) instead of one sample.")
+    parser.add_argument("--drift", nargs="*", default=[], help="Drift for the synthetic workforce, e.g. MonthlyIncome=0.8")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = None
+    if args.url:
+        target = urlparse(args.url)
+        host, port = target.hostname, target.port or 80
+    else:
+        host, port = "127.0.0.1", args.port
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "api.main:app", "--host", host, "--port", str(port), "--log-level", "warning"],
+            env=os.environ.copy(),
+        )
+
+    try:
+        wait_until_ready(host, port)
+        if args.workforce:
+            from src.synthetic import generate_workforce, parse_drift
+
+            workforce = generate_workforce(args.workforce, seed=args.seed, drift=parse_drift(args.drift))
+            employees = json.loads(workforce.drop(columns="EmployeeNumber").to_json(orient="records"))
+        else:
+            employees = [SAMPLE_EMPLOYEE]
+        if args.endpoint == "/predict":
+            bodies = [json.dumps(employee) for employee in employees]
+            rows_per_request = 1
+        else:
+            size = args.batch_size
+            # Repeat the sample employee(s) to fill at least one full batch
+            pool = employees * -(-size // len(employees))
+            bodies = [json.dumps({"employees": pool[i:i + size]}) for i in range(0, len(pool) - size + 1, size)]
+            rows_per_request = size
+
+        latencies, statuses, lock = [], Counter(), threading.Lock()
+        stop_at = time.perf_counter() + args.duration
+        clients = [
+            threading.Thread(target=run_client, args=(host, port, args.endpoint, bodies[i::args.concurrency] or bodies, stop_at, latencies, statuses, lock))
+            for i in range(args.concurrency)
+        ]
+        start = time.perf_counter()
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+        elapsed = time.perf_counter() - start
+
+        ok = statuses.get(200, 0)
+        print(f"endpoint={args.endpoint} concurrency={args.concurrency} duration={elapsed:.1f}s")
+        print(f"status codes: {dict(statuses)}")
+        print(f"throughput: {ok / elapsed:,.1f} req/s ({ok * rows_per_request / elapsed:,.0f} rows/s)")
+        if latencies:
+            lat = np.array(latencies)
+            print(
+                f"latency ms: p50={np.percentile(lat, 50):.2f} p90={np.percentile(lat, 90):.2f} "
+                f"p99={np.percentile(lat, 99):.2f} max={lat.max():.2f}"
+            )
+
+        conn = http.client.HTTPConnection(host, port, timeout=5)
+        conn.request("GET", "/health")
+        print(f"server: {conn.getresponse().read().decode()}")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
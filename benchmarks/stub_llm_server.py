@@ -0,0 +1,109 @@
+"""Local stand-in for the Groq chat completions API with injected latency.
+
+Every POST to ``.../chat/completions`` sleeps for ``--latency-ms`` (plus up to
+``--jitter-ms``) and returns a canned OpenAI-format completion. With
+``--rate-limit-prob`` a share of requests is answered ``429`` with a
+``Retry-After`` header instead, to exercise backoff.
+
+Point an agent at it with:
+    ChatGroq(groq_api_base="http://127.0.0.1:8766", groq_api_key="stub", model_name="stub")
+
+Run from the repository root:
+    python -m benchmarks.stub_llm_server --latency-ms 800 --rate-limit-prob 0.1
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CANNED_REPLY = "Overtime and a short tenure drive this risk. Offer flexible hours and a check-in with the manager."
+
+
+class StubLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int, latency_ms: float = 500.0, jitter_ms: float = 0.0,
+                 rate_limit_prob: float = 0.0, retry_after_s: float = 0.2):
+        super().__init__(("127.0.0.1", port), StubHandler)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_limit_prob = rate_limit_prob
+        self.retry_after_s = retry_after_s
+        self.lock = threading.Lock()
+        self.completions = 0
+        self.rate_limited = 0
+
+    def start_in_thread(self) -> threading.Thread:
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: dict, headers: dict = None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        server = self.server
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if not self.path.endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+
+        if random.random() < server.rate_limit_prob:
+            with server.lock:
+                server.rate_limited += 1
+            self._send_json(
+                429,
+                {"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}},
+                {"Retry-After": str(server.retry_after_s)},
+            )
+            return
+
+        time.sleep((server.latency_ms + random.uniform(0, server.jitter_ms)) / 1000.0)
+        with server.lock:
+            server.completions += 1
+        self._send_json(200, {
+            "id": f"stub-{server.completions}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": CANNED_REPLY},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency-ms", type=float, default=500.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--rate-limit-prob", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = StubLLMServer(args.port, args.latency_ms, args.jitter_ms, args.rate_limit_prob)
+    print(f"Stub LLM listening on http://127.0.0.1:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
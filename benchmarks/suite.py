@@ -0,0 +1,429 @@
+"""Reproducible benchmark suite: latency percentiles, throughput and peak RSS per stage.
+
+Each stage (encoding, scoring, explanations, drift and the API end to end)
+runs in a fresh interpreter on a seeded synthetic workforce from
+``src.synthetic.generate_workforce``, so one stage's caches and memory do not leak
+into the next. Results are written as JSON and compared with a stored
+baseline; the exit code is 1 when a stage regressed beyond the tolerances.
+
+Run from the repository root:
+    python -m benchmarks.suite --save-baseline                 # record this machine's baseline
+    python -m benchmarks.suite                                 # compare against it
+    python -m benchmarks.suite --sizes 1000 100000 --stages predict_attrition_batch explain_batch
+"""
+import argparse
+import atexit
+import contextlib
+import importlib.metadata
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows: peak RSS is not reported
+    resource = None
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BASE_DIR, "benchmarks", "results")
+BASELINE_PATH = os.path.join(RESULTS_DIR, "baseline.json")
+
+DEFAULT_SIZES = [1_000, 10_000]
+# Distinct employees cycled through by the single-row stages
+SINGLE_POOL = 1_000
+RESULT_PREFIX = "SUITE_RESULT "
+
+# Allowed relative change before a metric counts as a regression
+LATENCY_TOLERANCE = 0.20
+MEMORY_TOLERANCE = 0.25
+# RSS changes below this are noise (allocator, import order)
+MIN_RSS_DELTA_MB = 16.0
+
+
+def _workforce(n_rows: int, seed: int):
+    from src.synthetic import generate_workforce
+
+    return generate_workforce(n_rows, seed=seed).drop(columns="EmployeeNumber")
+
+
+def _records(n_rows: int, seed: int) -> List[dict]:
+    # JSON-safe Python scalars for the API payloads
+    return json.loads(_workforce(n_rows, seed).to_json(orient="records"))
+
+
+def _encoded(n_rows: int, seed: int):
+    from src.data_processing import preprocess_batch
+
+    encoded, feature_names = preprocess_batch(_workforce(n_rows, seed))
+    return encoded, feature_names
+
+
+def _cycle(items) -> Callable[[], object]:
+    iterator = itertools.cycle(items)
+    return lambda: next(iterator)
+
+
+class StageSkipped(Exception):
+    """Raised by a stage setup when an optional dependency is missing."""
+
+
+# --- Stage setups: (n_rows, seed, calls) -> (zero-argument callable, rows per call) ---
+
+def _setup_preprocess_input(n_rows, seed, calls):
+    from src.data_processing import preprocess_input
+
+    next_record = _cycle(_records(SINGLE_POOL, seed))
+    return lambda: preprocess_input(next_record()), 1
+
+
+def _setup_preprocess_batch(n_rows, seed, calls):
+    from src.data_processing import preprocess_batch
+
+    batch = _workforce(n_rows, seed)
+    return lambda: preprocess_batch(batch), n_rows
+
+
+def _setup_predict_attrition(n_rows, seed, calls):
+    from src.inference import load_serving_model, predict_attrition
+
+    model = load_serving_model()
+    encoded, _ = _encoded(SINGLE_POOL, seed)
+    next_row = _cycle([encoded.iloc[[i]] for i in range(len(encoded))])
+    return lambda: predict_attrition(model, next_row()), 1
+
+
+def _setup_predict_attrition_batch(n_rows, seed, calls):
+    from src.inference import load_serving_model, predict_attrition_batch
+
+    model = load_serving_model()
+    encoded, _ = _encoded(n_rows, seed)
+    return lambda: predict_attrition_batch(model, encoded), n_rows
+
+
+def _setup_explain_single_instance(n_rows, seed, calls):
+    from src.explainability import TreeShapEngine, explain_single_instance
+    from src.inference import load_serving_model
+
+    model = load_serving_model()
+    encoded, feature_names = _encoded(SINGLE_POOL, seed)
+    engine = TreeShapEngine.from_saved_model(feature_names)
+    next_row = _cycle([encoded.iloc[[i]] for i in range(len(encoded))])
+    return lambda: explain_single_instance(model, next_row(), feature_names, engine=engine), 1
+
+
+def _setup_explain_batch(n_rows, seed, calls):
+    from src.explainability import TreeShapEngine
+
+    encoded, feature_names = _encoded(n_rows, seed)
+    engine = TreeShapEngine.from_saved_model(feature_names)
+    return lambda: engine.explain_batch(encoded, top_k=3), n_rows
+
+
+def _setup_drift_monitor(n_rows, seed, calls):
+    from src.monitoring import DriftMonitor, ReferenceProfile
+
+    monitor = DriftMonitor(ReferenceProfile.load_or_build(), state_path=None)
+    encoded, _ = _encoded(n_rows, seed)
+    return lambda: monitor.update(encoded), n_rows
+
+
+def _setup_generate_drift_report(n_rows, seed, calls):
+    try:
+        import evidently  # noqa: F401
+    except ImportError:
+        raise StageSkipped("evidently is not installed")
+    from src.monitoring import generate_drift_report
+
+    batch = _workforce(n_rows, seed)
+    return lambda: generate_drift_report(batch), n_rows
+
+
+def _api_client():
+    from fastapi.testclient import TestClient
+
+    from api.main import app
+
+    # Runs the app lifespan (registry load, executor, cache) until the process exits
+    stack = contextlib.ExitStack()
+    client = stack.enter_context(TestClient(app))
+    atexit.register(stack.close)
+    return client
+
+
+def _post(client, path: str, body: str) -> None:
+    response = client.post(path, content=body, headers={"Content-Type": "application/json"})
+    if response.status_code != 200:
+        raise RuntimeError(f"POST {path} returned {response.status_code}: {response.text[:200]}")
+
+
+def _setup_api_predict(n_rows, seed, calls):
+    client = _api_client()
+    # Distinct employees per call, so the prediction cache never answers
+    bodies = [json.dumps(record) for record in _records(max(SINGLE_POOL, calls), seed)]
+    next_body = _cycle(bodies)
+    return lambda: _post(client, "/predict", next_body()), 1
+
+
+def _setup_api_predict_batch(n_rows, seed, calls):
+    from api.main import MAX_BATCH_SIZE
+
+    client = _api_client()
+    n_rows = min(n_rows, MAX_BATCH_SIZE)
+    records = _records(n_rows * calls, seed)
+    bodies = [json.dumps({"employees": records[i:i + n_rows]}) for i in range(0, len(records), n_rows)]
+    next_body = _cycle(bodies)
+    return lambda: _post(client, "/predict/batch", next_body()), n_rows
+
+
+# name -> (setup, kind); "single" stages score one row per call, "batch" and "report" one batch per size
+STAGES = {
+    "preprocess_input": (_setup_preprocess_input, "single"),
+    "preprocess_batch": (_setup_preprocess_batch, "batch"),
+    "predict_attrition": (_setup_predict_attrition, "single"),
+    "predict_attrition_batch": (_setup_predict_attrition_batch, "batch"),
+    "explain_single_instance": (_setup_explain_single_instance, "single"),
+    "explain_batch": (_setup_explain_batch, "batch"),
+    "drift_monitor": (_setup_drift_monitor, "batch"),
+    "generate_drift_report": (_setup_generate_drift_report, "report"),
+    "api_predict": (_setup_api_predict, "single"),
+    "api_predict_batch": (_setup_api_predict_batch, "batch"),
+}
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process so far (``None`` where unsupported)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_stage(name: str, n_rows: int, repeat: int, warmup: int, seed: int) -> Dict[str, object]:
+    """Set up and time one stage in this process."""
+    from benchmarks.common import time_calls
+
+    setup, _ = STAGES[name]
+    start = time.perf_counter()
+    fn, rows_per_call = setup(n_rows, seed, repeat + warmup)
+    setup_s = time.perf_counter() - start
+    setup_rss = peak_rss_mb()
+
+    stats = time_calls(fn, repeat=repeat, warmup=warmup)
+    peak_rss = peak_rss_mb()
+    return {
+        "status": "ok",
+        "rows_per_call": rows_per_call,
+        "calls": repeat,
+        **{key: round(value, 4) for key, value in stats.items()},
+        "rows_per_s": round(rows_per_call / (stats["mean_ms"] / 1000), 1),
+        "setup_s": round(setup_s, 3),
+        "setup_rss_mb": None if setup_rss is None else round(setup_rss, 1),
+        "peak_rss_mb": None if peak_rss is None else round(peak_rss, 1),
+        "stage_rss_mb": None if peak_rss is None else round(peak_rss - setup_rss, 1),
+    }
+
+
+def _stage_env(scratch_dir: str) -> Dict[str, str]:
+    env = os.environ.copy()
+    # Keep the suite from writing into logs/ and models/: the API logs and
+    # registers into a scratch dir and skips drift state (timed separately)
+    env.setdefault("HR_PREDICTION_LOG_DIR", os.path.join(scratch_dir, "predictions"))
+    env.setdefault("HR_MODEL_REGISTRY", os.path.join(scratch_dir, "registry"))
+    env.setdefault("HR_API_DRIFT", "0")
+    env["PYTHONPATH"] = BASE_DIR + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+
+def run_in_subprocess(name: str, n_rows: int, repeat: int, warmup: int, seed: int, env: Dict[str, str],
+                      timeout_s: float) -> Dict[str, object]:
+    """Run one stage in a fresh interpreter and parse its result line."""
+    command = [
+        sys.executable, "-m", "benchmarks.suite", "--run-stage", name,
+        "--rows", str(n_rows), "--repeat", str(repeat), "--warmup", str(warmup), "--seed", str(seed),
+    ]
+    try:
+        completed = subprocess.run(command, cwd=BASE_DIR, env=env, capture_output=True, text=True, timeout=timeout_s)
+    except subprocess.TimeoutExpired:
+        return {"status": "error", "error": f"timed out after {timeout_s:.0f}s"}
+    for line in reversed(completed.stdout.splitlines()):
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX):])
+    tail = (completed.stderr or completed.stdout).strip().splitlines()[-5:]
+    return {"status": "error", "error": "\n".join(tail) or f"exit code {completed.returncode}"}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _versions() -> Dict[str, Optional[str]]:
+    versions = {}
+    for package in ("numpy", "pandas", "scikit-learn", "xgboost", "fastapi"):
+        try:
+            versions[package] = importlib.metadata.version(package)
+        except importlib.metadata.PackageNotFoundError:
+            versions[package] = None
+    return versions
+
+
+def run_suite(stages: List[str], sizes: List[int], repeat: int, batch_repeat: int, report_repeat: int,
+              warmup: int, seed: int, timeout_s: float) -> Dict[str, object]:
+    """Run every stage (batch stages once per size) and collect the results.
+
+    Returns:
+        Dict[str, object]: ``meta`` (machine, versions, settings) and ``stages``
+        keyed by ``name`` for single-row stages and ``name[rows]`` for batch stages.
+    """
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "versions": _versions(),
+            "sizes": sizes,
+            "seed": seed,
+        },
+        "stages": {},
+    }
+    repeats = {"single": repeat, "batch": batch_repeat, "report": report_repeat}
+    with tempfile.TemporaryDirectory(prefix="hr-bench-") as scratch_dir:
+        env = _stage_env(scratch_dir)
+        for name in stages:
+            _, kind = STAGES[name]
+            for n_rows in ([1] if kind == "single" else sizes):
+                key = name if kind == "single" else f"{name}[{n_rows}]"
+                result = run_in_subprocess(name, n_rows, repeats[kind], warmup, seed, env, timeout_s)
+                results["stages"][key] = result
+                print(format_result(key, result), flush=True)
+    return results
+
+
+def format_result(key: str, result: Dict[str, object]) -> str:
+    if result["status"] != "ok":
+        return f"{key:<34} {result['status']}: {result.get('reason') or result.get('error')}"
+    rss = "n/a" if result["peak_rss_mb"] is None else f"{result['peak_rss_mb']:.0f} MB"
+    return (
+        f"{key:<34} p50={result['p50_ms']:9.3f} ms  p95={result['p95_ms']:9.3f} ms  "
+        f"p99={result['p99_ms']:9.3f} ms  {result['rows_per_s']:>12,.0f} rows/s  peak RSS {rss}"
+    )
+
+
+def compare(results: Dict[str, object], baseline: Dict[str, object], latency_tolerance: float = LATENCY_TOLERANCE,
+            memory_tolerance: float = MEMORY_TOLERANCE) -> List[Dict[str, object]]:
+    """Compare the stages present in both runs.
+
+    Latency (p50, p95) and throughput regress when they get worse by more than
+    ``latency_tolerance``; peak RSS when it grows by more than ``memory_tolerance``
+    and ``MIN_RSS_DELTA_MB``.
+
+    Returns:
+        List[Dict[str, object]]: One row per stage and metric with ``baseline``,
+        ``current``, relative ``change`` and ``regression``.
+    """
+    # metric -> (higher is worse, tolerance)
+    checks = {
+        "p50_ms": (True, latency_tolerance),
+        "p95_ms": (True, latency_tolerance),
+        "rows_per_s": (False, latency_tolerance),
+        "peak_rss_mb": (True, memory_tolerance),
+    }
+    rows = []
+    for key, current in results["stages"].items():
+        previous = baseline.get("stages", {}).get(key)
+        if previous is None or current["status"] != "ok" or previous["status"] != "ok":
+            continue
+        for metric, (higher_is_worse, tolerance) in checks.items():
+            old, new = previous.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            regression = change > tolerance if higher_is_worse else change < -tolerance
+            if metric == "peak_rss_mb" and new - old < MIN_RSS_DELTA_MB:
+                regression = False
+            rows.append({
+                "stage": key, "metric": metric, "baseline": old, "current": new,
+                "change": round(change, 4), "regression": bool(regression),
+            })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES))
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Workforce sizes for batch stages.")
+    parser.add_argument("--repeat", type=int, default=200, help="Timed calls per single-row stage.")
+    parser.add_argument("--batch-repeat", type=int, default=10, help="Timed calls per batch stage and size.")
+    parser.add_argument("--report-repeat", type=int, default=2, help="Timed Evidently report builds per size.")
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=900.0, help="Seconds before a stage is abandoned.")
+    parser.add_argument("--output", default=None, help="Results JSON (default: benchmarks/results/suite-<time>.json).")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline JSON to compare against, if it exists.")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the baseline.")
+    parser.add_argument("--tolerance", type=float, default=LATENCY_TOLERANCE, help="Allowed latency/throughput regression.")
+    parser.add_argument("--memory-tolerance", type=float, default=MEMORY_TOLERANCE, help="Allowed peak RSS growth.")
+    parser.add_argument("--run-stage", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--rows", type=int, default=1, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_stage:
+        # Child process: one stage, one JSON line on stdout
+        try:
+            result = run_stage(args.run_stage, args.rows, args.repeat, args.warmup, args.seed)
+        except StageSkipped as e:
+            result = {"status": "skipped", "reason": str(e)}
+        print(RESULT_PREFIX + json.dumps(result), flush=True)
+        return
+
+    print(f"Benchmark suite: sizes={args.sizes} seed={args.seed}\n")
+    results = run_suite(
+        args.stages, args.sizes, args.repeat, args.batch_repeat, args.report_repeat,
+        args.warmup, args.seed, args.timeout,
+    )
+
+    output = args.output or os.path.join(RESULTS_DIR, f"suite-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    paths = [output] + ([args.baseline] if args.save_baseline else [])
+    for path in paths:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+    if args.save_baseline:
+        print(f"Baseline stored at {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; store one with --save-baseline.")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    rows = compare(results, baseline, args.tolerance, args.memory_tolerance)
+    regressions = [row for row in rows if row["regression"]]
+    print(f"\nCompared with baseline from {baseline['meta'].get('timestamp')} (commit {baseline['meta'].get('git_commit')}):")
+    for row in rows:
+        marker = "REGRESSION" if row["regression"] else ""
+        print(f"  {row['stage']:<34} {row['metric']:<12} {row['baseline']:>12.3f} -> {row['current']:>12.3f} "
+              f"({row['change']:+.1%}) {marker}")
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond tolerance.")
+        sys.exit(1)
+    print("\nNo regressions beyond tolerance.")
+
+
+if __name__ == "__main__":
+    main()
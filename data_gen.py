@@ -1,5 +1,18 @@
+"""Sample data for batch testing and synthetic workforces for load tests.
+
+Run from the repository root:
+    python data_gen.py                                   # 10-row hr_guardian_batch_test.csv
+    python data_gen.py --rows 1000000 -o data/workforce_1m.parquet --workers 4
+    python data_gen.py --rows 200000 -o drifted.csv --drift MonthlyIncome=0.8 OverTime:Yes=0.6 --ramp
+"""
+import argparse
+
 import pandas as pd
 
+from src.synthetic import DEFAULT_CHUNKSIZE, parse_drift, write_workforce
+
+SAMPLE_PATH = "hr_guardian_batch_test.csv"
+
 # Creating a sample dataset for batch testing
 data = {
     'Age': [25, 45, 32, 28, 50, 22, 38, 41, 35, 29],
@@ -19,6 +32,30 @@ data = {
     'MaritalStatus': ['Single', 'Married', 'Divorced', 'Single', 'Married', 'Single', 'Married', 'Divorced', 'Single', 'Married']
 }
 
-df = pd.DataFrame(data)
-df.to_csv('hr_guardian_batch_test.csv', index=False)
-print("Batch testing data generated successfully!")
\ No newline at end of file
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write the batch test CSV or a synthetic workforce (see src/synthetic.py).")
+    parser.add_argument("--rows", type=int, default=None, help="Synthetic workforce size (default: the 10-row sample).")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="Rows generated and written at a time.")
+    parser.add_argument("--workers", type=int, default=1, help="Generator processes.")
+    parser.add_argument("--drift", nargs="*", default=[],
+                        help="Column=factor (numeric) or Column:Category=share (categorical), e.g. OverTime:Yes=0.6")
+    parser.add_argument("--ramp", action="store_true", help="Ramp the drift in from the first to the last row.")
+    parser.add_argument("-o", "--output", default=SAMPLE_PATH, help="Output .csv or .parquet path.")
+    args = parser.parse_args(argv)
+
+    if args.rows is None:
+        df = pd.DataFrame(data)
+        df.to_csv(args.output, index=False)
+        print("Batch testing data generated successfully!")
+    else:
+        stats = write_workforce(
+            args.output, args.rows, chunksize=args.chunksize, seed=args.seed,
+            drift=parse_drift(args.drift), ramp=args.ramp, workers=args.workers,
+        )
+        print(f"Synthetic workforce of {stats['rows']:,} employees written to {args.output} "
+              f"in {stats['elapsed_s']:.1f}s ({stats['rows_per_s']:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -2,7 +2,6 @@ import streamlit as st
 import pandas as pd
 import sys
 import os
-import streamlit.components.v1 as components
 
 import streamlit as st
 import os
@@ -36,24 +35,77 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 sys.path.insert(0, parent_dir)
 
-from src.inference import load_model, predict_attrition, predict_attrition_batch
-from src.data_processing import load_data, preprocess_input
-from src.explainability import explain_single_instance
+from src.inference import enable_prediction_log, is_fallback, predict_attrition, predict_attrition_batch
+from src.data_processing import preprocess_batch, preprocess_input
+from src.explainability import (
+    drivers_to_factors, explain_single_instance, format_driver_summary, summarize_drivers, TreeShapEngine,
+)
 from src.agent import HRAgent
-from src.monitoring import generate_drift_report
+from src.monitoring import (
+    DriftMonitor, encode_raw, generate_drift_report, load_logged_inputs, load_reference_data, simulate_production_data,
+)
+from src.batch_score import BatchSummary, attach_scores
+from src.feature_store import ID_COLUMNS
+from src.risk_index import RiskIndex, RiskIndexBuilder
+from src import metrics
+from src.cache import PredictionCache
+from src.narratives import NARRATIVE_COLUMN, generate_narratives
+from src.registry import ModelWatcher
+from src.whatif import WHATIF_FEATURES, WhatIfSurface
 
 # Page Config
 st.set_page_config(page_title="HR Guardian", layout="wide", page_icon="🛡️")
 
-# Initialize Resources
+# Initialize Resources (only the booster JSON; SHAP and the LLM load on first use)
 @st.cache_resource
 def get_resources():
-    df = load_data()
-    model = load_model()
+    # Follows the model registry: a promoted version is loaded in the background and swapped in
+    prediction_cache = PredictionCache(max_entries=512, artifact_paths=())
+
+    def on_swap(serving):
+        prediction_cache.set_model_version(serving.version)
+        enable_prediction_log(feature_names=serving.pipeline.feature_names)
+
+    model_watcher = ModelWatcher(on_swap=on_swap)
+    on_swap(model_watcher.load())
+    model_watcher.start()
     agent = HRAgent(use_mock=False)
-    return df, model, agent
+    # Saved in the background, not on every Analyze click or batch run
+    drift_monitor = DriftMonitor.load().start_autosave()
+    return model_watcher, agent, prediction_cache, drift_monitor
 
-df, model, agent = get_resources()
+@st.cache_resource
+def get_explainer_engine(model_version, model_path):
+    return TreeShapEngine.from_saved_model(model_path=model_path)
+
+@st.cache_resource(max_entries=32)
+def get_whatif_surface(model_version, profile_items, features, threshold):
+    # Keyed on the model version; built from the model the current run is using
+    return WhatIfSurface.build(model, dict(profile_items), list(features), threshold, pipeline=serving.pipeline)
+
+model_watcher, agent, prediction_cache, drift_monitor = get_resources()
+# One model version for the whole script run, even if a new one is promoted meanwhile
+serving = model_watcher.current
+model = serving.model
+st.sidebar.caption(f"Model version: `{serving.version}` (threshold {serving.threshold:.2f})")
+
+with st.sidebar.expander("⚡ Caches"):
+    st.json({
+        "predictions": prediction_cache.stats(),
+        "llm_responses": agent.cache.stats() if agent.cache is not None else None,
+    })
+
+with st.sidebar.expander("🐞 Latency Breakdown"):
+    metrics_snapshot = metrics.snapshot()
+    if not metrics_snapshot["enabled"]:
+        st.caption("Instrumentation is off (HR_METRICS=0).")
+    else:
+        if metrics_snapshot["stages"]:
+            st.dataframe(pd.DataFrame(metrics_snapshot["stages"]).T, use_container_width=True)
+        st.json({"fallbacks": metrics_snapshot["counters"], "gauges": metrics_snapshot["gauges"]})
+        if st.button("Reset Timings"):
+            metrics.reset()
+            st.rerun()
 
 st.title("🛡️ HR Guardian: Intelligent Attrition Predictor")
 
@@ -87,17 +139,75 @@ with tab1:
         
         analyze_btn = st.button("Analyze Risk", use_container_width=True)
 
+        # Whole grid scored in one call; the sliders below only read from it
+        with st.expander("🧪 What-if Explorer"):
+            wx, wy = st.columns(2)
+            x_feature = wx.selectbox("Vary", WHATIF_FEATURES, index=WHATIF_FEATURES.index("MonthlyIncome"))
+            y_options = ["(none)"] + [f for f in WHATIF_FEATURES if f != x_feature]
+            y_feature = wy.selectbox("and", y_options, index=y_options.index("OverTime") if "OverTime" in y_options else 0)
+            whatif_features = (x_feature,) if y_feature == "(none)" else (x_feature, y_feature)
+            surface = get_whatif_surface(serving.version, tuple(sorted(input_data.items())), whatif_features, serving.threshold)
+
+            whatif_values = {
+                feature: st.select_slider(f"What if {feature} =", options=grid, value=surface.base_value(feature))
+                for feature, grid in zip(surface.features, surface.grids)
+            }
+            base_probability = surface.base_probability()
+            whatif_probability = surface.lookup(**whatif_values)
+            st.metric(
+                "What-if risk", f"{whatif_probability * 100:.1f}%",
+                delta=f"{(whatif_probability - base_probability) * 100:+.1f} pts", delta_color="inverse",
+            )
+
+            surface_df = surface.to_frame()
+            if len(surface.features) == 2:
+                surface_df = surface_df.pivot(index=surface.features[0], columns=surface.features[1], values="probability")
+            else:
+                surface_df = surface_df.set_index(surface.features[0])
+            if surface.pipeline.is_categorical(x_feature):
+                st.bar_chart(surface_df)
+            else:
+                st.line_chart(surface_df)
+
+            changes = surface.minimum_change()
+            if changes.empty:
+                st.success(f"Already below the {serving.threshold:.0%} risk threshold.")
+            else:
+                st.caption(f"Smallest change that brings the risk below {serving.threshold:.0%}:")
+                for row in changes.itertuples():
+                    if row.reachable:
+                        moves = ", ".join(f"{feature} → {value}" for feature, value in row.to.items())
+                        st.write(f"- **{row.change}**: {moves} ({row.probability:.1%})")
+                    else:
+                        st.write(f"- **{row.change}**: not reachable on this grid")
+
     # Session State
     if "messages" not in st.session_state: st.session_state.messages = []
     if "analysis_done" not in st.session_state: st.session_state.analysis_done = False
 
     if analyze_btn:
         st.session_state.analysis_done = True
-        processed_input, feature_names = preprocess_input(input_data, df)
-        probability = predict_attrition(model, processed_input)
+        processed_input, feature_names = preprocess_input(input_data, serving.pipeline)
+        drift_monitor.update(processed_input)
+        encoded_row = processed_input.iloc[0]
+        cached = prediction_cache.get(encoded_row) or {}
+        if "probability" in cached:
+            probability, factors = cached["probability"], cached["factors"]
+        else:
+            probability = predict_attrition(model, processed_input, source="dashboard", inputs=[input_data])
+            factors = explain_single_instance(model, processed_input, feature_names, engine=get_explainer_engine(serving.version, serving.model_path))
+            # A failed prediction is shown once, not cached until the TTL expires
+            if not is_fallback(probability):
+                prediction_cache.put(encoded_row, {"probability": probability, "factors": factors})
         risk_score = probability * 100
-        factors = explain_single_instance(model, processed_input, feature_names)
-        agent_analysis = agent.generate_explanation("Employee", risk_score, factors)
+
+        # Mock narratives are instant and must not outlive a newly entered API key
+        if "narrative" in cached:
+            agent_analysis = cached["narrative"]
+        else:
+            agent_analysis = agent.generate_explanation("Employee", risk_score, factors)
+            if not agent.use_mock and not is_fallback(probability):
+                prediction_cache.update(encoded_row, narrative=agent_analysis)
         
         st.session_state['context'] = {
             "Risk Score": f"{risk_score:.1f}%", "Income": monthly_income, "Factors": ", ".join(factors)
@@ -110,7 +220,7 @@ with tab1:
     if st.session_state.analysis_done:
         risk_score = st.session_state['risk_score']
         with col2:
-            color = "#ff4b4b" if risk_score > 30 else "#09ab3b"
+            color = "#ff4b4b" if risk_score >= serving.threshold * 100 else "#09ab3b"
             st.markdown(f"<h2 style='color:{color}'>Risk Assessment: {risk_score:.1f}%</h2>", unsafe_allow_html=True)
             st.progress(int(risk_score))
             st.info(f"🤖 **AI Analysis:**\n\n{st.session_state['agent_analysis']}")
@@ -146,34 +256,65 @@ with tab1:
 with tab2:
     st.header("📈 Data Drift & Model Health Monitoring")
     st.markdown("""
-    This dashboard monitors the **stability** of the model by comparing current production data 
-    against the original training reference data using **Evidently AI**.
+    This dashboard monitors the **stability** of the model by comparing the employees scored in this app
+    against the original training reference data. Drift statistics (PSI per feature) are updated
+    incrementally as predictions are made; the full **Evidently AI** report is an optional export.
     """)
-    
-    if st.button("🔄 Run Data Drift Analysis"):
-        with st.spinner("Generating Evidently AI Report... (This may take a moment)"):
-            try:
-                report_html = generate_drift_report()
-                
-                if len(report_html) > 100:
-                    st.success("Analysis Complete! Drift detected in simulated data.")
-                    
-                    st.download_button(
-                        label="📥 Download Full Report (HTML)",
-                        data=report_html,
-                        file_name="drift_report.html",
-                        mime="text/html"
-                    )
-                    
-                    st.markdown("---")
-                    st.caption("👇 Preview of the report (Download for full view)")
-                    components.html(report_html, height=1000, scrolling=True)
-                
-                else:
-                    st.error(" The generated report is empty. Please check the data.")
-                    
-            except Exception as e:
-                st.error(f" Error generating report: {e}")
+
+    drift_status = drift_monitor.status()
+    status_cols = st.columns(3)
+    status_cols[0].metric("Employees Observed", f"{drift_status['rows_observed']:,}")
+    status_cols[1].metric("Batches Observed", drift_status['batches_observed'])
+    status_cols[2].metric("Drifted Features", len(drift_status['drifted_features']))
+
+    if drift_status['rows_observed']:
+        if drift_status['drifted_features']:
+            st.warning(f"Drift detected in: {', '.join(drift_status['drifted_features'])}")
+        else:
+            st.success("No significant drift in the observed traffic.")
+        st.dataframe(drift_monitor.summary(), use_container_width=True)
+    else:
+        st.info("No production data observed yet. Score employees or add a simulated batch.")
+
+    action_cols = st.columns(2)
+    if action_cols[0].button("🧪 Add Simulated Drifted Batch", use_container_width=True):
+        drift_monitor.update(encode_raw(simulate_production_data(load_reference_data())))
+        st.rerun()
+    if action_cols[1].button("♻️ Reset Drift Statistics", use_container_width=True):
+        drift_monitor.reset()
+        st.rerun()
+
+    with st.expander("🗂️ Production Log Window"):
+        window_hours = st.selectbox("Window", [1, 24, 168, None], index=1,
+                                    format_func=lambda h: "All logged predictions" if h is None else f"Last {h} hours")
+        if st.button("Analyse Logged Predictions"):
+            start = pd.Timestamp.now(tz="UTC") - pd.Timedelta(hours=window_hours) if window_hours else None
+            window_monitor = DriftMonitor.from_log_window(start=start, profile=drift_monitor.profile)
+            if window_monitor.n_rows:
+                st.caption(f"{window_monitor.n_rows:,} logged predictions")
+                st.dataframe(window_monitor.summary(), use_container_width=True)
+            else:
+                st.info("No closed log segments in this window yet.")
+
+    with st.expander("📄 Full Evidently AI Report (export)"):
+        use_logged = st.checkbox("Use logged production inputs (otherwise a simulated drifted sample)", value=True)
+        if st.button("Generate Evidently Report"):
+            with st.spinner("Generating Evidently AI Report... (This may take a moment)"):
+                try:
+                    report_html = generate_drift_report(load_logged_inputs() if use_logged else None)
+
+                    if len(report_html) > 100:
+                        st.download_button(
+                            label="📥 Download Full Report (HTML)",
+                            data=report_html,
+                            file_name="drift_report.html",
+                            mime="text/html"
+                        )
+                    else:
+                        st.error(" The generated report is empty. Please check the data.")
+
+                except Exception as e:
+                    st.error(f" Error generating report: {e}")
 
 # =========================================
 # TAB 3: Batch Prediction
@@ -198,51 +339,86 @@ with tab3:
             st.dataframe(batch_df.head(20), use_container_width=True)
 
             if st.button("Run Batch Prediction", use_container_width=True):
-                processed_rows = []
-                for row in batch_df.to_dict(orient="records"):
-                    processed_row, _ = preprocess_input(row, df)
-                    processed_rows.append(processed_row.iloc[0])
-
-                processed_batch_df = pd.DataFrame(processed_rows)
-                probabilities = predict_attrition_batch(model, processed_batch_df)
-                threshold = 0.30
-                risk_labels = [
-                    "High Risk" if prob >= threshold else "Low Risk"
-                    for prob in probabilities
-                ]
-
-                results_df = batch_df.copy()
-                results_df["Attrition_Probability"] = probabilities
-                results_df["Risk_Score_Pct"] = [round(prob * 100, 2) for prob in probabilities]
-                results_df["Risk_Label"] = risk_labels
+                threshold = serving.threshold
+                processed_batch_df, _ = preprocess_batch(batch_df, serving.pipeline)
+                results_df = attach_scores(batch_df, predict_attrition_batch(
+                    model, processed_batch_df, source="dashboard-batch", inputs=batch_df
+                ), threshold)
+                # Top-3 SHAP drivers for every row in one vectorized pass
+                drivers_df = get_explainer_engine(serving.version, serving.model_path).explain_batch(processed_batch_df, top_k=3)
+                results_df = results_df.join(drivers_df)
+                drift_monitor.update(processed_batch_df)
+
+                # Upsert into the persistent risk index only when rows carry employee IDs
+                # (row numbers would collide across uploads); otherwise index this batch alone
+                if any(col in batch_df.columns for col in ID_COLUMNS):
+                    index_builder = RiskIndexBuilder()
+                    index_builder.add(results_df)
+                    risk_index = index_builder.finish(threshold, model_version=serving.version)
+                else:
+                    risk_index = RiskIndex.from_results(results_df, threshold, model_version=serving.version)
 
                 st.session_state["batch_results_df"] = results_df
+                st.session_state["batch_risk_index"] = risk_index
+                st.session_state["batch_processed_df"] = processed_batch_df
                 st.success("Batch prediction completed successfully.")
 
             if "batch_results_df" in st.session_state:
                 results_df = st.session_state["batch_results_df"]
                 st.subheader("Batch Prediction Results")
-                st.dataframe(results_df, use_container_width=True)
-
-                total_employees = len(results_df)
-                high_risk_count = int((results_df["Risk_Label"] == "High Risk").sum())
-                avg_risk_pct = float(results_df["Risk_Score_Pct"].mean()) if total_employees > 0 else 0.0
-                max_risk_pct = float(results_df["Risk_Score_Pct"].max()) if total_employees > 0 else 0.0
-                min_risk_pct = float(results_df["Risk_Score_Pct"].min()) if total_employees > 0 else 0.0
-                high_risk_ratio_pct = (
-                    round((high_risk_count / total_employees) * 100, 2)
-                    if total_employees > 0
-                    else 0.0
-                )
-
-                summary = {
-                    "total_employees": total_employees,
-                    "high_risk_employees": high_risk_count,
-                    "high_risk_ratio_pct": high_risk_ratio_pct,
-                    "average_risk_pct": round(avg_risk_pct, 2),
-                    "max_risk_pct": round(max_risk_pct, 2),
-                    "min_risk_pct": round(min_risk_pct, 2),
-                }
+                results_table = st.dataframe(results_df, use_container_width=True)
+
+                narrative_cols = st.columns([1, 3])
+                concurrency = narrative_cols[0].number_input("Parallel LLM calls", min_value=1, max_value=32, value=8)
+                high_risk_index = results_df.index[results_df["Risk_Label"] == "High Risk"]
+                if narrative_cols[1].button(
+                    f"Generate Per-Employee Narratives ({len(high_risk_index)} high-risk)",
+                    use_container_width=True,
+                    disabled=len(high_risk_index) == 0,
+                ):
+                    factors = drivers_to_factors(
+                        results_df.loc[high_risk_index, [c for c in results_df.columns if c.startswith("Driver_")]],
+                        st.session_state["batch_processed_df"],
+                    )
+                    progress = st.progress(0.0, text="Generating narratives...")
+
+                    def show_narrative(index, text, done, total):
+                        # Stream each narrative into the table as it arrives
+                        progress.progress(done / total, text=f"Generated {done}/{total} narratives")
+                        results_table.dataframe(results_df, use_container_width=True)
+
+                    generate_narratives(agent, results_df, factors, concurrency=int(concurrency), on_result=show_narrative)
+                    st.session_state["batch_results_df"] = results_df
+                    progress.empty()
+                    st.success(f"Added {NARRATIVE_COLUMN} for {len(factors)} high-risk employees.")
+
+                batch_summary = BatchSummary()
+                batch_summary.update(results_df)
+                summary = batch_summary.as_dict()
+
+                # What pushes the high-risk employees over the threshold
+                driver_summary = summarize_drivers(results_df, mask=results_df["Risk_Label"] == "High Risk")
+                summary["top_risk_drivers"] = format_driver_summary(driver_summary, "high-risk employees")
+                if not driver_summary.empty:
+                    st.subheader("Most Common Risk Drivers (High-Risk Employees)")
+                    st.bar_chart(driver_summary.set_index("feature")["share_pct"])
+
+                # Segment views read the risk index's bucket tables, not the results frame
+                risk_index = st.session_state.get("batch_risk_index")
+                if risk_index is not None:
+                    summary.update(risk_index.summary())
+                    with st.expander("📊 Risk by Segment"):
+                        segment_by = st.radio("Segment by", ["Department", "JobRole"], horizontal=True)
+                        st.dataframe(risk_index.segments(segment_by), use_container_width=True)
+                        st.bar_chart(risk_index.histogram(segment_by).T)
+                        top_department = st.selectbox("Highest-risk employees in", ["All"] + risk_index.departments)
+                        st.dataframe(
+                            risk_index.top(50, department=None if top_department == "All" else top_department),
+                            use_container_width=True,
+                        )
+                        if risk_index.meta.get("previous_built_at"):
+                            st.caption(f"Crossed the {risk_index.threshold:.0%} threshold since the run of {risk_index.meta['previous_built_at']}:")
+                            st.dataframe(risk_index.crossers("up"), use_container_width=True)
 
                 if st.button("Generate Consolidated AI Report", use_container_width=True):
                     with st.spinner("Generating consolidated report..."):
@@ -1,36 +1,17 @@
 import os
-from typing import Any, Dict
-from langchain_core.prompts import PromptTemplate
-from langchain_groq import ChatGroq
-from langchain_core.output_parsers import StrOutputParser
+import threading
+from typing import Any, Dict, Optional
 from dotenv import load_dotenv
 
+from src import metrics
+from src.llm_cache import LLMResponseCache
+
 load_dotenv()
 
-class HRAgent:
-    def __init__(self, use_mock=False):
-        self.use_mock = use_mock
-        api_key = os.getenv("GROQ_API_KEY")
-        
-        if not self.use_mock:
-            if not api_key:
-                print(" Warning: GROQ_API_KEY not found. Switching to Mock Mode.")
-                self.use_mock = True
-            else:
-                try:
-                    # Llama 3.3 for high intelligence
-                    self.llm = ChatGroq(
-                        temperature=0.7,
-                        model_name="llama-3.3-70b-versatile",
-                        groq_api_key=api_key
-                    )
-                except Exception as e:
-                    print(f" Error: {e}")
-                    self.use_mock = True
-        
-    def generate_explanation(self, employee_name, risk_score, contributing_factors):
-        """Generates the initial static summary."""
-        template = """
+MODEL_NAME = "llama-3.3-70b-versatile"
+TEMPERATURE = 0.7
+
+EXPLANATION_TEMPLATE = """
         You are an expert HR Data Scientist. Analyze the employee data.
         
         DATA:
@@ -43,22 +24,8 @@ class HRAgent:
         2. Suggest one actionable retention strategy.
         3. Be concise (max 3 sentences).
         """
-        prompt = PromptTemplate(input_variables=["name", "risk_score", "factors"], template=template)
-        
-        if self.use_mock: return self._mock_response(employee_name, risk_score, contributing_factors)
-        
-        try:
-            chain = prompt | self.llm | StrOutputParser()
-            factors_str = ", ".join([f.split('(')[0].strip() for f in contributing_factors])
-            return chain.invoke({"name": employee_name, "risk_score": f"{risk_score:.1f}", "factors": factors_str}).strip()
-        except: return self._mock_response(employee_name, risk_score, contributing_factors)
 
-    def chat_with_data(self, user_question, employee_context):
-        """
-        New Feature: Chat with the data.
-        employee_context is a dictionary containing all employee info.
-        """
-        template = """
+CHAT_TEMPLATE = """
         You are an HR Consultant assisting a manager. 
         You have the following profile for the employee under review:
 
@@ -72,9 +39,138 @@ class HRAgent:
         - Answer based strictly on the profile data and general HR best practices.
         - Be helpful, professional, and concise.
         """
+
+BATCH_REPORT_TEMPLATE = """
+        You are an expert HR Analytics Consultant.
+        Create a concise, practical report from the following batch attrition summary.
+
+        BATCH SUMMARY:
+        {summary}
+
+        INSTRUCTIONS:
+        1. Provide an executive overview of the risk level.
+        2. Highlight the most important risk signal in the batch, naming the departments
+           and job roles at highest risk and any employees who newly crossed the threshold.
+        3. Recommend 3 practical retention actions for HR managers.
+        4. Keep the report concise and actionable.
+        """
+
+class HRAgent:
+    """LLM-backed narratives for single employees, chat and batch reports.
+
+    Args:
+        use_mock (bool): Skip the LLM and return canned responses.
+        llm: Any LangChain chat model or LLM; defaults to Groq. Pass a local
+            fake (e.g. ``FakeListChatModel``) to exercise the real code path offline.
+        cache (Optional[LLMResponseCache]): Prompt -> response store; defaults to
+            the on-disk SQLite cache. Pass ``False`` to disable caching.
+    """
+
+    def __init__(self, use_mock=False, llm=None, cache: Optional[LLMResponseCache] = None):
+        self.use_mock = use_mock
+        self.llm = llm
+        self.api_key = os.getenv("GROQ_API_KEY")
+        
+        if not self.use_mock and self.llm is None and not self.api_key:
+            print(" Warning: GROQ_API_KEY not found. Switching to Mock Mode.")
+            self.use_mock = True
+
+        # LangChain and the Groq client are imported on first use, then the
+        # prompts and chains are built once and reused by every call
+        self._chains = None
+        self._chains_lock = threading.Lock()
+
+        self.cache = None
+        if not self.use_mock and cache is not False:
+            self.cache = cache if cache is not None else LLMResponseCache()
+        if self.llm is not None:
+            self.model_id = f"{getattr(self.llm, 'model_name', type(self.llm).__name__)}@{getattr(self.llm, 'temperature', None)}"
+        else:
+            self.model_id = f"{MODEL_NAME}@{TEMPERATURE}"
+
+    def _get_chains(self) -> Dict[str, Any]:
+        """Build the ``{name: (prompt, chain)}`` table on first use."""
+        if self._chains is not None:
+            return self._chains
+        with self._chains_lock:
+            if self._chains is None:
+                from langchain_core.output_parsers import StrOutputParser
+                from langchain_core.prompts import PromptTemplate
+
+                if self.llm is None:
+                    from langchain_groq import ChatGroq
+
+                    try:
+                        # Llama 3.3 for high intelligence
+                        self.llm = ChatGroq(
+                            temperature=TEMPERATURE,
+                            model_name=MODEL_NAME,
+                            groq_api_key=self.api_key
+                        )
+                    except Exception as e:
+                        print(f" Error: {e}")
+                        self.use_mock = True
+                        raise
+
+                parser = StrOutputParser()
+                prompts = {
+                    "explanation": PromptTemplate(input_variables=["name", "risk_score", "factors"], template=EXPLANATION_TEMPLATE),
+                    "chat": PromptTemplate(input_variables=["context", "question"], template=CHAT_TEMPLATE),
+                    "batch_report": PromptTemplate(input_variables=["summary"], template=BATCH_REPORT_TEMPLATE),
+                }
+                self._chains = {name: (prompt, prompt | self.llm | parser) for name, prompt in prompts.items()}
+        return self._chains
+
+    def _invoke(self, name: str, variables: Dict[str, Any]) -> str:
+        """Run the ``name`` chain, answering repeated prompts from the cache."""
+        prompt, chain = self._get_chains()[name]
+        if self.cache is None:
+            return chain.invoke(variables).strip()
+        prompt_text = prompt.format(**variables)
+        return self.cache.get_or_generate(prompt_text, self.model_id, lambda: chain.invoke(variables).strip())
+
+    async def _ainvoke(self, name: str, variables: Dict[str, Any]) -> str:
+        prompt, chain = self._get_chains()[name]
+
+        async def agenerate():
+            return (await chain.ainvoke(variables)).strip()
+
+        if self.cache is None:
+            return await agenerate()
+        return await self.cache.aget_or_generate(prompt.format(**variables), self.model_id, agenerate)
+
+    def _explanation_variables(self, employee_name, risk_score, contributing_factors) -> Dict[str, str]:
+        factors_str = ", ".join([f.split('(')[0].strip() for f in contributing_factors])
+        return {"name": employee_name, "risk_score": f"{risk_score:.1f}", "factors": factors_str}
+
+    @metrics.timed("llm_explanation")
+    def generate_explanation(self, employee_name, risk_score, contributing_factors):
+        """Generates the initial static summary."""
+        if self.use_mock: return self._mock_response(employee_name, risk_score, contributing_factors)
         
-        prompt = PromptTemplate(input_variables=["context", "question"], template=template)
+        try:
+            variables = self._explanation_variables(employee_name, risk_score, contributing_factors)
+            return self._invoke("explanation", variables)
+        except:
+            metrics.count("llm_explanation_mock_fallback")
+            return self._mock_response(employee_name, risk_score, contributing_factors)
+
+    async def agenerate_explanation(self, employee_name, risk_score, contributing_factors):
+        """Async version of ``generate_explanation`` for concurrent batch narratives.
 
+        Unlike the sync version, LLM errors are raised so the caller can retry them.
+        """
+        if self.use_mock: return self._mock_response(employee_name, risk_score, contributing_factors)
+
+        variables = self._explanation_variables(employee_name, risk_score, contributing_factors)
+        return await self._ainvoke("explanation", variables)
+
+    @metrics.timed("llm_chat")
+    def chat_with_data(self, user_question, employee_context):
+        """
+        New Feature: Chat with the data.
+        employee_context is a dictionary containing all employee info.
+        """
         # Format context into a readable string
         context_str = "\n".join([f"- {k}: {v}" for k, v in employee_context.items()])
 
@@ -82,37 +178,25 @@ class HRAgent:
             return "This is a mock chat response. Please enable Real AI mode."
 
         try:
-            chain = prompt | self.llm | StrOutputParser()
-            return chain.invoke({"context": context_str, "question": user_question}).strip()
+            return self._invoke("chat", {"context": context_str, "question": user_question})
         except Exception as e:
+            metrics.count("llm_chat_error")
             return f"Error: {e}"
 
     def _mock_response(self, name, score, factors):
         return f"[MOCK] Analysis for {name}: Risk is {score:.1f}%. Please check factors."
 
+    @metrics.timed("llm_batch_report")
     def generate_batch_report(self, batch_summary: Dict[str, Any]) -> str:
         """Generate a consolidated text report for batch attrition risk.
 
         Args:
-            batch_summary (Dict[str, Any]): Aggregate metrics for uploaded batch.
+            batch_summary (Dict[str, Any]): Aggregate metrics for uploaded batch, plus
+                segment summaries from ``RiskIndex.summary`` when available.
 
         Returns:
             str: LLM-generated report text.
         """
-        template = """
-        You are an expert HR Analytics Consultant.
-        Create a concise, practical report from the following batch attrition summary.
-
-        BATCH SUMMARY:
-        {summary}
-
-        INSTRUCTIONS:
-        1. Provide an executive overview of the risk level.
-        2. Highlight the most important risk signal in the batch.
-        3. Recommend 3 practical retention actions for HR managers.
-        4. Keep the report concise and actionable.
-        """
-        prompt = PromptTemplate(input_variables=["summary"], template=template)
         summary_text = "\n".join([f"- {key}: {value}" for key, value in batch_summary.items()])
 
         if self.use_mock:
@@ -120,10 +204,12 @@ class HRAgent:
                 "[MOCK] Batch report:\n"
                 f"Total employees: {batch_summary.get('total_employees', 0)} | "
                 f"High-risk ratio: {batch_summary.get('high_risk_ratio_pct', 0)}%."
+                + (f"\nHighest-risk departments: {batch_summary['highest_risk_departments']}"
+                   if batch_summary.get("highest_risk_departments") else "")
             )
 
         try:
-            chain = prompt | self.llm | StrOutputParser()
-            return chain.invoke({"summary": summary_text}).strip()
+            return self._invoke("batch_report", {"summary": summary_text})
         except Exception as e:
+            metrics.count("llm_batch_report_error")
             return f"Error generating batch report: {e}"
\ No newline at end of file
@@ -0,0 +1,388 @@
+"""Headless batch scoring for employee CSV files of any size.
+
+The input is streamed in fixed-size chunks; each chunk is encoded, scored and
+appended to the output before the next one is read, and the summary passed to
+``HRAgent.generate_batch_report`` is accumulated online. Memory therefore
+depends on the chunk size, not on the size of the input file.
+
+Usage:
+    python -m src.batch_score employees.csv -o scored.parquet --chunksize 50000
+    python -m src.batch_score employees.csv -o scored.parquet --workers 32
+    python -m src.batch_score data/feature_store/employees -o scored.parquet --workers 32
+    python -m src.batch_score employees.csv -o scored.parquet --index
+    python -m src.batch_score employees.csv -o scored.parquet --incremental --explain 3
+
+The input may also be a feature store directory (``src.feature_store``): rows
+are then read pre-encoded from the memory-mapped columns, skipping CSV parsing
+and encoding, and workers read their row ranges from the shared files.
+
+With ``--index`` the scores are also written to the persistent risk index
+(``src.risk_index``), and its Department/JobRole summaries and threshold
+crossings since the previous run are added to the batch summary. The input is
+taken to be the whole workforce, so employees missing from it leave the index;
+``--partial`` (and ``--incremental``) upsert instead.
+
+With ``--incremental`` only employees whose inputs changed since the previous
+run (or who are new) are encoded, scored and explained; the rest reuse the
+stored results (``src.delta_scoring``). A new model version rescores everyone.
+"""
+import argparse
+import json
+import os
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.data_processing import preprocess_batch
+from src.inference import UNSCORED_LABEL, is_fallback, load_serving_model, load_threshold, predict_attrition_batch
+
+DEFAULT_CHUNKSIZE = 50_000
+
+
+class BatchSummary:
+    """Online version of the batch summary shown in the Batch Prediction tab.
+
+    Statistics are computed on the rounded ``Risk_Score_Pct`` column, exactly
+    as the tab does on the full results frame. Rows that failed to score are
+    counted as ``unscored_employees`` and left out of the risk statistics.
+    """
+
+    def __init__(self):
+        self.total_employees = 0
+        self.unscored_employees = 0
+        self.high_risk_employees = 0
+        self._risk_pct_sum = 0.0
+        self._risk_pct_max = None
+        self._risk_pct_min = None
+
+    def update(self, results_df: pd.DataFrame) -> None:
+        """Fold one scored chunk (output of ``score_frame``) into the summary."""
+        if results_df.empty:
+            return
+        risk_pct = results_df["Risk_Score_Pct"].dropna()
+        self.total_employees += len(results_df)
+        self.unscored_employees += len(results_df) - len(risk_pct)
+        self.high_risk_employees += int((results_df["Risk_Label"] == "High Risk").sum())
+        if risk_pct.empty:
+            return
+        self._risk_pct_sum += float(risk_pct.sum())
+        chunk_max, chunk_min = float(risk_pct.max()), float(risk_pct.min())
+        self._risk_pct_max = chunk_max if self._risk_pct_max is None else max(self._risk_pct_max, chunk_max)
+        self._risk_pct_min = chunk_min if self._risk_pct_min is None else min(self._risk_pct_min, chunk_min)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the summary in the format expected by ``generate_batch_report``."""
+        total = self.total_employees - self.unscored_employees
+        summary = {
+            "total_employees": self.total_employees,
+            "high_risk_employees": self.high_risk_employees,
+            "high_risk_ratio_pct": round((self.high_risk_employees / total) * 100, 2) if total > 0 else 0.0,
+            "average_risk_pct": round(self._risk_pct_sum / total, 2) if total > 0 else 0.0,
+            "max_risk_pct": round(self._risk_pct_max, 2) if total > 0 else 0.0,
+            "min_risk_pct": round(self._risk_pct_min, 2) if total > 0 else 0.0,
+        }
+        if self.unscored_employees:
+            summary["unscored_employees"] = self.unscored_employees
+        return summary
+
+
+def score_frame(model, batch_df: pd.DataFrame, threshold: float) -> pd.DataFrame:
+    """Encode and score raw employee records, returning them with result columns.
+
+    Args:
+        model: Trained XGBoost classifier.
+        batch_df (pd.DataFrame): Raw employee records.
+        threshold (float): Probability at or above which an employee is "High Risk".
+
+    Returns:
+        pd.DataFrame: ``batch_df`` plus ``Attrition_Probability``, ``Risk_Score_Pct``
+        and ``Risk_Label``.
+    """
+    processed_batch_df, _ = preprocess_batch(batch_df)
+    probabilities = predict_attrition_batch(model, processed_batch_df)
+    return attach_scores(batch_df, probabilities, threshold)
+
+
+def probability_array(probabilities) -> np.ndarray:
+    """Scores as float64, with the error fallback (``is_fallback``) turned into NaN."""
+    values = np.asarray(probabilities, dtype=np.float64)
+    if isinstance(probabilities, list) and any(is_fallback(prob) for prob in probabilities):
+        values[[is_fallback(prob) for prob in probabilities]] = np.nan
+    return values
+
+
+def attach_scores(batch_df: pd.DataFrame, probabilities: List[float], threshold: float) -> pd.DataFrame:
+    """Add the probability, percentage and label columns to a copy of ``batch_df``.
+
+    Rows the model failed to score get a NaN probability and ``UNSCORED_LABEL``,
+    not a 0% "Low Risk".
+    """
+    probabilities = probability_array(probabilities)
+    results_df = batch_df.copy()
+    results_df["Attrition_Probability"] = probabilities
+    results_df["Risk_Score_Pct"] = [round(prob * 100, 2) for prob in probabilities.tolist()]
+    results_df["Risk_Label"] = [
+        "High Risk" if prob >= threshold else "Low Risk" if prob == prob else UNSCORED_LABEL
+        for prob in probabilities.tolist()
+    ]
+    return results_df
+
+
+def score_store_range(model, store, start: int, stop: int, threshold: float) -> pd.DataFrame:
+    """Score rows ``start:stop`` of a ``FeatureStore`` (already encoded).
+
+    Returns:
+        pd.DataFrame: ``employee_id`` (store row number when the store has no IDs)
+        plus ``Attrition_Probability``, ``Risk_Score_Pct`` and ``Risk_Label``.
+    """
+    employee_ids = store.employee_ids()
+    ids = employee_ids[start:stop] if employee_ids is not None else np.arange(start, min(stop, len(store)))
+    probabilities = predict_attrition_batch(model, store.frame(start=start, stop=stop))
+    return attach_scores(pd.DataFrame({"employee_id": np.asarray(ids)}), probabilities, threshold)
+
+
+def is_feature_store(path: str) -> bool:
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, "meta.json"))
+
+
+def iter_chunks(input_path: str, chunksize: int = DEFAULT_CHUNKSIZE) -> Iterator[pd.DataFrame]:
+    """Yield the input CSV in chunks of at most ``chunksize`` rows."""
+    if not os.path.exists(input_path):
+        raise FileNotFoundError(f"Input file not found at {input_path}")
+    with pd.read_csv(input_path, chunksize=chunksize) as reader:
+        for chunk in reader:
+            yield chunk
+
+
+class ResultWriter:
+    """Append scored chunks to a CSV or Parquet file as they are produced."""
+
+    def __init__(self, output_path: str):
+        self.output_path = output_path
+        self.format = "parquet" if output_path.endswith((".parquet", ".pq")) else "csv"
+        self._parquet_writer = None
+        self._schema = None
+        self._rows_written = 0
+
+        output_dir = os.path.dirname(os.path.abspath(output_path))
+        os.makedirs(output_dir, exist_ok=True)
+        if os.path.exists(output_path):
+            os.remove(output_path)
+
+    def write(self, results_df: pd.DataFrame) -> None:
+        if self.format == "csv":
+            results_df.to_csv(
+                self.output_path, mode="a", header=self._rows_written == 0, index=False
+            )
+        else:
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError as e:
+                raise ImportError("Parquet output requires pyarrow: pip install pyarrow") from e
+
+            table = pa.Table.from_pandas(results_df, preserve_index=False)
+            if self._parquet_writer is None:
+                self._schema = table.schema
+                self._parquet_writer = pq.ParquetWriter(self.output_path, self._schema)
+            else:
+                # Chunks can infer narrower types (e.g. int vs float); keep the first schema
+                table = table.cast(self._schema)
+            self._parquet_writer.write_table(table)
+        self._rows_written += len(results_df)
+
+    def close(self) -> None:
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def score_file(
+    input_path: str,
+    output_path: str,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    threshold: Optional[float] = None,
+    model=None,
+    workers: int = 1,
+    index_path: Optional[str] = None,
+    incremental_state: Optional[str] = None,
+    explain_top_k: int = 0,
+    partial: Optional[bool] = None,
+) -> Dict[str, Any]:
+    """Stream ``input_path`` through the model and write results to ``output_path``.
+
+    Args:
+        input_path (str): CSV of raw employee records, or a feature store directory.
+        output_path (str): Destination ``.csv`` or ``.parquet`` file.
+        chunksize (int): Rows read, scored and written per step.
+        threshold (Optional[float]): Decision threshold; defaults to the saved one.
+        model: Preloaded model; the booster JSON is loaded if omitted.
+        workers (int): Worker processes; above 1, chunks are scored by a
+            ``ParallelScorer`` and per-worker throughput is printed at the end.
+        index_path (Optional[str]): Write the scores to the risk index at this
+            path and add its segment summaries to the returned summary.
+        incremental_state (Optional[str]): Delta-scoring state file; only changed
+            and new employees (by ID) are rescored (CSV input only).
+        explain_top_k (int): Add the top-k SHAP drivers of every row (CSV input only).
+        partial (Optional[bool]): The input is a subset of the workforce: upsert into
+            the risk index instead of replacing it. Defaults to True for incremental
+            runs (whose state also carries unseen employees over), else False.
+
+    Returns:
+        Dict[str, Any]: Batch summary for ``HRAgent.generate_batch_report``.
+    """
+    threshold = threshold if threshold is not None else load_threshold()
+    summary = BatchSummary()
+    store = None
+    if is_feature_store(input_path):
+        from src.feature_store import FeatureStore
+
+        store = FeatureStore(input_path)
+    else:
+        chunks = iter_chunks(input_path, chunksize)
+
+    delta = None
+    if incremental_state is not None or explain_top_k:
+        if store is not None:
+            raise ValueError("Incremental scoring and explanations need CSV input; a feature store holds encoded rows only.")
+        from src.delta_scoring import DeltaScorer
+        from src.inference import model_version
+
+        explainer = None
+        if explain_top_k:
+            from src.explainability import TreeShapEngine
+
+            explainer = TreeShapEngine.from_saved_model()
+        if workers <= 1:
+            model = model if model is not None else load_serving_model()
+        delta = DeltaScorer(
+            model, model_version(), threshold, explainer=explainer, top_k=explain_top_k, state_path=incremental_state,
+        )
+
+    if workers > 1:
+        from src.parallel_scoring import ParallelScorer
+
+        scorer = ParallelScorer(workers=workers, threshold=threshold)
+        if delta is not None:
+            # Workers score only the changed rows; plans are merged back in chunk order
+            plans = deque()
+
+            def changed_chunks():
+                for chunk in chunks:
+                    plan = delta.plan(chunk)
+                    plans.append((chunk, plan))
+                    yield chunk.iloc[np.flatnonzero(~plan["reuse"])]
+
+            scored_chunks = (
+                delta.merge(*plans.popleft(), scored["Attrition_Probability"].to_numpy())
+                for scored in scorer.score_chunks(changed_chunks())
+            )
+        else:
+            scored_chunks = scorer.score_store(input_path, chunksize) if store is not None else scorer.score_chunks(chunks)
+    elif delta is not None:
+        scorer = None
+        scored_chunks = (delta.score(chunk) for chunk in chunks)
+    else:
+        scorer = None
+        model = model if model is not None else load_serving_model()
+        if store is not None:
+            scored_chunks = (
+                score_store_range(model, store, start, start + chunksize, threshold)
+                for start in range(0, len(store), chunksize)
+            )
+        else:
+            scored_chunks = (score_frame(model, chunk, threshold) for chunk in chunks)
+
+    index_builder = None
+    if index_path is not None:
+        from src.risk_index import SEGMENT_COLUMNS, RiskIndexBuilder
+
+        index_builder = RiskIndexBuilder()
+        # Store results carry only IDs; segments come from the store's categorical columns
+        store_segments = [col for col in SEGMENT_COLUMNS if store is not None and col in store.categories]
+
+    offset = 0
+    with ResultWriter(output_path) as writer:
+        for results_df in scored_chunks:
+            writer.write(results_df)
+            summary.update(results_df)
+            if index_builder is not None:
+                stop = offset + len(results_df)
+                index_builder.add(results_df, {col: store.categorical(col, offset, stop) for col in store_segments})
+                offset = stop
+
+    if scorer is not None:
+        print("Per-worker throughput:")
+        print(scorer.worker_throughput().to_string(index=False))
+    if delta is not None and incremental_state is not None:
+        delta.save()
+        stats = delta.summary()
+        print(f"Rescored {stats['rescored']} of {stats['rows']} employees "
+              f"({stats['changed']} changed, {stats['new']} new, {stats['reused']} reused"
+              + (f", {stats['failed']} failed and left for the next run" if stats["failed"] else "") + ")"
+              + (f"; full rescore: {stats['full_rescore_reason']}" if stats["full_rescore_reason"] else ""))
+
+    result = summary.as_dict()
+    if index_builder is not None:
+        if partial is None:
+            partial = incremental_state is not None
+        result.update(index_builder.finish(threshold, path=index_path, full_population=not partial).summary())
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score an employee CSV in streaming chunks.")
+    parser.add_argument("input", help="CSV file with one employee per row, or a feature store directory.")
+    parser.add_argument("-o", "--output", required=True, help="Output .csv or .parquet path.")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="Rows per chunk.")
+    parser.add_argument("--threshold", type=float, default=None, help="Override the saved decision threshold.")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes for parallel scoring.")
+    parser.add_argument("--summary-json", default=None, help="Also write the batch summary to this JSON file.")
+    parser.add_argument("--index", nargs="?", const="", default=None, metavar="PATH",
+                        help="Upsert the scores into the risk index (default path: HR_RISK_INDEX or data/risk_index).")
+    parser.add_argument("--incremental", nargs="?", const="", default=None, metavar="STATE",
+                        help="Rescore only changed/new employees (default state: HR_DELTA_STATE or data/delta_state.pkl).")
+    parser.add_argument("--explain", type=int, default=0, metavar="K", help="Add each employee's top-K SHAP drivers.")
+    parser.add_argument("--partial", action="store_true", default=None,
+                        help="Input is a subset of the workforce: upsert into the risk index instead of replacing it.")
+    args = parser.parse_args(argv)
+
+    incremental_state = None
+    if args.incremental is not None:
+        from src.delta_scoring import DELTA_STATE_PATH
+
+        incremental_state = args.incremental or DELTA_STATE_PATH
+
+    index_path = None
+    if args.index is not None:
+        from src.risk_index import RISK_INDEX_PATH
+
+        index_path = args.index or RISK_INDEX_PATH
+
+    start = time.perf_counter()
+    summary = score_file(
+        args.input, args.output, chunksize=args.chunksize, threshold=args.threshold, workers=args.workers,
+        index_path=index_path, incremental_state=incremental_state, explain_top_k=args.explain, partial=args.partial,
+    )
+    elapsed = time.perf_counter() - start
+
+    if args.summary_json:
+        with open(args.summary_json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+    print(f"Scored {summary['total_employees']} employees in {elapsed:.2f}s -> {args.output}")
+    for key, value in summary.items():
+        print(f"   • {key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
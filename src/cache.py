@@ -0,0 +1,152 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from src.inference import ARTIFACT_PATH, JSON_MODEL_PATH, model_version
+
+
+class PredictionCache:
+    """Bounded LRU + TTL cache of results keyed on the encoded feature vector.
+
+    Keys are a BLAKE2b digest of the 44 encoded features (as float64) plus the
+    model version, so identical profiles share an entry whatever path produced
+    them. Values are plain dicts such as ``{"probability": ..., "factors": [...],
+    "narrative": "..."}``; callers may fill them in stages with ``update``.
+
+    The cache watches the model artifacts: when their size or modification time
+    changes, every entry is dropped and the model version is recomputed. The
+    check runs at most once per ``check_interval_s`` so hits stay in microseconds.
+
+    Args:
+        max_entries (int): Entries kept before the least recently used is evicted.
+        ttl_seconds (Optional[float]): Entry lifetime; ``None`` disables expiry.
+        artifact_paths (Iterable[str]): Files whose change invalidates the cache.
+        check_interval_s (float): Minimum seconds between artifact checks.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: Optional[float] = 3600.0,
+        artifact_paths: Iterable[str] = (ARTIFACT_PATH, JSON_MODEL_PATH),
+        check_interval_s: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.artifact_paths = tuple(artifact_paths)
+        self.check_interval_s = check_interval_s
+        self.clock = clock
+
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._signature = self._artifact_signature()
+        self._next_check = self.clock() + self.check_interval_s
+        self.model_version = model_version()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def key(self, encoded_row) -> str:
+        """Stable key for one encoded row (DataFrame row, Series or 1-D array)."""
+        if hasattr(encoded_row, "to_numpy"):
+            encoded_row = encoded_row.to_numpy()
+        vector = np.ascontiguousarray(np.asarray(encoded_row, dtype=np.float64).ravel())
+        digest = hashlib.blake2b(vector.tobytes(), digest_size=16)
+        digest.update(self.model_version.encode())
+        return digest.hexdigest()
+
+    def get(self, encoded_row) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached result, or ``None`` on a miss."""
+        self._check_artifacts()
+        key = self.key(encoded_row)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, value = entry
+            if self.ttl_seconds is not None and self.clock() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(value)
+
+    def put(self, encoded_row, value: Dict[str, Any]) -> None:
+        self._check_artifacts()
+        key = self.key(encoded_row)
+        with self._lock:
+            self._entries[key] = (self.clock(), dict(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def update(self, encoded_row, **fields) -> None:
+        """Add fields (e.g. the LLM narrative) to an entry, creating it if needed."""
+        key = self.key(encoded_row)
+        with self._lock:
+            entry = self._entries.get(key)
+            value = dict(entry[1]) if entry is not None else {}
+        value.update(fields)
+        self.put(encoded_row, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def set_model_version(self, version: str) -> None:
+        """Key entries on ``version`` (e.g. a registry version), dropping all entries if it changed."""
+        with self._lock:
+            if version != self.model_version:
+                self._entries.clear()
+                self.model_version = version
+                self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "model_version": self.model_version,
+        }
+
+    def _artifact_signature(self):
+        signature = []
+        for path in self.artifact_paths:
+            try:
+                stat = os.stat(path)
+                signature.append((path, stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append((path, None, None))
+        return tuple(signature)
+
+    def _check_artifacts(self) -> None:
+        now = self.clock()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.check_interval_s
+        signature = self._artifact_signature()
+        if signature != self._signature:
+            with self._lock:
+                self._entries.clear()
+                self._signature = signature
+                self.model_version = model_version()
+                self.invalidations += 1
@@ -1,6 +1,7 @@
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder
+from src.feature_pipeline import DROP_COLUMNS, TARGET_COLUMN, FeaturePipeline
 
 def load_data(filepath):
     # Load data from CSV
@@ -11,30 +12,15 @@ def load_data(filepath):
         raise FileNotFoundError(f"File not found at {filepath}")
 
 def preprocess_data(df):
-    # Drop useless columns
-    drop_cols = ['EmployeeCount', 'Over18', 'StandardHours', 'EmployeeNumber']
-    df = df.drop(columns=drop_cols, errors='ignore')
-
-    # Separate features and target
-    # 'Attrition' is the target variable
-    X = df.drop('Attrition', axis=1)
-    y = df['Attrition']
-
-    # Encode Target (Yes/No -> 1/0)
+    # Separate the target: 'Attrition' (Yes/No -> 1/0)
     label_encoder = LabelEncoder()
-    y_encoded = label_encoder.fit_transform(y)
-
-    # Identify Categorical Columns for One-Hot Encoding
-    categorical_cols = X.select_dtypes(include=['object']).columns.tolist()
-    
-    # Apply One-Hot Encoding
-    # drop_first=True to reduce multicollinearity
-    X_encoded = pd.get_dummies(X, columns=categorical_cols, drop_first=True)
+    y_encoded = label_encoder.fit_transform(df[TARGET_COLUMN])
 
-    # Convert all boolean columns to integers (True/False -> 1/0)
-    # This is important for XGBoost compatibility
-    bool_cols = X_encoded.select_dtypes(include=['bool']).columns
-    X_encoded[bool_cols] = X_encoded[bool_cols].astype(int)
+    # Drop useless columns and one-hot encode the categoricals (drop_first=True to
+    # reduce multicollinearity) with the same pipeline serving uses, as integers
+    # for XGBoost compatibility
+    pipeline = FeaturePipeline.fit(df, DROP_COLUMNS)
+    X_encoded = pipeline.transform(df)
 
     return X_encoded, y_encoded, label_encoder
 
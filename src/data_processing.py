@@ -1,6 +1,84 @@
 import pandas as pd
-import numpy as np
 import os
+from typing import Optional
+
+from src.feature_pipeline import FeaturePipeline, load_pipeline
+from src.metrics import timed
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+META_PATH = os.path.join(BASE_DIR, "models", "model_meta.json")
+ARTIFACT_PATH = os.path.join(BASE_DIR, "models", "artifacts.pkl")
+
+# Schema of models trained before the fitted FeaturePipeline was saved with them
+MODEL_COLUMNS = [
+    'Age', 'DailyRate', 'DistanceFromHome', 'Education', 'EnvironmentSatisfaction', 
+    'HourlyRate', 'JobInvolvement', 'JobLevel', 'JobSatisfaction', 'MonthlyIncome', 
+    'MonthlyRate', 'NumCompaniesWorked', 'PercentSalaryHike', 'PerformanceRating', 
+    'RelationshipSatisfaction', 'StockOptionLevel', 'TotalWorkingYears', 
+    'TrainingTimesLastYear', 'WorkLifeBalance', 'YearsAtCompany', 'YearsInCurrentRole', 
+    'YearsSinceLastPromotion', 'YearsWithCurrManager', 'BusinessTravel_Travel_Frequently', 
+    'BusinessTravel_Travel_Rarely', 'Department_Research & Development', 'Department_Sales', 
+    'EducationField_Life Sciences', 'EducationField_Marketing', 'EducationField_Medical', 
+    'EducationField_Other', 'EducationField_Technical Degree', 'Gender_Male', 
+    'JobRole_Human Resources', 'JobRole_Laboratory Technician', 'JobRole_Manager', 
+    'JobRole_Manufacturing Director', 'JobRole_Research Director', 'JobRole_Research Scientist', 
+    'JobRole_Sales Executive', 'JobRole_Sales Representative', 'MaritalStatus_Married', 
+    'MaritalStatus_Single', 'OverTime_Yes'
+]
+
+# Numeric fields taken from the caller, with the value used when a field is missing
+INPUT_DEFAULTS = {
+    'Age': 30,
+    'MonthlyIncome': 5000,
+    'TotalWorkingYears': 10,
+    'YearsAtCompany': 5,
+    'NumCompaniesWorked': 1,
+    'DistanceFromHome': 10,
+    'EnvironmentSatisfaction': 3,
+    'JobSatisfaction': 3,
+    'WorkLifeBalance': 3,
+}
+
+# Categorical fields one-hot encoded as "<Field>_<Value>", with their missing-field default
+CATEGORICAL_DEFAULTS = {
+    'OverTime': None,
+    'Gender': None,
+    'BusinessTravel': 'Travel_Rarely',
+    'Department': 'Sales',
+    'JobRole': 'Sales Executive',
+    'MaritalStatus': 'Single',
+}
+
+# Fields not collected by the dashboard; population defaults when the caller omits them
+FIXED_DEFAULTS = {
+    'DailyRate': 802,
+    'HourlyRate': 65,
+    'MonthlyRate': 14313,
+    'JobLevel': 2,
+    'JobInvolvement': 3,
+    'StockOptionLevel': 0,
+    'TrainingTimesLastYear': 3,
+    'YearsInCurrentRole': 4,
+    'YearsSinceLastPromotion': 2,
+    'YearsWithCurrManager': 4,
+    'PercentSalaryHike': 15,
+    'PerformanceRating': 3,
+    'RelationshipSatisfaction': 3,
+    'Education': 3
+}
+
+# Category dropped by get_dummies(drop_first=True), i.e. encoded as all zeros
+CATEGORY_BASELINES = {
+    'BusinessTravel': 'Non-Travel',
+    'Department': 'Human Resources',
+    'EducationField': 'Human Resources',
+    'Gender': 'Female',
+    'JobRole': 'Healthcare Representative',
+    'MaritalStatus': 'Divorced',
+    'OverTime': 'No',
+}
+
+_pipeline: Optional[FeaturePipeline] = None
 
 def load_data():
     """
@@ -11,100 +89,64 @@ def load_data():
         return pd.read_csv(path)
     return None
 
-def preprocess_input(input_dict, _=None):
+def legacy_pipeline() -> FeaturePipeline:
+    """The hand-maintained schema above as a pipeline, for models saved without one."""
+    numeric_columns = [col for col in MODEL_COLUMNS if col in INPUT_DEFAULTS or col in FIXED_DEFAULTS]
+    vocabularies = {
+        field: [baseline] + [col[len(field) + 1:] for col in MODEL_COLUMNS if col.startswith(f"{field}_")]
+        for field, baseline in CATEGORY_BASELINES.items()
+    }
+    categorical_defaults = {
+        field: CATEGORICAL_DEFAULTS.get(field) or CATEGORY_BASELINES[field] for field in vocabularies
+    }
+    pipeline = FeaturePipeline(numeric_columns, {**INPUT_DEFAULTS, **FIXED_DEFAULTS}, vocabularies, categorical_defaults)
+    assert pipeline.feature_names == MODEL_COLUMNS
+    return pipeline
+
+def get_pipeline() -> FeaturePipeline:
+    """Pipeline of the model in ``models/`` (loaded once), or the legacy schema if it has none."""
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = load_pipeline(META_PATH, ARTIFACT_PATH) or legacy_pipeline()
+    return _pipeline
+
+def set_pipeline(pipeline: Optional[FeaturePipeline]) -> None:
+    """Install the pipeline used when none is passed (``None`` reloads from ``models/``)."""
+    global _pipeline
+    _pipeline = pipeline
+
+@timed("preprocess_input")
+def preprocess_input(input_dict, pipeline: Optional[FeaturePipeline] = None):
     """
     Takes user input dictionary and transforms it into the EXACT DataFrame structure 
     the XGBoost model expects.
+
+    Supplied fields are used as given; omitted ones get the pipeline's defaults.
+
+    Args:
+        input_dict (dict): Raw employee fields.
+        pipeline (Optional[FeaturePipeline]): The serving model's pipeline; ``get_pipeline()`` by default.
+
+    Returns:
+        Tuple[pd.DataFrame, List[str]]: One encoded row and the model column names.
     """
-    
-    model_columns = [
-        'Age', 'DailyRate', 'DistanceFromHome', 'Education', 'EnvironmentSatisfaction', 
-        'HourlyRate', 'JobInvolvement', 'JobLevel', 'JobSatisfaction', 'MonthlyIncome', 
-        'MonthlyRate', 'NumCompaniesWorked', 'PercentSalaryHike', 'PerformanceRating', 
-        'RelationshipSatisfaction', 'StockOptionLevel', 'TotalWorkingYears', 
-        'TrainingTimesLastYear', 'WorkLifeBalance', 'YearsAtCompany', 'YearsInCurrentRole', 
-        'YearsSinceLastPromotion', 'YearsWithCurrManager', 'BusinessTravel_Travel_Frequently', 
-        'BusinessTravel_Travel_Rarely', 'Department_Research & Development', 'Department_Sales', 
-        'EducationField_Life Sciences', 'EducationField_Marketing', 'EducationField_Medical', 
-        'EducationField_Other', 'EducationField_Technical Degree', 'Gender_Male', 
-        'JobRole_Human Resources', 'JobRole_Laboratory Technician', 'JobRole_Manager', 
-        'JobRole_Manufacturing Director', 'JobRole_Research Director', 'JobRole_Research Scientist', 
-        'JobRole_Sales Executive', 'JobRole_Sales Representative', 'MaritalStatus_Married', 
-        'MaritalStatus_Single', 'OverTime_Yes'
-    ]
-
-    input_df = pd.DataFrame(0, index=[0], columns=model_columns)
-
-
-    input_df['Age'] = input_dict.get('Age', 30)
-    input_df['MonthlyIncome'] = input_dict.get('MonthlyIncome', 5000)
-    input_df['TotalWorkingYears'] = input_dict.get('TotalWorkingYears', 10)
-    input_df['YearsAtCompany'] = input_dict.get('YearsAtCompany', 5)
-    input_df['NumCompaniesWorked'] = input_dict.get('NumCompaniesWorked', 1)
-    input_df['DistanceFromHome'] = input_dict.get('DistanceFromHome', 10)
-    input_df['EnvironmentSatisfaction'] = input_dict.get('EnvironmentSatisfaction', 3)
-    input_df['JobSatisfaction'] = input_dict.get('JobSatisfaction', 3)
-    input_df['WorkLifeBalance'] = input_dict.get('WorkLifeBalance', 3)
-
-
-
-    # OverTime (Yes -> OverTime_Yes=1)
-    if input_dict.get('OverTime') == 'Yes':
-        input_df['OverTime_Yes'] = 1
-    else:
-        input_df['OverTime_Yes'] = 0
-
-    # Gender (Male -> Gender_Male=1)
-    if input_dict.get('Gender') == 'Male':
-        input_df['Gender_Male'] = 1
-    else:
-        input_df['Gender_Male'] = 0 
-
-    # BusinessTravel
-    travel = input_dict.get('BusinessTravel', 'Travel_Rarely')
-    if travel == 'Travel_Frequently':
-        input_df['BusinessTravel_Travel_Frequently'] = 1
-    elif travel == 'Travel_Rarely':
-        input_df['BusinessTravel_Travel_Rarely'] = 1
-    
-    # Department
-    dept = input_dict.get('Department', 'Sales')
-    if dept == 'Sales':
-        input_df['Department_Sales'] = 1
-    elif dept == 'Research & Development':
-        input_df['Department_Research & Development'] = 1
-
-    # JobRole (Example: Sales Executive)
-    role = input_dict.get('JobRole', 'Sales Executive')
-    role_col = f"JobRole_{role}"
-    if role_col in input_df.columns:
-        input_df[role_col] = 1
-
-    # MaritalStatus
-    status = input_dict.get('MaritalStatus', 'Single')
-    status_col = f"MaritalStatus_{status}"
-    if status_col in input_df.columns:
-        input_df[status_col] = 1
-
-    defaults = {
-        'DailyRate': 802,
-        'HourlyRate': 65,
-        'MonthlyRate': 14313,
-        'JobLevel': 2,
-        'JobInvolvement': 3,
-        'StockOptionLevel': 0,
-        'TrainingTimesLastYear': 3,
-        'YearsInCurrentRole': 4,
-        'YearsSinceLastPromotion': 2,
-        'YearsWithCurrManager': 4,
-        'PercentSalaryHike': 15,
-        'PerformanceRating': 3,
-        'RelationshipSatisfaction': 3,
-        'Education': 3
-    }
+    pipeline = pipeline or get_pipeline()
+    row = pipeline.transform_record(input_dict)
+    return pd.DataFrame(row[None, :], columns=pipeline.feature_names), pipeline.feature_names
+
+@timed("preprocess_batch")
+def preprocess_batch(df: pd.DataFrame, pipeline: Optional[FeaturePipeline] = None):
+    """Encode a whole frame of employee records in one columnar pass.
 
-    for col, val in defaults.items():
-        if col in input_df.columns:
-            input_df[col] = val
+    Produces the same values, column order and dtype as stacking
+    ``preprocess_input`` over every row, without building one DataFrame per row.
 
-    return input_df[model_columns], model_columns
\ No newline at end of file
+    Args:
+        df (pd.DataFrame): Raw employee records, one per row (e.g. an uploaded CSV).
+        pipeline (Optional[FeaturePipeline]): The serving model's pipeline; ``get_pipeline()`` by default.
+
+    Returns:
+        Tuple[pd.DataFrame, List[str]]: Encoded feature matrix and model column names.
+    """
+    pipeline = pipeline or get_pipeline()
+    return pipeline.transform(df), pipeline.feature_names
\ No newline at end of file
@@ -0,0 +1,334 @@
+"""Incremental batch scoring: only rescore employees whose inputs changed.
+
+Each run fingerprints every employee's row and compares it with the
+fingerprint stored by the previous run. Employees with the same fingerprint
+reuse their stored probability (and SHAP drivers). Only changed and new
+employees are encoded, scored and explained. The merged results are
+identical to a full rescore. The state (per employee ID: fingerprint,
+probability and drivers) is saved after every run. It is discarded, and the
+run becomes a full rescore, when the model changes.
+
+The fingerprint hashes the fields the model's ``FeaturePipeline`` reads,
+normalised the way it encodes them. Because the pipeline is fixed for a
+model version, an equal fingerprint means an equal encoded row, and
+unchanged rows are not even encoded.
+
+Rows the model failed to score (``inference.is_fallback``) are marked failed
+in the state, appear as unscored (NaN) in the output and are always rescored
+on the next run.
+
+Usage:
+    python -m src.batch_score employees.csv -o scored.parquet --incremental
+    python -m src.batch_score employees.csv -o scored.parquet --incremental --explain 3
+"""
+import os
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from src.batch_score import attach_scores, probability_array
+from src.data_processing import get_pipeline, preprocess_batch
+from src.feature_pipeline import FeaturePipeline
+from src.feature_store import ID_COLUMNS
+from src.inference import predict_attrition_batch
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DELTA_STATE_PATH = os.getenv("HR_DELTA_STATE", os.path.join(BASE_DIR, "data", "delta_state.pkl"))
+STATE_VERSION = 2
+
+
+def fingerprint_rows(batch_df: pd.DataFrame, pipeline: FeaturePipeline) -> np.ndarray:
+    """64-bit fingerprint of each row's pipeline input fields, as the pipeline sees them.
+
+    Numeric fields are compared as floats (so 5000 and 5000.0 match) and
+    categorical fields by their vocabulary code (unknown categories, which all
+    encode alike, share one code; missing values have their own).
+    """
+    columns = {}
+    for col in pipeline.input_columns:
+        if col not in batch_df.columns:
+            columns[col] = np.full(len(batch_df), np.nan)
+        elif pipeline.is_categorical(col):
+            values = batch_df[col]
+            codes = pd.Categorical(values, categories=pipeline.vocabularies[col]).codes.astype(np.float64)
+            codes[values.isna().to_numpy()] = -2
+            columns[col] = codes
+        else:
+            columns[col] = pd.to_numeric(batch_df[col], errors="coerce").to_numpy(dtype=np.float64)
+    return pd.util.hash_pandas_object(pd.DataFrame(columns), index=False).to_numpy()
+
+
+def employee_ids(batch_df: pd.DataFrame) -> np.ndarray:
+    id_col = next((col for col in ID_COLUMNS if col in batch_df.columns), None)
+    if id_col is None:
+        raise ValueError(f"Incremental scoring needs an employee ID column ({' or '.join(ID_COLUMNS)}).")
+    ids = batch_df[id_col].to_numpy()
+    return ids.astype(np.int64) if ids.dtype.kind in "iu" else ids.astype(str)
+
+
+class ScoreState:
+    """Previous run's fingerprint, probability and top-k drivers per employee, sorted by ID.
+
+    Args:
+        model_version (str): Model the probabilities came from.
+        ids (np.ndarray): Sorted employee IDs.
+        fingerprints (np.ndarray): ``fingerprint_rows`` values (uint64).
+        probabilities (np.ndarray): Attrition probabilities (float64, as scored; NaN if failed).
+        failed (np.ndarray): Rows whose scoring failed; never reused.
+        driver_features (Optional[np.ndarray]): (n, k) indices into ``feature_names``.
+        driver_shap (Optional[np.ndarray]): (n, k) signed SHAP impacts.
+        feature_names (List[str]): Model columns the driver indices refer to.
+    """
+
+    def __init__(self, model_version, ids, fingerprints, probabilities, failed, driver_features=None, driver_shap=None,
+                 feature_names=None, created_at=None):
+        self.model_version = model_version
+        self.ids = ids
+        self.fingerprints = fingerprints
+        self.probabilities = probabilities
+        self.failed = failed
+        self.driver_features = driver_features
+        self.driver_shap = driver_shap
+        self.feature_names = list(feature_names or [])
+        self.created_at = created_at or datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def top_k(self) -> int:
+        return 0 if self.driver_features is None else self.driver_features.shape[1]
+
+    def find(self, ids: np.ndarray):
+        """Row of each ID in the state and whether it is present."""
+        if len(self.ids) == 0:
+            return np.zeros(len(ids), dtype=np.int64), np.zeros(len(ids), dtype=bool)
+        state_ids = self.ids
+        if state_ids.dtype.kind != ids.dtype.kind:
+            state_ids, ids = state_ids.astype(str), ids.astype(str)
+        position = np.minimum(np.searchsorted(state_ids, ids), len(state_ids) - 1)
+        return position, state_ids[position] == ids
+
+    def save(self, path: str = DELTA_STATE_PATH) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        joblib.dump({"version": STATE_VERSION, **self.__dict__}, path + ".tmp")
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path: str = DELTA_STATE_PATH) -> Optional["ScoreState"]:
+        """The saved state, or ``None`` if there is none (or it is unreadable / an older format)."""
+        if not os.path.exists(path):
+            return None
+        try:
+            data = joblib.load(path)
+        except Exception as e:
+            print(f" Ignoring unreadable delta state {path}: {e}")
+            return None
+        if data.pop("version", None) != STATE_VERSION:
+            return None
+        return cls(**data)
+
+
+class DeltaScorer:
+    """Score batches against the previous run's state, rescoring only changed rows.
+
+    Call ``score`` once per chunk of a run (e.g. each CSV chunk), then ``save``.
+    Employees of the previous state that are not in this run are kept, so a
+    partial batch does not forget the rest of the workforce.
+
+    Args:
+        model: Model exposing ``predict_proba``.
+        model_version (str): Identifies the model (e.g. ``inference.model_version()``);
+            a different version than the stored state's forces a full rescore.
+        threshold (float): Decision threshold for ``Risk_Label``.
+        pipeline (Optional[FeaturePipeline]): The model's encoding; ``get_pipeline()`` by default.
+        explainer (Optional[TreeShapEngine]): Adds ``Driver_1..k`` columns when given.
+        top_k (int): Drivers per employee.
+        state_path (Optional[str]): Where the state is kept; ``None`` scores everything
+            and keeps nothing.
+        source (str): Tag for the prediction log.
+    """
+
+    def __init__(
+        self,
+        model,
+        model_version: str,
+        threshold: float,
+        pipeline: Optional[FeaturePipeline] = None,
+        explainer=None,
+        top_k: int = 3,
+        state_path: Optional[str] = DELTA_STATE_PATH,
+        source: str = "batch-delta",
+    ):
+        self.model = model
+        self.model_version = model_version
+        self.threshold = threshold
+        self.pipeline = pipeline or get_pipeline()
+        self.explainer = explainer
+        self.top_k = top_k if explainer is not None else 0
+        self.state_path = state_path
+        self.source = source
+
+        previous = ScoreState.load(state_path) if state_path else None
+        self.full_rescore_reason = None
+        if previous is None:
+            self.full_rescore_reason = "no previous run"
+        elif previous.model_version != model_version:
+            self.full_rescore_reason = f"model changed ({previous.model_version} -> {model_version})"
+        elif previous.top_k < self.top_k:
+            self.full_rescore_reason = "explanations requested"
+        self.previous = previous if self.full_rescore_reason is None else None
+
+        self._ids: List[np.ndarray] = []
+        self._fingerprints: List[np.ndarray] = []
+        self._probabilities: List[np.ndarray] = []
+        self._failed: List[np.ndarray] = []
+        self._drivers: List[np.ndarray] = []
+        self._shap: List[np.ndarray] = []
+        self._planned = 0
+        self.stats = {"rows": 0, "reused": 0, "changed": 0, "new": 0, "failed": 0}
+
+    def plan(self, batch_df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """IDs, fingerprints and which rows can reuse the previous result."""
+        if self.state_path:
+            ids = employee_ids(batch_df)
+            fingerprints = fingerprint_rows(batch_df, self.pipeline)
+        else:
+            # Nothing is kept between runs, so rows need neither IDs nor fingerprints
+            ids = np.arange(self._planned, self._planned + len(batch_df))
+            fingerprints = np.zeros(len(batch_df), dtype=np.uint64)
+        self._planned += len(batch_df)
+        if self.previous is None:
+            found = np.zeros(len(ids), dtype=bool)
+            position = np.zeros(len(ids), dtype=np.int64)
+        else:
+            position, found = self.previous.find(ids)
+        reuse = found
+        if self.previous is not None:
+            # Rows that failed last time are retried even if unchanged
+            reuse = found & (self.previous.fingerprints[position] == fingerprints) & ~self.previous.failed[position]
+        return {"ids": ids, "fingerprints": fingerprints, "position": position, "found": found, "reuse": reuse}
+
+    def merge(self, batch_df: pd.DataFrame, plan: Dict[str, np.ndarray], probabilities, drivers: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """Combine new scores of the changed rows with the reused ones and record the state.
+
+        Args:
+            batch_df (pd.DataFrame): The raw chunk.
+            plan (Dict): Output of ``plan`` for the chunk.
+            probabilities: Scores of the rows where ``plan["reuse"]`` is False, in order
+                (fallbacks from ``predict_attrition_batch`` or NaN mark failed rows).
+            drivers (Optional[pd.DataFrame]): ``explain_batch`` output for the same rows;
+                computed here when an explainer is set and it is omitted.
+        """
+        reuse, position = plan["reuse"], plan["position"]
+        changed = np.flatnonzero(~reuse)
+        merged = np.empty(len(batch_df), dtype=np.float64)
+        merged[changed] = probability_array(probabilities)
+        if reuse.any():
+            merged[reuse] = self.previous.probabilities[position[reuse]]
+        failed = np.isnan(merged)
+
+        if self.top_k:
+            if drivers is None and len(changed):
+                encoded, _ = preprocess_batch(batch_df.iloc[changed], self.pipeline)
+                drivers = self.explainer.explain_batch(encoded, top_k=self.top_k)
+            column = {name: j for j, name in enumerate(self.explainer.feature_names)}
+            driver_features = np.zeros((len(batch_df), self.top_k), dtype=np.int16)
+            driver_shap = np.zeros((len(batch_df), self.top_k), dtype=np.float64)
+            for k in range(self.top_k):
+                if len(changed):
+                    driver_features[changed, k] = [column[name] for name in drivers[f"Driver_{k + 1}"]]
+                    driver_shap[changed, k] = drivers[f"Driver_{k + 1}_SHAP"].to_numpy()
+            if reuse.any():
+                driver_features[reuse] = self.previous.driver_features[position[reuse], :self.top_k]
+                driver_shap[reuse] = self.previous.driver_shap[position[reuse], :self.top_k]
+            self._drivers.append(driver_features)
+            self._shap.append(driver_shap)
+
+        self._ids.append(plan["ids"])
+        self._fingerprints.append(plan["fingerprints"])
+        self._probabilities.append(merged)
+        self._failed.append(failed)
+        self.stats["rows"] += len(batch_df)
+        self.stats["failed"] += int(failed.sum())
+        self.stats["reused"] += int(reuse.sum())
+        self.stats["new"] += int((~plan["found"]).sum())
+        self.stats["changed"] += int((plan["found"] & ~reuse).sum())
+
+        results_df = attach_scores(batch_df, merged, self.threshold)
+        if self.top_k:
+            names = np.array(self.explainer.feature_names, dtype=object)
+            for k in range(self.top_k):
+                results_df[f"Driver_{k + 1}"] = names[driver_features[:, k]]
+                results_df[f"Driver_{k + 1}_SHAP"] = np.round(driver_shap[:, k], 4)
+        return results_df
+
+    def score(self, batch_df: pd.DataFrame) -> pd.DataFrame:
+        """Score one chunk: encode, score and explain only its changed and new rows."""
+        plan = self.plan(batch_df)
+        changed = np.flatnonzero(~plan["reuse"])
+        probabilities, drivers = [], None
+        if len(changed):
+            changed_df = batch_df.iloc[changed]
+            encoded, _ = preprocess_batch(changed_df, self.pipeline)
+            probabilities = predict_attrition_batch(self.model, encoded, source=self.source)
+            if self.top_k:
+                drivers = self.explainer.explain_batch(encoded, top_k=self.top_k)
+        return self.merge(batch_df, plan, probabilities, drivers)
+
+    def summary(self) -> Dict[str, object]:
+        rows = self.stats["rows"]
+        return {
+            **self.stats,
+            "rescored": rows - self.stats["reused"],
+            "reused_pct": round(100 * self.stats["reused"] / rows, 2) if rows else 0.0,
+            "full_rescore_reason": self.full_rescore_reason,
+            "model_version": self.model_version,
+        }
+
+    def save(self) -> Optional[ScoreState]:
+        """Write this run's state (plus employees of the previous state not seen this run)."""
+        if not self.state_path:
+            return None
+
+        def join(parts, dtype, shape=()):
+            return np.concatenate(parts) if parts else np.zeros((0,) + shape, dtype=dtype)
+
+        ids = join(self._ids, np.int64)
+        fingerprints = join(self._fingerprints, np.uint64)
+        probabilities = join(self._probabilities, np.float64)
+        failed = join(self._failed, bool)
+        drivers = join(self._drivers, np.int16, (self.top_k,)) if self.top_k else None
+        shap = join(self._shap, np.float64, (self.top_k,)) if self.top_k else None
+
+        if self.previous is not None and len(self.previous):
+            previous_ids = self.previous.ids
+            if previous_ids.dtype.kind != ids.dtype.kind:
+                previous_ids, ids = previous_ids.astype(str), ids.astype(str)
+            kept = ~np.isin(previous_ids, ids)
+            ids = np.concatenate([ids, previous_ids[kept]])
+            fingerprints = np.concatenate([fingerprints, self.previous.fingerprints[kept]])
+            probabilities = np.concatenate([probabilities, self.previous.probabilities[kept]])
+            failed = np.concatenate([failed, self.previous.failed[kept]])
+            if self.top_k:
+                drivers = np.concatenate([drivers, self.previous.driver_features[kept, :self.top_k]])
+                shap = np.concatenate([shap, self.previous.driver_shap[kept, :self.top_k]])
+
+        # Sorted by ID for lookups; the last row wins for duplicate IDs
+        _, last = np.unique(ids[::-1], return_index=True)
+        keep = len(ids) - 1 - last
+        state = ScoreState(
+            self.model_version,
+            ids[keep],
+            fingerprints[keep],
+            probabilities[keep],
+            failed[keep],
+            drivers[keep] if self.top_k else None,
+            shap[keep] if self.top_k else None,
+            self.explainer.feature_names if self.top_k else None,
+        )
+        state.save(self.state_path)
+        return state
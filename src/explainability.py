@@ -1,12 +1,17 @@
-import shap
 import pandas as pd
 import joblib
 import os
 import numpy as np
+from typing import List, Optional
+
+from src.metrics import timed
 
 # Constants
 MODEL_DIR = "models"
 ARTIFACT_PATH = os.path.join(MODEL_DIR, "artifacts.pkl")
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_PATH = os.path.join(BASE_DIR, "data", "raw", "WA_Fn-UseC_-HR-Employee-Attrition.csv")
+BACKGROUND_SIZE = 100
 
 def load_artifacts():
     if not os.path.exists(ARTIFACT_PATH):
@@ -19,10 +24,237 @@ def load_artifacts():
     
     return model, feature_names
 
+def load_background_data(feature_names, n_samples=BACKGROUND_SIZE, random_state=42):
+    """Sample a background distribution from the training data.
+
+    Args:
+        feature_names (List[str]): Model feature order.
+        n_samples (int): Number of training rows to keep.
+        random_state (int): Seed for the sample.
+
+    Returns:
+        pd.DataFrame: Encoded training rows aligned to ``feature_names``.
+    """
+    from src.data_loader import load_data, preprocess_data
+
+    X, _, _ = preprocess_data(load_data(DATA_PATH))
+    X = X.reindex(columns=feature_names, fill_value=0)
+    return X.sample(n=min(n_samples, len(X)), random_state=random_state)
+
+class TreeShapEngine:
+    """Exact interventional TreeSHAP over the native XGBoost booster.
+
+    Build it once at startup and reuse it: the booster JSON is parsed into
+    padded root-to-leaf paths and the background rows are routed through every
+    path a single time. Explaining a row then only routes that row and combines
+    it with the cached background, with no sampling and no model calls.
+
+    For one background row ``z`` a leaf is reachable by a mix of ``x`` and ``z``
+    only if every split feature on its path is satisfied by one of them. With
+    ``A`` the features only ``x`` satisfies and ``B`` those only ``z`` satisfies,
+    the leaf value ``v`` adds ``v * (|A|-1)! |B|! / (|A|+|B|)!`` to each feature in
+    ``A`` and subtracts ``v * |A|! (|B|-1)! / (|A|+|B|)!`` from each feature in ``B``.
+    Averaging over the background gives SHAP values of the log-odds output.
+    """
+
+    def __init__(self, ensemble, feature_names, background_data: pd.DataFrame):
+        self.feature_names = list(feature_names)
+        self.background_data = background_data[self.feature_names]
+
+        # Map the booster's feature order onto ours
+        booster_features = ensemble.feature_names or self.feature_names
+        position = {name: i for i, name in enumerate(self.feature_names)}
+        remap = np.array([position[name] for name in booster_features], dtype=np.int32)
+
+        paths = ensemble.leaf_paths()
+        self.path_feature = remap[paths["feature"]]
+        self.path_threshold = paths["threshold"]
+        self.path_go_left = paths["go_left"]
+        self.path_default_left = paths["default_left"]
+        self.path_valid = paths["valid"]
+        self.leaf_value = paths["value"]
+
+        # Steps testing the same feature twice on one path must be resolved together
+        same = self.path_feature[:, :, None] == self.path_feature[:, None, :]
+        self.same_feature = same & self.path_valid[:, None, :]
+        depth = self.path_feature.shape[1]
+        earlier = np.tril(np.ones((depth, depth), dtype=bool), k=-1)
+        self.first_step = self.path_valid & ~np.any(self.same_feature & earlier, axis=-1)
+
+        self.factorial = np.cumprod(np.concatenate([[1.0], np.arange(1, depth + 1)]))
+
+        # Collapse the background into the distinct ways it can route down each path:
+        # with shallow trees there are at most 2**depth patterns, far fewer than rows
+        background = self.background_data.to_numpy(dtype=np.float32)
+        follows = self._follows_path(background)
+        n_background, n_leaves = follows.shape[:2]
+        if 2 ** depth <= n_background:
+            bits = 1 << np.arange(depth)
+            codes = (follows * bits).sum(axis=-1)
+            patterns = np.arange(2 ** depth)
+            self.background_follows = np.broadcast_to(
+                (patterns[:, None] & bits > 0)[:, None, :], (len(patterns), n_leaves, depth)
+            )
+            self.background_weight = (codes[None, :, :] == patterns[:, None, None]).mean(axis=1)
+        else:
+            self.background_follows = follows
+            self.background_weight = np.full((n_background, n_leaves), 1.0 / n_background)
+
+        reaches = np.all(self.background_follows | ~self.path_valid, axis=-1)
+        self.expected_value = ensemble.base_margin + float(
+            np.sum(self.background_weight * reaches * self.leaf_value)
+        )
+
+        # A row's contribution through a leaf depends only on which of the 2**depth
+        # step patterns it satisfies on that path, so tabulate all of them once
+        self.pattern_bits = 1 << np.arange(depth)
+        patterns = (np.arange(2 ** depth)[:, None] & self.pattern_bits) > 0
+        self.pattern_phi = np.stack([
+            self._step_contributions(np.broadcast_to(pattern, self.path_valid.shape)) for pattern in patterns
+        ])
+        # Scatter matrix from (leaf, step) to the feature tested at that step
+        n_steps = self.path_feature.size
+        self.step_to_feature = np.zeros((n_steps, len(self.feature_names)))
+        self.step_to_feature[np.arange(n_steps), self.path_feature.ravel()] = 1.0
+
+    def _step_contributions(self, x: np.ndarray) -> np.ndarray:
+        """SHAP mass each (leaf, step) sends to its feature for a row following pattern ``x``."""
+        z = self.background_follows
+        only_x = self.first_step & x & ~z
+        only_z = self.first_step & ~x & z
+        dead = np.any(self.path_valid & ~x & ~z, axis=-1)
+
+        a = only_x.sum(axis=-1)
+        b = only_z.sum(axis=-1)
+        value = np.where(dead, 0.0, self.background_weight * self.leaf_value)
+        total = self.factorial[a + b]
+        w_x = value * self.factorial[np.maximum(a - 1, 0)] * self.factorial[b] / total
+        w_z = value * self.factorial[a] * self.factorial[np.maximum(b - 1, 0)] / total
+
+        return np.einsum("pld,pl->ld", only_x, w_x) - np.einsum("pld,pl->ld", only_z, w_z)
+
+    @classmethod
+    @timed("explainer_build")
+    def from_saved_model(cls, feature_names=None, n_background=BACKGROUND_SIZE, model_path=None):
+        """Create the engine from ``models/xgboost_model.json`` (or ``model_path``) and the training CSV."""
+        from src.tree_ensemble import TreeEnsemble
+
+        ensemble = TreeEnsemble.from_json(model_path) if model_path else TreeEnsemble.from_json()
+        if feature_names is None:
+            feature_names = ensemble.feature_names
+        background = load_background_data(feature_names, n_samples=n_background)
+        return cls(ensemble, feature_names, background)
+
+    def _follows_path(self, rows: np.ndarray) -> np.ndarray:
+        """For each row, whether its value of every feature satisfies the whole path (n_rows, n_leaves, depth)."""
+        values = rows[:, self.path_feature]
+        goes_left = np.where(np.isnan(values), self.path_default_left, values < self.path_threshold)
+        step_ok = (goes_left == self.path_go_left) | ~self.path_valid
+        return np.all(step_ok[:, :, None, :] | ~self.same_feature, axis=-1)
+
+    def shap_values(self, data: pd.DataFrame, chunk_size: int = 1024) -> np.ndarray:
+        """Return SHAP values of the log-odds output, shape (n_rows, n_features).
+
+        Rows are routed in chunks; each chunk is a table lookup plus one matmul.
+        """
+        rows = data[self.feature_names].to_numpy(dtype=np.float32)
+        n_leaves = self.path_valid.shape[0]
+        leaf_index = np.arange(n_leaves)
+        out = np.empty((len(rows), len(self.feature_names)))
+
+        for start in range(0, len(rows), chunk_size):
+            follows = self._follows_path(rows[start:start + chunk_size])
+            codes = (follows * self.pattern_bits).sum(axis=-1)
+            step_phi = self.pattern_phi[codes, leaf_index]
+            out[start:start + chunk_size] = step_phi.reshape(len(codes), -1) @ self.step_to_feature
+
+        return out
+
+    def explain(self, instance_data, top_k=3) -> List[str]:
+        """Explain one encoded row with the same output as ``explain_single_instance``."""
+        if isinstance(instance_data, pd.Series):
+            instance_data = instance_data.to_frame().T
+        instance_data = instance_data[self.feature_names]
+
+        values = self.shap_values(instance_data.iloc[[0]])[0]
+        actual_values = np.array(instance_data.iloc[0].values).flatten()
+        return _format_top_factors(self.feature_names, values, actual_values, top_k)
+
+    def explain_batch(self, data: pd.DataFrame, top_k=3) -> pd.DataFrame:
+        """Top-k drivers for every row in one vectorized pass.
+
+        Returns:
+            pd.DataFrame: Indexed like ``data`` with ``Driver_1`` .. ``Driver_k``
+            (feature names, largest absolute impact first) and ``Driver_i_SHAP``
+            (signed log-odds impact; positive increases risk).
+        """
+        values = self.shap_values(data)
+        order = np.argsort(-np.abs(values), axis=1, kind="stable")[:, :top_k]
+        names = np.array(self.feature_names, dtype=object)[order]
+        impacts = np.take_along_axis(values, order, axis=1)
+
+        columns = {}
+        for k in range(order.shape[1]):
+            columns[f"Driver_{k + 1}"] = names[:, k]
+            columns[f"Driver_{k + 1}_SHAP"] = np.round(impacts[:, k], 4)
+        return pd.DataFrame(columns, index=data.index)
+
+def driver_columns(drivers_df: pd.DataFrame) -> List[str]:
+    return [col for col in drivers_df.columns if col.startswith("Driver_") and not col.endswith("_SHAP")]
+
+def drivers_to_factors(drivers_df: pd.DataFrame, data: pd.DataFrame) -> dict:
+    """Turn ``explain_batch`` output into the per-row factor strings used by ``HRAgent``."""
+    factors = {}
+    for index, row in drivers_df.iterrows():
+        factors[index] = [
+            f"{row[col]} (Value: {data.at[index, row[col]]}) "
+            f"{'increases risk' if row[col + '_SHAP'] > 0 else 'decreases risk'}"
+            for col in driver_columns(drivers_df)
+        ]
+    return factors
+
+def summarize_drivers(drivers_df: pd.DataFrame, mask=None, top_n=5) -> pd.DataFrame:
+    """How often each feature is a risk-increasing top driver across (a subset of) the batch.
+
+    Args:
+        drivers_df (pd.DataFrame): Output of ``TreeShapEngine.explain_batch``.
+        mask (Optional[array-like]): Boolean row filter, e.g. the high-risk rows.
+        top_n (int): Number of features to keep.
+
+    Returns:
+        pd.DataFrame: ``feature``, ``employees``, ``share_pct`` and ``mean_shap``,
+        most frequent first.
+    """
+    if mask is not None:
+        drivers_df = drivers_df[np.asarray(mask)]
+    if drivers_df.empty:
+        return pd.DataFrame(columns=["feature", "employees", "share_pct", "mean_shap"])
+
+    cols = driver_columns(drivers_df)
+    long = pd.DataFrame({
+        "feature": np.concatenate([drivers_df[col].to_numpy() for col in cols]),
+        "shap": np.concatenate([drivers_df[col + "_SHAP"].to_numpy() for col in cols]),
+    })
+    long = long[long["shap"] > 0]
+    summary = long.groupby("feature")["shap"].agg(employees="size", mean_shap="mean").reset_index()
+    summary["share_pct"] = (summary["employees"] / len(drivers_df) * 100).round(2)
+    summary["mean_shap"] = summary["mean_shap"].round(4)
+    summary = summary.sort_values(["employees", "mean_shap"], ascending=False).head(top_n)
+    return summary[["feature", "employees", "share_pct", "mean_shap"]].reset_index(drop=True)
+
+def format_driver_summary(driver_summary: pd.DataFrame, population: str = "employees") -> str:
+    """One line for ``generate_batch_report``, e.g. "OverTime_Yes (64.0% of employees), ..."."""
+    return ", ".join(
+        f"{row.feature} ({row.share_pct}% of {population})" for row in driver_summary.itertuples()
+    ) or "n/a"
+
 def get_explainer(model, feature_names):
     """
     Returns a KernelExplainer wrapping the prediction function.
+    Legacy path, kept for models without a native booster; prefer TreeShapEngine.
     """
+    # shap is heavy to import and only this legacy path needs it
+    import shap
     
     # 1. Create a lightweight background dataset (Baseline)
     # Using a small slice of zeros/median is standard for KernelExplainer performance
@@ -46,7 +278,12 @@ def get_explainer(model, feature_names):
     
     return explainer
 
-def explain_single_instance(model, instance_data, feature_names, top_k=3):
+@timed("explain")
+def explain_single_instance(model, instance_data, feature_names, top_k=3, engine: Optional[TreeShapEngine] = None):
+    # Fast path: exact TreeSHAP with an engine built once at startup
+    if engine is not None:
+        return engine.explain(instance_data, top_k=top_k)
+
     # Ensure instance_data is a DataFrame
     if isinstance(instance_data, pd.Series):
         instance_data = instance_data.to_frame().T
@@ -78,6 +315,14 @@ def explain_single_instance(model, instance_data, feature_names, top_k=3):
     actual_values = np.array(instance_data.iloc[0].values).flatten()
     names = np.array(feature_names).flatten()
 
+    return _format_top_factors(names, values, actual_values, top_k)
+
+def _format_top_factors(names, values, actual_values, top_k):
+    """Turn per-feature SHAP values into "<feature> (Value: x) increases/decreases risk" strings."""
+    names = np.array(names).flatten()
+    values = np.array(values).flatten()
+    actual_values = np.array(actual_values).flatten()
+
     # Defensive check: Ensure all lengths match the minimum common length
     # This prevents "All arrays must be of the same length" crash
     min_len = min(len(names), len(values), len(actual_values))
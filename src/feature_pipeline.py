@@ -0,0 +1,234 @@
+"""Schema-driven feature encoding shared by training and serving.
+
+``FeaturePipeline.fit`` learns the encoding from the raw training frame: the
+numeric columns and their medians, each categorical column's vocabulary and
+mode, and the output column order of ``pd.get_dummies(drop_first=True)``
+(numeric columns first, then ``<Field>_<Value>`` for every category but the
+first). The fitted pipeline is saved with the model (``artifacts.pkl`` and
+``model_meta.json``), so serving encodes with exactly the schema the model
+was trained on.
+
+At construction every category is resolved to its output column index once;
+encoding is then array indexing, with no per-request string formatting.
+Fields the caller supplies are always used; omitted or missing (``None``/NaN)
+fields get the training median (numeric) or mode (categorical), as do numeric
+values that do not parse as numbers. Unknown
+categories encode like the dropped first category (all zeros), as
+``get_dummies`` would.
+"""
+import json
+import os
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Raw columns that are identifiers, constants or the target, never features
+DROP_COLUMNS = ['EmployeeCount', 'Over18', 'StandardHours', 'EmployeeNumber']
+TARGET_COLUMN = 'Attrition'
+
+
+def _plain(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _is_missing(value) -> bool:
+    return value is None or value is pd.NA or (isinstance(value, (float, np.floating)) and value != value)
+
+
+class FeaturePipeline:
+    """Encode raw employee fields into the model's feature matrix.
+
+    Args:
+        numeric_columns (Sequence[str]): Numeric fields, in output order.
+        defaults (Dict[str, float]): Value of each numeric field when it is not supplied.
+        vocabularies (Dict[str, Sequence[str]]): Categories of each categorical field
+            (in output order); the first one is the dropped, all-zeros category.
+        categorical_defaults (Dict[str, str]): Category used when a field is not supplied.
+    """
+
+    def __init__(
+        self,
+        numeric_columns: Sequence[str],
+        defaults: Dict[str, float],
+        vocabularies: Dict[str, Sequence[str]],
+        categorical_defaults: Dict[str, str],
+    ):
+        self.numeric_columns = list(numeric_columns)
+        self.defaults = {col: _plain(defaults[col]) for col in self.numeric_columns}
+        self.vocabularies = {field: list(values) for field, values in vocabularies.items()}
+        self.categorical_defaults = {field: categorical_defaults[field] for field in self.vocabularies}
+
+        self.feature_names: List[str] = list(self.numeric_columns)
+        # Output column of each category (-1 for the dropped first category)
+        self._columns: Dict[str, Dict[str, int]] = {}
+        for field, values in self.vocabularies.items():
+            self._columns[field] = {values[0]: -1}
+            for value in values[1:]:
+                self._columns[field][value] = len(self.feature_names)
+                self.feature_names.append(f"{field}_{value}")
+
+        self._numeric_index = {col: j for j, col in enumerate(self.numeric_columns)}
+        # Per field: its output columns, and vocabulary code -> output column (last entry: unknown)
+        self._slots = {
+            field: np.array([j for j in columns.values() if j >= 0], dtype=np.int64)
+            for field, columns in self._columns.items()
+        }
+        self._code_columns = {
+            field: np.array([columns[value] for value in self.vocabularies[field]] + [-1], dtype=np.int64)
+            for field, columns in self._columns.items()
+        }
+        self._default_codes = {
+            field: self.vocabularies[field].index(self.categorical_defaults[field]) for field in self.vocabularies
+        }
+
+        values = list(self.defaults.values())
+        is_integer = all(float(v).is_integer() for v in values)
+        self._default_row = np.zeros(len(self.feature_names), dtype=np.int64 if is_integer else np.float64)
+        self._default_row[:len(values)] = values
+        for field, default in self.categorical_defaults.items():
+            column = self._columns[field][default]
+            if column >= 0:
+                self._default_row[column] = 1
+
+    @classmethod
+    def fit(cls, raw_df: pd.DataFrame, drop_columns: Sequence[str] = DROP_COLUMNS) -> "FeaturePipeline":
+        """Learn the schema from the raw training frame (target and ``drop_columns`` excluded).
+
+        Object columns become categorical with sorted vocabularies; all other
+        columns stay numeric. Integer columns get their median rounded to an integer.
+        """
+        X = raw_df.drop(columns=[col for col in [*drop_columns, TARGET_COLUMN] if col in raw_df.columns])
+        categorical = [col for col in X.columns if X[col].dtype == object]
+        numeric = [col for col in X.columns if col not in categorical]
+
+        defaults = {}
+        for col in numeric:
+            median = X[col].median()
+            defaults[col] = int(round(median)) if pd.api.types.is_integer_dtype(X[col]) else float(median)
+        vocabularies = {col: sorted(X[col].dropna().unique()) for col in categorical}
+        modes = {col: X[col].mode().iloc[0] for col in categorical}
+        return cls(numeric, defaults, vocabularies, modes)
+
+    # --- Serialisation (JSON in model_meta.json, pickled via the same dict in artifacts.pkl) ---
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "numeric_columns": self.numeric_columns,
+            "defaults": self.defaults,
+            "vocabularies": self.vocabularies,
+            "categorical_defaults": self.categorical_defaults,
+        }
+
+    @classmethod
+    def from_dict(cls, spec: Dict[str, object]) -> "FeaturePipeline":
+        return cls(spec["numeric_columns"], spec["defaults"], spec["vocabularies"], spec["categorical_defaults"])
+
+    def __reduce__(self):
+        # Pickle the schema only; the index lookups are rebuilt on load
+        return (FeaturePipeline.from_dict, (self.to_dict(),))
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, FeaturePipeline) and self.to_dict() == other.to_dict()
+
+    # --- Schema queries ---
+
+    @property
+    def input_columns(self) -> List[str]:
+        """Raw fields the pipeline reads."""
+        return self.numeric_columns + list(self.vocabularies)
+
+    def is_categorical(self, field: str) -> bool:
+        return field in self.vocabularies
+
+    def default(self, field: str):
+        """Value assumed when ``field`` is not supplied."""
+        if field in self.vocabularies:
+            return self.categorical_defaults[field]
+        return self.defaults[field]
+
+    # --- Encoding ---
+
+    def transform_record(self, record: Dict[str, object]) -> np.ndarray:
+        """Encode one raw record into a 1-D array in ``feature_names`` order."""
+        row = self._default_row.copy()
+        for field, value in record.items():
+            if _is_missing(value):
+                continue
+            j = self._numeric_index.get(field)
+            if j is not None:
+                # Coerce like transform's pd.to_numeric(errors="coerce"): unparseable values get the default
+                if not isinstance(value, (int, float, np.number)):
+                    value = pd.to_numeric(value, errors="coerce")
+                    if _is_missing(value):
+                        continue
+                if row.dtype.kind == "i" and isinstance(value, (float, np.floating)):
+                    row = row.astype(np.float64)
+                row[j] = value
+                continue
+            columns = self._columns.get(field)
+            if columns is not None:
+                row[self._slots[field]] = 0
+                column = columns.get(value, -1)
+                if column >= 0:
+                    row[column] = 1
+        return row
+
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Encode a frame of raw records in one columnar pass (extra columns are ignored).
+
+        Integer output unless a supplied numeric column is float (e.g. has NaN),
+        matching stacked ``transform_record`` rows.
+        """
+        n_rows = len(df)
+        numeric = {}
+        for col in self.numeric_columns:
+            if col in df.columns:
+                values = df[col]
+                if values.dtype == object:
+                    values = pd.to_numeric(values, errors="coerce")
+                numeric[col] = values.to_numpy()
+        dtype = np.result_type(self._default_row.dtype, *[values.dtype for values in numeric.values()])
+
+        matrix = np.empty((n_rows, len(self.feature_names)), dtype=dtype)
+        matrix[:] = self._default_row
+        for col, values in numeric.items():
+            if values.dtype.kind == "f":
+                missing = np.isnan(values)
+                if missing.any():
+                    values = np.where(missing, self.defaults[col], values)
+            matrix[:, self._numeric_index[col]] = values
+
+        for field, vocabulary in self.vocabularies.items():
+            if field not in df.columns:
+                continue
+            values = df[field]
+            codes = pd.Categorical(values, categories=vocabulary).codes.astype(np.int64)
+            # Code -1 is either missing (-> default) or unknown (-> last entry, all zeros)
+            unmatched = np.flatnonzero(codes < 0)
+            if len(unmatched):
+                missing = values.iloc[unmatched].isna().to_numpy()
+                codes[unmatched] = np.where(missing, self._default_codes[field], len(vocabulary))
+            columns = self._code_columns[field][codes]
+            matrix[:, self._slots[field]] = 0
+            rows = np.flatnonzero(columns >= 0)
+            matrix[rows, columns[rows]] = 1
+
+        return pd.DataFrame(matrix, columns=self.feature_names)
+
+
+def load_pipeline(meta_path: str, artifact_path: Optional[str] = None) -> Optional[FeaturePipeline]:
+    """The pipeline saved with a model, or ``None`` for models trained before it existed.
+
+    Reads ``model_meta.json`` first (cheap); ``artifacts.pkl`` only when there
+    is no metadata file.
+    """
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            spec = json.load(f).get("feature_pipeline")
+        return FeaturePipeline.from_dict(spec) if spec else None
+    if artifact_path and os.path.exists(artifact_path):
+        import joblib
+
+        return joblib.load(artifact_path).get("feature_pipeline")
+    return None
@@ -0,0 +1,310 @@
+"""Memory-mapped binary feature store for encoded employee populations.
+
+A store is a directory holding, for ``n`` employees:
+
+- ``features/f000.f32`` ... one float32 file per encoded model column (44),
+  so a column slice is a contiguous, zero-copy view;
+- ``categorical/<Column>.i16``: integer codes of each raw categorical column
+  (``-1`` for missing) with the vocabulary in ``meta.json``;
+- ``labels.u8`` (Attrition 1/0) and ``employee_id.i64`` when the source has them;
+- ``meta.json``: row count, column order, vocabularies, the ``FeaturePipeline``
+  that encoded the rows and a hash of the source.
+
+Files are opened with ``np.memmap`` in read-only mode, so every process
+reading the same store shares the OS page cache instead of holding its own
+parsed copy. Build one from a CSV with:
+
+    python -m src.feature_store data/raw/WA_Fn-UseC_-HR-Employee-Attrition.csv -o data/feature_store/training
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.data_processing import get_pipeline
+from src.feature_pipeline import FeaturePipeline
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_PATH = os.path.join(BASE_DIR, "data", "raw", "WA_Fn-UseC_-HR-Employee-Attrition.csv")
+TRAINING_STORE_PATH = os.path.join(BASE_DIR, "data", "feature_store", "training")
+DEFAULT_CHUNKSIZE = 50_000
+FORMAT_VERSION = 2
+
+FEATURE_DTYPE = np.float32
+CODE_DTYPE = np.int16
+ID_COLUMNS = ("EmployeeNumber", "employee_id")
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def replace_directory(new_path: str, path: str) -> None:
+    """Move the finished directory ``new_path`` to ``path``, replacing what is there.
+
+    The old directory is renamed aside and deleted only after the new one is in
+    place, so readers find a complete directory (old or new) except for the
+    instant between the two renames, never a half-deleted one.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    old_path = f"{path}.old-{uuid.uuid4().hex[:8]}"
+    try:
+        os.rename(path, old_path)
+    except FileNotFoundError:
+        old_path = None
+    try:
+        os.replace(new_path, path)
+    except OSError:
+        if old_path is not None:
+            os.rename(old_path, path)
+        raise
+    if old_path is not None:
+        shutil.rmtree(old_path, ignore_errors=True)
+
+
+class FeatureStore:
+    """Read-only, memory-mapped view of a store directory.
+
+    Args:
+        path (str): Store directory written by ``FeatureStoreWriter``.
+    """
+
+    def __init__(self, path: str):
+        meta_path = os.path.join(path, "meta.json")
+        if not os.path.exists(meta_path):
+            raise FileNotFoundError(f"Feature store not found at {path}")
+        with open(meta_path) as f:
+            self.meta = json.load(f)
+
+        self.path = path
+        self.n_rows = self.meta["n_rows"]
+        self.feature_names: List[str] = self.meta["feature_names"]
+        self.categories: Dict[str, List[str]] = self.meta["categoricals"]
+        self._position = {name: j for j, name in enumerate(self.feature_names)}
+        self._features = [self._map(f"features/f{j:03d}.f32", FEATURE_DTYPE) for j in range(len(self.feature_names))]
+
+    def _map(self, relative_path: str, dtype):
+        if self.n_rows == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(os.path.join(self.path, relative_path), dtype=dtype, mode="r", shape=(self.n_rows,))
+
+    def __len__(self) -> int:
+        return self.n_rows
+
+    @property
+    def pipeline(self) -> Optional[FeaturePipeline]:
+        """The pipeline the rows were encoded with (saved with models trained on this store)."""
+        spec = self.meta.get("pipeline")
+        return FeaturePipeline.from_dict(spec) if spec else None
+
+    def column(self, name: str) -> np.ndarray:
+        """Zero-copy float32 view of one encoded column."""
+        return self._features[self._position[name]]
+
+    def matrix(self, columns: Optional[Sequence[str]] = None, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """Rows ``start:stop`` of the chosen columns as an (n, k) float32 array (copies only that block)."""
+        columns = self.feature_names if columns is None else columns
+        return np.column_stack([self.column(name)[start:stop] for name in columns]) if columns else np.zeros((0, 0))
+
+    def frame(self, columns: Optional[Sequence[str]] = None, start: int = 0, stop: Optional[int] = None) -> pd.DataFrame:
+        """Like ``matrix`` but as a DataFrame in model column order, ready for ``predict_proba``."""
+        columns = list(self.feature_names if columns is None else columns)
+        return pd.DataFrame(self.matrix(columns, start, stop), columns=columns, index=pd.RangeIndex(start, start + len(self.column(columns[0])[start:stop])))
+
+    def iter_frames(self, chunksize: int = DEFAULT_CHUNKSIZE, columns: Optional[Sequence[str]] = None) -> Iterator[pd.DataFrame]:
+        for start in range(0, self.n_rows, chunksize):
+            yield self.frame(columns, start, start + chunksize)
+
+    def codes(self, name: str) -> np.ndarray:
+        """Zero-copy integer codes of a raw categorical column (``-1`` = missing)."""
+        if name not in self.categories:
+            raise KeyError(f"No categorical column {name!r} in store {self.path}")
+        return self._map(f"categorical/{name}.i16", CODE_DTYPE)
+
+    def categorical(self, name: str, start: int = 0, stop: Optional[int] = None) -> pd.Categorical:
+        """Decode a categorical column without materialising one string per row."""
+        return pd.Categorical.from_codes(np.asarray(self.codes(name)[start:stop]), categories=self.categories[name])
+
+    def labels(self) -> Optional[np.ndarray]:
+        return self._map("labels.u8", np.uint8) if self.meta.get("has_labels") else None
+
+    def employee_ids(self) -> Optional[np.ndarray]:
+        return self._map("employee_id.i64", np.int64) if self.meta.get("has_employee_id") else None
+
+
+class FeatureStoreWriter:
+    """Append encoded chunks to a new store; the directory appears atomically on ``close``.
+
+    Args:
+        path (str): Store directory to create.
+        pipeline (Optional[FeaturePipeline]): Encoding of the rows (column order
+            and saved schema); defaults to the serving pipeline.
+        source (Optional[str]): File the rows came from, hashed for staleness checks.
+    """
+
+    def __init__(self, path: str, pipeline: Optional[FeaturePipeline] = None, source: Optional[str] = None):
+        self.path = path
+        self.pipeline = pipeline or get_pipeline()
+        self.feature_names = list(self.pipeline.feature_names)
+        self.source = source
+        self.tmp_path = path + ".building"
+        shutil.rmtree(self.tmp_path, ignore_errors=True)
+        os.makedirs(os.path.join(self.tmp_path, "features"))
+        os.makedirs(os.path.join(self.tmp_path, "categorical"))
+
+        self.n_rows = 0
+        self.vocabularies: Dict[str, Dict[str, int]] = {}
+        self.has_labels = None
+        self.has_employee_id = None
+
+    def _append(self, relative_path: str, values: np.ndarray) -> None:
+        with open(os.path.join(self.tmp_path, relative_path), "ab") as f:
+            f.write(np.ascontiguousarray(values).tobytes())
+
+    def append(
+        self,
+        features: pd.DataFrame,
+        categoricals: Optional[pd.DataFrame] = None,
+        labels: Optional[np.ndarray] = None,
+        employee_ids: Optional[np.ndarray] = None,
+    ) -> None:
+        """Add a chunk: encoded features plus optional raw categoricals, labels and IDs (same rows)."""
+        # Every chunk must carry the same optional parts as the first one
+        if self.has_labels is None:
+            self.has_labels = labels is not None
+            self.has_employee_id = employee_ids is not None
+        if self.has_labels != (labels is not None) or self.has_employee_id != (employee_ids is not None):
+            raise ValueError("All chunks must provide the same optional arrays (labels, employee_ids).")
+
+        values = features.reindex(columns=self.feature_names, fill_value=0).to_numpy(dtype=FEATURE_DTYPE)
+        for j in range(values.shape[1]):
+            self._append(f"features/f{j:03d}.f32", values[:, j])
+
+        if categoricals is not None:
+            for name in categoricals.columns:
+                if name not in self.vocabularies and self.n_rows > 0:
+                    raise ValueError(f"Categorical column {name!r} missing from earlier chunks.")
+                vocabulary = self.vocabularies.setdefault(name, {})
+                for value in pd.unique(categoricals[name].dropna()):
+                    vocabulary.setdefault(str(value), len(vocabulary))
+                codes = categoricals[name].map(lambda v: vocabulary.get(str(v), -1) if pd.notna(v) else -1)
+                self._append(f"categorical/{name}.i16", codes.to_numpy(dtype=CODE_DTYPE))
+        if labels is not None:
+            self._append("labels.u8", np.asarray(labels, dtype=np.uint8))
+        if employee_ids is not None:
+            self._append("employee_id.i64", np.asarray(employee_ids, dtype=np.int64))
+        self.n_rows += len(values)
+
+    def close(self) -> FeatureStore:
+        meta = {
+            "format_version": FORMAT_VERSION,
+            "n_rows": self.n_rows,
+            "feature_names": self.feature_names,
+            "pipeline": self.pipeline.to_dict(),
+            "categoricals": {name: list(vocabulary) for name, vocabulary in self.vocabularies.items()},
+            "has_labels": bool(self.has_labels),
+            "has_employee_id": bool(self.has_employee_id),
+            "source": self.source,
+            "source_sha256": file_sha256(self.source) if self.source and os.path.exists(self.source) else None,
+        }
+        with open(os.path.join(self.tmp_path, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=2)
+
+        replace_directory(self.tmp_path, self.path)
+        return FeatureStore(self.path)
+
+
+def build_store(
+    input_path: str,
+    store_path: str,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    layout: Optional[str] = None,
+    pipeline: Optional[FeaturePipeline] = None,
+) -> FeatureStore:
+    """Stream a CSV of employees into a feature store.
+
+    Args:
+        input_path (str): CSV file.
+        store_path (str): Destination directory (replaced if it exists).
+        chunksize (int): Rows parsed and encoded per step.
+        layout (Optional[str]): "training" (raw HR dataset with ``Attrition``: a
+            ``FeaturePipeline`` is fitted on the whole file first, as
+            ``data_loader.preprocess_data`` does) or "serving" (dashboard/API fields,
+            encoded with the serving pipeline). Detected from the header if omitted.
+        pipeline (Optional[FeaturePipeline]): Encode with this pipeline instead
+            (e.g. the current model's, for refresh data); ``layout`` is then ignored.
+
+    Returns:
+        FeatureStore: The new store.
+    """
+    if not os.path.exists(input_path):
+        raise FileNotFoundError(f"Input file not found at {input_path}")
+    if pipeline is None:
+        if layout is None:
+            header = pd.read_csv(input_path, nrows=0).columns
+            layout = "training" if "Attrition" in header else "serving"
+        # Vocabularies and medians need the whole file, so fitting reads it once up front
+        pipeline = FeaturePipeline.fit(pd.read_csv(input_path)) if layout == "training" else get_pipeline()
+
+    writer = FeatureStoreWriter(store_path, pipeline=pipeline, source=input_path)
+    with pd.read_csv(input_path, chunksize=chunksize) as reader:
+        for chunk in reader:
+            categorical_cols = [col for col in chunk.select_dtypes(include=["object"]).columns if col != "Attrition" and col not in ID_COLUMNS]
+            id_col = next((col for col in ID_COLUMNS if col in chunk.columns and pd.api.types.is_integer_dtype(chunk[col])), None)
+            writer.append(
+                pipeline.transform(chunk),
+                categoricals=chunk[categorical_cols],
+                labels=(chunk["Attrition"] == "Yes").to_numpy() if "Attrition" in chunk.columns else None,
+                employee_ids=chunk[id_col].to_numpy() if id_col else None,
+            )
+    return writer.close()
+
+
+def open_store(store_path: str, source_path: Optional[str] = None) -> FeatureStore:
+    """Open ``store_path``, (re)building it from ``source_path`` if missing, stale or in an older format."""
+    if os.path.exists(os.path.join(store_path, "meta.json")):
+        store = FeatureStore(store_path)
+        if source_path is None or not os.path.exists(source_path) or (
+            store.meta.get("format_version") == FORMAT_VERSION
+            and store.meta.get("source_sha256") == file_sha256(source_path)
+        ):
+            return store
+    if source_path is None:
+        raise FileNotFoundError(f"Feature store not found at {store_path}")
+    return build_store(source_path, store_path)
+
+
+def open_training_store() -> FeatureStore:
+    """The encoded training population, built from the raw HR CSV on first use."""
+    return open_store(TRAINING_STORE_PATH, DATA_PATH)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a memory-mapped feature store from an employee CSV.")
+    parser.add_argument("input", help="CSV file (raw HR dataset or dashboard/API fields).")
+    parser.add_argument("-o", "--output", required=True, help="Store directory to create.")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="Rows per chunk.")
+    parser.add_argument("--layout", choices=["training", "serving"], default=None, help="Encoding; detected if omitted.")
+    args = parser.parse_args(argv)
+
+    store = build_store(args.input, args.output, chunksize=args.chunksize, layout=args.layout)
+    size_mb = sum(
+        os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(store.path) for name in names
+    ) / 1e6
+    print(f"Stored {store.n_rows} employees x {len(store.feature_names)} features ({size_mb:.1f} MB) -> {store.path}")
+    print(f"   • categoricals: {', '.join(store.categories) or '-'}")
+    print(f"   • labels: {store.meta['has_labels']} | employee IDs: {store.meta['has_employee_id']}")
+
+
+if __name__ == "__main__":
+    main()
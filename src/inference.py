@@ -1,39 +1,213 @@
+import atexit
+import hashlib
 import joblib
+import json
 import os
+import time
+import numpy as np
 import pandas as pd
-from typing import List
+from typing import List, Optional, Union
+
+from src import metrics
 
 # Define the path to the saved model artifacts
 # We navigate back one directory from 'src' to reach the root, then into 'models'
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 ARTIFACT_PATH = os.path.join(BASE_DIR, "models", "artifacts.pkl")
+JSON_MODEL_PATH = os.path.join(BASE_DIR, "models", "xgboost_model.json")
+# Threshold and feature order as JSON, so serving never has to unpickle artifacts.pkl
+META_PATH = os.path.join(BASE_DIR, "models", "model_meta.json")
+
+# Decision threshold used when the artifacts do not carry one
+DEFAULT_THRESHOLD = 0.30
+
+# Model implementation used by load_serving_model: "booster" or "numpy" load only the
+# booster JSON; "sklearn" unpickles the full wrapper from artifacts.pkl
+INFERENCE_BACKEND = os.getenv("HR_INFERENCE_BACKEND", "booster")
 
-def load_model():
+# Production feature log written by enable_prediction_log ("0" turns it off)
+PREDICTION_LOG_ENABLED = os.getenv("HR_PREDICTION_LOG", "1") == "1"
+_prediction_logger = None
+
+class FallbackProbability(float):
+    """The 0.0 returned when prediction fails.
+
+    Behaves like ``0.0`` for callers that only display it, but ``is_fallback``
+    tells it apart from a real score so it is never cached or stored.
+    """
+
+    def __repr__(self) -> str:
+        return "FallbackProbability(0.0)"
+
+FALLBACK_PROBABILITY = FallbackProbability(0.0)
+# Risk label reported for rows the model failed to score
+UNSCORED_LABEL = "Scoring Failed"
+
+def is_fallback(probability) -> bool:
+    """True if ``probability`` is the error fallback rather than a model score."""
+    return isinstance(probability, FallbackProbability)
+
+def load_model(artifact_path: str = ARTIFACT_PATH):
     """
     Loads the trained model from the pickle file.
     This function is used by the application during startup.
     """
     # Check if the artifact file exists before loading
-    if not os.path.exists(ARTIFACT_PATH):
-        raise FileNotFoundError(f" Model file not found at: {ARTIFACT_PATH}. Please run the training script first.")
+    if not os.path.exists(artifact_path):
+        raise FileNotFoundError(f" Model file not found at: {artifact_path}. Please run the training script first.")
     
     # Load the artifacts dictionary from the disk
-    artifacts = joblib.load(ARTIFACT_PATH)
+    artifacts = joblib.load(artifact_path)
     
     # Extract the actual XGBoost model object from the dictionary
     model = artifacts["sklearn_model"]
     return model
 
-def predict_attrition(model, input_data):
+class BoosterClassifier:
+    """Minimal ``predict_proba`` wrapper around a native XGBoost booster.
+
+    Loading the booster JSON avoids unpickling the sklearn wrapper, which makes
+    it cheap to load once per worker process.
+    """
+
+    def __init__(self, booster):
+        self.booster = booster
+        self.feature_names = booster.feature_names
+
+    def predict_proba(self, input_data) -> np.ndarray:
+        if isinstance(input_data, pd.DataFrame):
+            if list(input_data.columns) != self.feature_names:
+                input_data = input_data[self.feature_names]
+            input_data = input_data.to_numpy()
+        positive = self.booster.inplace_predict(input_data)
+        return np.column_stack([1.0 - positive, positive])
+
+def load_booster_model(model_path: str = JSON_MODEL_PATH, nthread: Optional[int] = None) -> BoosterClassifier:
+    """Load ``models/xgboost_model.json`` as a ``BoosterClassifier``.
+
+    Args:
+        model_path (str): Path to the booster JSON file.
+        nthread (Optional[int]): Threads XGBoost may use; ``None`` keeps its default.
+
+    Returns:
+        BoosterClassifier: Model usable with ``predict_attrition`` and ``predict_attrition_batch``.
+    """
+    import xgboost as xgb
+
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f" Model file not found at: {model_path}. Please run the training script first.")
+
+    booster = xgb.Booster()
+    booster.load_model(model_path)
+    if nthread is not None:
+        booster.set_param({"nthread": nthread})
+    return BoosterClassifier(booster)
+
+def load_compiled_model(model_path: str = JSON_MODEL_PATH):
+    """Load the booster JSON as a pure-NumPy ``TreeEnsemble`` (no XGBoost needed to score)."""
+    from src.tree_ensemble import TreeEnsemble
+
+    return TreeEnsemble.from_json(model_path)
+
+def load_serving_model(backend: Optional[str] = None, model_dir: Optional[str] = None):
+    """Load the model for the configured inference backend.
+
+    Args:
+        backend (Optional[str]): "sklearn" (pickled wrapper), "booster" (native
+            booster JSON) or "numpy" (compiled tree evaluator). Defaults to the
+            HR_INFERENCE_BACKEND environment variable.
+        model_dir (Optional[str]): Directory holding the model files (e.g. a
+            registry version); defaults to ``models/``.
+
+    Returns:
+        A model exposing ``predict_proba``, usable with ``predict_attrition``.
+    """
+    backend = backend or INFERENCE_BACKEND
+    json_path = os.path.join(model_dir, os.path.basename(JSON_MODEL_PATH)) if model_dir else JSON_MODEL_PATH
+    artifact_path = os.path.join(model_dir, os.path.basename(ARTIFACT_PATH)) if model_dir else ARTIFACT_PATH
+    loaders = {
+        "sklearn": lambda: load_model(artifact_path),
+        "booster": lambda: load_booster_model(json_path),
+        "numpy": lambda: load_compiled_model(json_path),
+    }
+    if backend in loaders:
+        start = time.perf_counter()
+        model = loaders[backend]()
+        metrics.set_gauge("model_load_seconds", time.perf_counter() - start)
+        return model
+    raise ValueError(f"Unknown inference backend: {backend!r}. Use 'sklearn', 'booster' or 'numpy'.")
+
+def model_version(model_path: str = JSON_MODEL_PATH) -> str:
+    """Short content hash of the booster JSON, identifying the model being served."""
+    if not os.path.exists(model_path):
+        return "unknown"
+    with open(model_path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+def load_threshold(meta_path: str = META_PATH, artifact_path: str = ARTIFACT_PATH) -> float:
+    """Return the decision threshold saved with the model artifacts."""
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            return float(json.load(f).get("threshold", DEFAULT_THRESHOLD))
+    if not os.path.exists(artifact_path):
+        return DEFAULT_THRESHOLD
+    return float(joblib.load(artifact_path).get("threshold", DEFAULT_THRESHOLD))
+
+def enable_prediction_log(log_dir: Optional[str] = None, feature_names: Optional[List[str]] = None):
+    """Start logging every prediction made through this module (idempotent).
+
+    Args:
+        log_dir (Optional[str]): Log directory; defaults to HR_PREDICTION_LOG_DIR.
+        feature_names (Optional[List[str]]): Encoded columns of the served model
+            (its pipeline's ``feature_names``); the legacy schema when omitted.
+
+    Returns the active ``PredictionLogger``, or ``None`` when HR_PREDICTION_LOG=0.
+    """
+    global _prediction_logger
+    if not PREDICTION_LOG_ENABLED:
+        return None
+    if _prediction_logger is None:
+        from src.prediction_log import PREDICTION_LOG_DIR, PredictionLogger
+
+        kwargs = {"feature_names": feature_names} if feature_names is not None else {}
+        _prediction_logger = PredictionLogger(log_dir or PREDICTION_LOG_DIR, **kwargs)
+        atexit.register(_prediction_logger.close)
+    elif feature_names is not None:
+        _prediction_logger.set_feature_names(feature_names)
+    return _prediction_logger
+
+def set_prediction_logger(logger) -> None:
+    """Install (or with ``None`` remove) the logger used by the predict functions."""
+    global _prediction_logger
+    _prediction_logger = logger
+
+def get_prediction_logger():
+    return _prediction_logger
+
+def log_predictions(input_data, probabilities, latency_ms: float, source: str, inputs) -> None:
+    """Hand scored rows to the prediction logger; a logging failure never affects the score."""
+    if _prediction_logger is None:
+        return
+    try:
+        _prediction_logger.log(input_data, probabilities, latency_ms, source, inputs)
+    except Exception as e:
+        print(f" Prediction Log Error: {e}")
+        metrics.count("prediction_log_error")
+
+@metrics.timed("predict")
+def predict_attrition(model, input_data, source: str = "single", inputs: Optional[List[dict]] = None):
     """
     Predicts the probability of attrition for a given input dataframe.
     
     Args:
         model: The trained XGBoost classifier.
         input_data (pd.DataFrame): The preprocessed input features.
+        source (str): Tag stored with the row in the prediction log.
+        inputs (Optional[List[dict]]): Raw input record to store in the prediction log.
         
     Returns:
-        float: The probability of attrition (class 1), between 0.0 and 1.0.
+        float: The probability of attrition (class 1), between 0.0 and 1.0
+        (``FALLBACK_PROBABILITY`` if the model fails, see ``is_fallback``).
     """
     # Ensure the input is a DataFrame (wrap dictionary if needed)
     if not isinstance(input_data, pd.DataFrame):
@@ -42,23 +216,37 @@ def predict_attrition(model, input_data):
     try:
         # predict_proba returns an array: [[Prob_No, Prob_Yes]]
         # We access [0][1] to get the probability of Class 1 (Attrition = Yes)
+        start = time.perf_counter()
         probability = model.predict_proba(input_data)[0][1]
-        return probability
+        latency_ms = (time.perf_counter() - start) * 1000
     except Exception as e:
         print(f" Prediction Error: {e}")
+        metrics.count("predict_fallback")
         # Return 0.0 as a safe fallback in case of error
-        return 0.0
+        return FALLBACK_PROBABILITY
+    log_predictions(input_data, [probability], latency_ms, source, inputs)
+    return probability
 
 
-def predict_attrition_batch(model, input_data: pd.DataFrame) -> List[float]:
+@metrics.timed("predict_batch")
+def predict_attrition_batch(
+    model,
+    input_data: pd.DataFrame,
+    source: str = "batch",
+    inputs: Optional[Union[List[dict], pd.DataFrame]] = None,
+) -> List[float]:
     """Predict attrition probabilities for all rows in a dataframe.
 
     Args:
         model: Trained XGBoost classifier.
         input_data (pd.DataFrame): Preprocessed feature matrix.
+        source (str): Tag stored with the rows in the prediction log.
+        inputs (Optional[Union[List[dict], pd.DataFrame]]): Raw input records (same
+            order) for the prediction log; pass the raw frame itself for large batches.
 
     Returns:
-        List[float]: Probability of attrition for each row.
+        List[float]: Probability of attrition for each row (all
+        ``FALLBACK_PROBABILITY`` if the model fails, see ``is_fallback``).
     """
     if not isinstance(input_data, pd.DataFrame):
         raise TypeError("input_data must be a pandas DataFrame.")
@@ -67,8 +255,12 @@ def predict_attrition_batch(model, input_data: pd.DataFrame) -> List[float]:
         return []
 
     try:
+        start = time.perf_counter()
         probabilities = model.predict_proba(input_data)[:, 1]
-        return probabilities.astype(float).tolist()
+        latency_ms = (time.perf_counter() - start) * 1000
     except Exception as e:
         print(f" Batch Prediction Error: {e}")
-        return [0.0] * len(input_data)
\ No newline at end of file
+        metrics.count("predict_batch_fallback")
+        return [FALLBACK_PROBABILITY] * len(input_data)
+    log_predictions(input_data, probabilities, latency_ms, source, inputs)
+    return probabilities.astype(float).tolist()
\ No newline at end of file
@@ -0,0 +1,167 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Dict, Optional
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_PATH = os.getenv("HR_LLM_CACHE_PATH", os.path.join(BASE_DIR, 'data', 'llm_cache.sqlite'))
+
+
+class LLMResponseCache:
+    """Persistent prompt -> response cache for the LLM, backed by SQLite.
+
+    Entries are keyed on the fully rendered prompt plus the model identity
+    (name and temperature), so a new model or prompt wording never reuses old
+    answers. Concurrent identical prompts are deduplicated: the first caller
+    runs the generation, the others wait for its result instead of paying for
+    a second call.
+
+    Args:
+        db_path (str): SQLite file, or ``":memory:"`` for a throwaway cache.
+        ttl_seconds (Optional[float]): Response lifetime; ``None`` keeps them forever.
+    """
+
+    def __init__(self, db_path: str = CACHE_PATH, ttl_seconds: Optional[float] = None):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+        # One shared connection guarded by a lock (Streamlit sessions run on threads)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, model TEXT, prompt TEXT, response TEXT, created_at REAL)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, Future] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.deduplicated = 0
+
+    @staticmethod
+    def key(prompt_text: str, model: str) -> str:
+        return hashlib.sha256(f"{model}\x00{prompt_text}".encode("utf-8")).hexdigest()
+
+    def get(self, prompt_text: str, model: str) -> Optional[str]:
+        with self._lock:
+            return self._lookup(self.key(prompt_text, model))
+
+    def put(self, prompt_text: str, model: str, response: str) -> None:
+        with self._lock:
+            self._store(self.key(prompt_text, model), prompt_text, model, response)
+
+    def get_or_generate(self, prompt_text: str, model: str, generate: Callable[[], str]) -> str:
+        """Return the cached response, or run ``generate`` once for all concurrent callers.
+
+        Exceptions from ``generate`` reach every waiting caller and nothing is stored.
+        """
+        key = self.key(prompt_text, model)
+        with self._lock:
+            cached = self._lookup(key)
+            if cached is not None:
+                self.hits += 1
+                return cached
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+                self.misses += 1
+            else:
+                self.deduplicated += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            response = generate()
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._store(key, prompt_text, model, response)
+            del self._in_flight[key]
+        future.set_result(response)
+        return response
+
+    async def aget_or_generate(self, prompt_text: str, model: str, agenerate: Callable[[], Awaitable[str]]) -> str:
+        """Async counterpart of ``get_or_generate``; shares in-flight calls with sync callers."""
+        key = self.key(prompt_text, model)
+        with self._lock:
+            cached = self._lookup(key)
+            if cached is not None:
+                self.hits += 1
+                return cached
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+                self.misses += 1
+            else:
+                self.deduplicated += 1
+
+        if not owner:
+            return await asyncio.wrap_future(future)
+
+        try:
+            response = await agenerate()
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._store(key, prompt_text, model, response)
+            del self._in_flight[key]
+        future.set_result(response)
+        return response
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {
+            "size": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "deduplicated": self.deduplicated,
+            "in_flight": len(self._in_flight),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _lookup(self, key: str) -> Optional[str]:
+        row = self._conn.execute(
+            "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        response, created_at = row
+        if self.ttl_seconds is not None and time.time() - created_at > self.ttl_seconds:
+            return None
+        return response
+
+    def _store(self, key: str, prompt_text: str, model: str, response: str) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO responses (key, model, prompt, response, created_at) VALUES (?, ?, ?, ?, ?)",
+            (key, model, prompt_text, response, time.time()),
+        )
+        self._conn.commit()
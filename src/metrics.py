@@ -0,0 +1,189 @@
+"""Lightweight in-process metrics for the scoring hot path.
+
+Stage timings go into one histogram per stage, fallbacks into counters and
+one-off values (model-load time) into gauges. ``render_prometheus`` emits the
+Prometheus text format for the API's ``/metrics``; ``snapshot`` feeds the
+dashboard's debug panel. Set HR_METRICS=0 to disable: ``timed`` then returns
+the function unchanged and ``timer``/``count``/``set_gauge`` do nothing.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from typing import Dict, List, Optional
+
+ENABLED = os.getenv("HR_METRICS", "1") == "1"
+
+# Seconds; spans a ~40 us tree evaluation up to a multi-second LLM call
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (cumulative on export, like Prometheus)."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.n = 0
+        self.last = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self.counts[bisect_left(self.buckets, seconds)] += 1
+            self.total += seconds
+            self.n += 1
+            self.last = seconds
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by interpolating inside the bucket that holds it."""
+        if self.n == 0:
+            return 0.0
+        rank = q * self.n
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+
+_stages: Dict[str, Histogram] = {}
+_counters: Dict[str, int] = {}
+_gauges: Dict[str, float] = {}
+_registry_lock = threading.Lock()
+
+
+def _histogram(stage: str) -> Histogram:
+    histogram = _stages.get(stage)
+    if histogram is None:
+        with _registry_lock:
+            histogram = _stages.setdefault(stage, Histogram())
+    return histogram
+
+
+class _Timer:
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        _histogram(self.stage).observe(time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(stage: str):
+    """Context manager recording the block's duration under ``stage``."""
+    return _Timer(stage) if ENABLED else _NULL_TIMER
+
+
+def timed(stage: str):
+    """Decorator recording every call's duration under ``stage``."""
+    def decorator(fn):
+        if not ENABLED:
+            return fn
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _histogram(stage).observe(time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+def observe(stage: str, seconds: float) -> None:
+    if ENABLED:
+        _histogram(stage).observe(seconds)
+
+
+def count(kind: str, amount: int = 1) -> None:
+    """Increment the fallback/event counter ``kind``."""
+    if ENABLED:
+        with _registry_lock:
+            _counters[kind] = _counters.get(kind, 0) + amount
+
+
+def set_gauge(name: str, value: float) -> None:
+    if ENABLED:
+        with _registry_lock:
+            _gauges[name] = value
+
+
+def reset() -> None:
+    with _registry_lock:
+        _stages.clear()
+        _counters.clear()
+        _gauges.clear()
+
+
+def snapshot() -> Dict[str, object]:
+    """Plain-dict view: per-stage count and latency in ms, counters and gauges."""
+    stages = {
+        stage: {
+            "count": histogram.n,
+            "mean_ms": round(histogram.total / histogram.n * 1000, 3) if histogram.n else 0.0,
+            "p50_ms": round(histogram.quantile(0.5) * 1000, 3),
+            "p95_ms": round(histogram.quantile(0.95) * 1000, 3),
+            "last_ms": round(histogram.last * 1000, 3),
+        }
+        for stage, histogram in sorted(_stages.items())
+    }
+    return {"enabled": ENABLED, "stages": stages, "counters": dict(_counters), "gauges": dict(_gauges)}
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus(extra_gauges: Optional[Dict[str, float]] = None) -> str:
+    """Prometheus text exposition (format 0.0.4) of everything recorded so far."""
+    lines: List[str] = [
+        "# HELP hr_stage_duration_seconds Time spent in each hot-path stage.",
+        "# TYPE hr_stage_duration_seconds histogram",
+    ]
+    for stage, histogram in sorted(_stages.items()):
+        label = f'stage="{_escape(stage)}"'
+        with histogram._lock:
+            counts, total, n = list(histogram.counts), histogram.total, histogram.n
+        cumulative = 0
+        for bound, bucket_count in zip(histogram.buckets, counts):
+            cumulative += bucket_count
+            lines.append(f'hr_stage_duration_seconds_bucket{{{label},le="{bound}"}} {cumulative}')
+        lines.append(f'hr_stage_duration_seconds_bucket{{{label},le="+Inf"}} {n}')
+        lines.append(f"hr_stage_duration_seconds_sum{{{label}}} {total}")
+        lines.append(f"hr_stage_duration_seconds_count{{{label}}} {n}")
+
+    lines += ["# HELP hr_events_total Fallbacks and other notable events.", "# TYPE hr_events_total counter"]
+    for kind, value in sorted(_counters.items()):
+        lines.append(f'hr_events_total{{kind="{_escape(kind)}"}} {value}')
+
+    gauges = dict(_gauges)
+    gauges.update(extra_gauges or {})
+    for name, value in sorted(gauges.items()):
+        lines += [f"# TYPE hr_{name} gauge", f"hr_{name} {value}"]
+    return "\n".join(lines) + "\n"
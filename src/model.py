@@ -2,15 +2,34 @@ import pandas as pd
 import xgboost as xgb
 import numpy as np
 import joblib
+import json
 import os
 from sklearn.metrics import classification_report, f1_score, recall_score, precision_score
-from src.data_loader import load_data, preprocess_data, get_train_test_split
+from src.data_loader import get_train_test_split
+from src.feature_store import open_training_store
 
 # Constants
 DATA_PATH = "data/raw/WA_Fn-UseC_-HR-Employee-Attrition.csv"
 MODEL_DIR = "models"
 ARTIFACT_PATH = os.path.join(MODEL_DIR, "artifacts.pkl")
+META_PATH = os.path.join(MODEL_DIR, "model_meta.json")
 JSON_MODEL_PATH = os.path.join(MODEL_DIR, "xgboost_model.json")
+DEFAULT_THRESHOLD = 0.30
+
+# Fixed configuration; src.tuning searches around it
+MODEL_PARAMS = dict(
+    objective='binary:logistic',
+    n_estimators=300,        # Increased trees for better learning
+    learning_rate=0.05,      # Slower learning rate for robustness
+    max_depth=3,             # Shallow depth to prevent overfitting on majority class
+    min_child_weight=2,
+    gamma=0.2,
+    subsample=0.8,
+    colsample_bytree=0.8,
+    scale_pos_weight=9,     # High weight to heavily penalize missing attrition cases
+    eval_metric='logloss',
+    random_state=42
+)
 
 def train_and_save_model():
     # 1. Load and Preprocess Data
@@ -18,8 +37,10 @@ def train_and_save_model():
     if not os.path.exists(DATA_PATH):
         raise FileNotFoundError(f"Data file not found at {DATA_PATH}")
         
-    df = load_data(DATA_PATH)
-    X, y, _ = preprocess_data(df)
+    # Encoded once into the memory-mapped feature store and reused across runs
+    store = open_training_store()
+    X = store.frame()
+    y = store.labels().astype(int)
 
     # 2. Split Data
     X_train, X_test, y_train, y_test = get_train_test_split(X, y)
@@ -30,19 +51,7 @@ def train_and_save_model():
     
     # 3. Initialize XGBoost Classifier
     print("Training model (Aggressive Mode)...")
-    model = xgb.XGBClassifier(
-        objective='binary:logistic',
-        n_estimators=300,        # Increased trees for better learning
-        learning_rate=0.05,      # Slower learning rate for robustness
-        max_depth=3,             # Shallow depth to prevent overfitting on majority class
-        min_child_weight=2,      
-        gamma=0.2,               
-        subsample=0.8,           
-        colsample_bytree=0.8,    
-        scale_pos_weight=9,     # High weight to heavily penalize missing attrition cases
-        eval_metric='logloss',
-        random_state=42
-    )
+    model = xgb.XGBClassifier(**MODEL_PARAMS)
 
     # 4. Train
     model.fit(X_train, y_train)
@@ -52,7 +61,7 @@ def train_and_save_model():
     y_probs = model.predict_proba(X_test)[:, 1]
     
     # Set a lower threshold (0.3 instead of 0.5) to capture more risky employees
-    THRESHOLD = 0.30
+    THRESHOLD = DEFAULT_THRESHOLD
     y_pred_custom = (y_probs >= THRESHOLD).astype(int)
 
     print("\n" + "="*40)
@@ -70,20 +79,80 @@ def train_and_save_model():
     print(f"   • F1 Score: {f1:.4f}")
 
     # 6. Save Model
+    save_model(model, X.columns.tolist(), THRESHOLD, notes="train_and_save_model", pipeline=store.pipeline)
+
+def save_model(model, features, threshold, notes=None, pipeline=None, **extra):
+    """Write the booster JSON, ``artifacts.pkl`` and ``model_meta.json`` and register them.
+
+    Each file is written next to its target and renamed over it, so readers never
+    see a partial file. The set is then registered (and promoted) as a new
+    version in ``src.registry``, which serving processes hot-swap to.
+
+    Args:
+        model (xgb.XGBClassifier): Fitted classifier.
+        features (list): Feature order the model was trained on.
+        threshold (float): Decision threshold used at inference time.
+        notes (Optional[str]): Stored in the registry manifest.
+        pipeline (Optional[FeaturePipeline]): Encoding fitted with the training
+            data; serving loads it so inputs are encoded exactly as in training.
+        **extra: Additional entries for ``artifacts.pkl`` (e.g. CV metrics).
+
+    Returns:
+        str: The registered model version.
+    """
+    from src.registry import ModelRegistry
+
+    # Register the model being replaced first, so it can still be rolled back to
+    registry = ModelRegistry()
+    registry.bootstrap(MODEL_DIR)
     os.makedirs(MODEL_DIR, exist_ok=True)
     
     # Save native XGBoost model (JSON) for SHAP compatibility
-    model.get_booster().save_model(JSON_MODEL_PATH)
+    # (the temporary name keeps the .json suffix, which selects the format)
+    tmp_json = os.path.join(MODEL_DIR, ".xgboost_model.tmp.json")
+    model.get_booster().save_model(tmp_json)
+    os.replace(tmp_json, JSON_MODEL_PATH)
     print(f"Native XGBoost model saved to {JSON_MODEL_PATH}")
 
     # Save artifacts including the threshold for inference usage
     artifacts = {
-        "features": X.columns.tolist(),
+        "features": features,
         "sklearn_model": model, 
-        "threshold": THRESHOLD  # Important: Save threshold to use in the App
+        "threshold": threshold,  # Important: Save threshold to use in the App
+        "feature_pipeline": pipeline,
+        **extra
     }
-    joblib.dump(artifacts, ARTIFACT_PATH)
+    joblib.dump(artifacts, ARTIFACT_PATH + ".tmp")
+    os.replace(ARTIFACT_PATH + ".tmp", ARTIFACT_PATH)
     print(f"Artifacts saved to {ARTIFACT_PATH}")
 
+    # Lightweight copy of the metadata for fast serving startup (and for refresh,
+    # which then never unpickles artifacts.pkl)
+    meta = {"features": features, "threshold": threshold, "params": extra.get("params", {})}
+    if pipeline is not None:
+        meta["feature_pipeline"] = pipeline.to_dict()
+    with open(META_PATH + ".tmp", "w") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(META_PATH + ".tmp", META_PATH)
+    print(f"Model metadata saved to {META_PATH}")
+
+    version = registry.register(MODEL_DIR, notes=notes)
+    print(f"Registered and promoted model version {version}")
+    return version
+
 if __name__ == "__main__":
-    train_and_save_model()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Train the attrition model and save its artifacts.")
+    parser.add_argument("--search", action="store_true", help="Cross-validated parallel hyperparameter/threshold search (src.tuning).")
+    parser.add_argument("--trials", type=int, default=40, help="Search trials.")
+    parser.add_argument("--folds", type=int, default=5, help="Stratified CV folds.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes for the search.")
+    args = parser.parse_args()
+
+    if args.search:
+        from src.tuning import tune_and_save_model
+
+        tune_and_save_model(n_trials=args.trials, n_splits=args.folds, workers=args.workers)
+    else:
+        train_and_save_model()
\ No newline at end of file
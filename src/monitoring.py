@@ -1,28 +1,356 @@
 import pandas as pd
+import numpy as np
+import atexit
+import hashlib
+import joblib
 import os
-from evidently.report import Report
-from evidently.metric_preset import DataDriftPreset
+import threading
+import time
+from typing import Dict, List, Optional
+
+from src.data_processing import CATEGORICAL_DEFAULTS, INPUT_DEFAULTS, MODEL_COLUMNS
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_PATH = os.path.join(BASE_DIR, "data", "raw", "WA_Fn-UseC_-HR-Employee-Attrition.csv")
+REFERENCE_PROFILE_PATH = os.path.join(BASE_DIR, "models", "drift_reference.pkl")
+DRIFT_STATE_PATH = os.path.join(BASE_DIR, "models", "drift_state.pkl")
+# The API keeps its own counts; two processes saving one file would overwrite each other
+API_DRIFT_STATE_PATH = os.path.join(BASE_DIR, "models", "drift_state_api.pkl")
+# Seconds between background saves of the drift state (start_autosave)
+DRIFT_SAVE_INTERVAL_S = float(os.getenv("HR_DRIFT_SAVE_S", "30"))
+
+# Features the caller actually supplies; serving-time constants would always look drifted
+MONITORED_COLUMNS = [
+    col for col in MODEL_COLUMNS
+    if col in INPUT_DEFAULTS or col.split('_')[0] in CATEGORICAL_DEFAULTS
+]
+MAX_BINS = 10
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+# Population Stability Index bands
+PSI_WARNING = 0.1
+PSI_DRIFT = 0.25
 
 def load_reference_data():
     if not os.path.exists(DATA_PATH):
         raise FileNotFoundError(f"Data file not found at {DATA_PATH}")
     return pd.read_csv(DATA_PATH)
 
-def generate_drift_report():
+def simulate_production_data(reference_data: pd.DataFrame, n_rows: int = 300, random_state: int = 42) -> pd.DataFrame:
+    """Sample raw rows and shift Age and MonthlyIncome to mimic a drifted population."""
+    current_data = reference_data.sample(n=n_rows, random_state=random_state).copy()
+    current_data['Age'] = current_data['Age'] + 10
+    current_data['MonthlyIncome'] = current_data['MonthlyIncome'] * 1.5
+    return current_data
+
+def encode_raw(raw_df: pd.DataFrame) -> pd.DataFrame:
+    """Encode raw HR records (training CSV layout) into the model's feature columns."""
+    from src.data_processing import get_pipeline
+
+    return get_pipeline().transform(raw_df).reindex(columns=MODEL_COLUMNS, fill_value=0)
+
+def _file_signature(path: str) -> str:
+    # Content hash, so a profile committed with the repo stays valid after a clone
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+class ReferenceProfile:
+    """Per-feature sketches of the training distribution, computed once and persisted.
+
+    Each feature gets bin edges (its distinct values when there are few, reference
+    quantiles otherwise), the share of reference rows per bin, a few quantiles and
+    the mean/std. Comparing a production batch against it needs only the batch.
+    """
+
+    def __init__(self, columns: List[str], edges: List[np.ndarray], proportions: List[np.ndarray],
+                 quantiles: np.ndarray, mean: np.ndarray, std: np.ndarray, n_rows: int, source_signature=None):
+        self.columns = columns
+        self.edges = edges
+        self.proportions = proportions
+        self.quantiles = quantiles
+        self.mean = mean
+        self.std = std
+        self.n_rows = n_rows
+        self.source_signature = source_signature
+
+    @classmethod
+    def build(cls, reference_df: pd.DataFrame, columns: List[str] = MONITORED_COLUMNS, source_signature=None):
+        """Sketch ``reference_df`` (encoded feature columns)."""
+        values = reference_df.reindex(columns=columns, fill_value=0).to_numpy(dtype=np.float64)
+        edges, proportions = [], []
+        for j in range(values.shape[1]):
+            column = values[:, j]
+            distinct = np.unique(column)
+            if len(distinct) <= MAX_BINS:
+                # Cut between neighbouring values so every value gets its own bin
+                column_edges = (distinct[:-1] + distinct[1:]) / 2
+            else:
+                column_edges = np.unique(np.quantile(column, np.linspace(0, 1, MAX_BINS + 1)[1:-1]))
+            counts = np.bincount(np.searchsorted(column_edges, column, side='right'), minlength=len(column_edges) + 1)
+            edges.append(column_edges)
+            proportions.append(counts / counts.sum())
+
+        return cls(
+            columns=list(columns),
+            edges=edges,
+            proportions=proportions,
+            quantiles=np.quantile(values, QUANTILES, axis=0),
+            mean=values.mean(axis=0),
+            std=values.std(axis=0),
+            n_rows=len(values),
+            source_signature=source_signature,
+        )
+
+    @classmethod
+    def load_or_build(cls, profile_path: str = REFERENCE_PROFILE_PATH, data_path: str = DATA_PATH):
+        """Load the saved profile, rebuilding it when the reference CSV has changed."""
+        signature = _file_signature(data_path) if os.path.exists(data_path) else None
+        if os.path.exists(profile_path):
+            profile = joblib.load(profile_path)
+            if signature is None or profile.source_signature == signature:
+                return profile
+
+        if signature is None:
+            raise FileNotFoundError(f"Data file not found at {data_path}")
+        if os.path.abspath(data_path) == DATA_PATH:
+            from src.feature_store import open_training_store
+
+            reference_df = open_training_store().frame(MONITORED_COLUMNS)
+        else:
+            reference_df = encode_raw(pd.read_csv(data_path))
+        profile = cls.build(reference_df, source_signature=signature)
+        profile.save(profile_path)
+        return profile
+
+    def bin_counts(self, current_df: pd.DataFrame) -> List[np.ndarray]:
+        """Histogram a batch on the reference bins, one count array per feature."""
+        values = current_df.reindex(columns=self.columns, fill_value=0).to_numpy(dtype=np.float64)
+        return [
+            np.bincount(np.searchsorted(self.edges[j], values[:, j], side='right'), minlength=len(self.edges[j]) + 1)
+            for j in range(len(self.columns))
+        ]
+
+    def save(self, path: str = REFERENCE_PROFILE_PATH) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        joblib.dump(self, path)
+
+class DriftMonitor:
+    """Running drift statistics over production traffic, updated batch by batch.
+
+    ``update`` histograms each new batch on the reference bins and adds the
+    counts, so it costs O(batch rows); ``summary`` only reads the accumulated
+    counts. State can be saved and reloaded to survive restarts; long-running
+    callers use ``start_autosave`` instead of saving after every update.
+
+    Args:
+        profile (ReferenceProfile): Reference sketches to compare against.
+        state_path (Optional[str]): Where ``save``/``load`` keep the counts.
+    """
+
+    def __init__(self, profile: ReferenceProfile, state_path: Optional[str] = DRIFT_STATE_PATH):
+        self.profile = profile
+        self.state_path = state_path
+        self._lock = threading.Lock()
+        self._changes = 0
+        self.reset()
+        self._saved_changes = self._changes
+        self._autosave_thread: Optional[threading.Thread] = None
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counts = [np.zeros(len(edges) + 1, dtype=np.int64) for edges in self.profile.edges]
+            self.n_rows = 0
+            self.n_batches = 0
+            self.sums = np.zeros(len(self.profile.columns))
+            self.sq_sums = np.zeros(len(self.profile.columns))
+            self.ingested_segments = set()
+            self._changes += 1
+
+    def update(self, current_df: pd.DataFrame) -> None:
+        """Add a batch of encoded feature rows (any column order, extra columns ignored)."""
+        if len(current_df) == 0:
+            return
+        batch_counts = self.profile.bin_counts(current_df)
+        values = current_df.reindex(columns=self.profile.columns, fill_value=0).to_numpy(dtype=np.float64)
+        with self._lock:
+            for counts, new_counts in zip(self.counts, batch_counts):
+                counts += new_counts
+            self.sums += values.sum(axis=0)
+            self.sq_sums += (values ** 2).sum(axis=0)
+            self.n_rows += len(values)
+            self.n_batches += 1
+            self._changes += 1
+
+    def update_from_log(self, log_dir: Optional[str] = None, start=None, end=None) -> int:
+        """Add prediction-log segments not yet ingested.
+
+        With ``start``/``end`` only rows in that window are added and segments are
+        not marked as ingested; use a window on a fresh monitor (``from_log_window``).
+
+        Returns:
+            int: Rows added.
+        """
+        from src.prediction_log import PREDICTION_LOG_DIR, list_segments, read_log
+
+        segments = [path for path in list_segments(log_dir or PREDICTION_LOG_DIR) if path not in self.ingested_segments]
+        if not segments:
+            return 0
+        logged = read_log(start=start, end=end, columns=self.profile.columns, segments=segments)
+        self.update(logged)
+        if start is None and end is None:
+            self.ingested_segments.update(segments)
+        return len(logged)
+
+    def update_from_store(self, store, start: int = 0, stop: Optional[int] = None, chunksize: int = 100_000) -> int:
+        """Add rows ``start:stop`` of a ``FeatureStore``, reading only the monitored columns.
+
+        Returns:
+            int: Rows added.
+        """
+        stop = len(store) if stop is None else min(stop, len(store))
+        for block_start in range(start, stop, chunksize):
+            self.update(store.frame(self.profile.columns, block_start, min(block_start + chunksize, stop)))
+        return max(stop - start, 0)
+
+    @classmethod
+    def from_log_window(cls, start=None, end=None, log_dir: Optional[str] = None, profile: Optional[ReferenceProfile] = None):
+        """Drift over the logged predictions with ``start <= timestamp < end`` (not persisted)."""
+        monitor = cls(profile or ReferenceProfile.load_or_build(), state_path=None)
+        monitor.update_from_log(log_dir, start, end)
+        return monitor
+
+    def summary(self) -> pd.DataFrame:
+        """Per-feature PSI and mean shift, sorted by PSI (descending)."""
+        with self._lock:
+            counts = [c.copy() for c in self.counts]
+            n_rows = self.n_rows
+            current_mean = self.sums / n_rows if n_rows else np.full(len(self.sums), np.nan)
+            current_std = np.sqrt(np.maximum(self.sq_sums / n_rows - current_mean ** 2, 0)) if n_rows else current_mean
+
+        psi = [
+            population_stability_index(reference, observed / n_rows) if n_rows else np.nan
+            for reference, observed in zip(self.profile.proportions, counts)
+        ]
+        summary = pd.DataFrame({
+            "feature": self.profile.columns,
+            "psi": np.round(psi, 4),
+            "reference_mean": self.profile.mean,
+            "current_mean": current_mean,
+            "reference_std": self.profile.std,
+            "current_std": current_std,
+        })
+        summary["status"] = np.select(
+            [summary["psi"] >= PSI_DRIFT, summary["psi"] >= PSI_WARNING],
+            ["Drift", "Warning"],
+            default="Stable",
+        )
+        return summary.sort_values("psi", ascending=False, ignore_index=True)
+
+    def status(self) -> Dict[str, object]:
+        summary = self.summary()
+        return {
+            "rows_observed": self.n_rows,
+            "batches_observed": self.n_batches,
+            "drifted_features": summary.loc[summary["status"] == "Drift", "feature"].tolist(),
+            "share_drifted": round(float((summary["status"] == "Drift").mean()), 4) if self.n_rows else 0.0,
+        }
+
+    def save(self) -> None:
+        if self.state_path is None:
+            return
+        with self._lock:
+            changes = self._changes
+            state = {
+                "columns": self.profile.columns,
+                "counts": self.counts,
+                "n_rows": self.n_rows,
+                "n_batches": self.n_batches,
+                "sums": self.sums,
+                "sq_sums": self.sq_sums,
+                "ingested_segments": sorted(self.ingested_segments),
+            }
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        joblib.dump(state, self.state_path + ".tmp")
+        os.replace(self.state_path + ".tmp", self.state_path)
+        self._saved_changes = changes
+
+    def save_if_changed(self) -> bool:
+        """Save only when batches were added (or the counts reset) since the last save."""
+        if self._changes == self._saved_changes:
+            return False
+        self.save()
+        return True
+
+    def start_autosave(self, interval_s: float = DRIFT_SAVE_INTERVAL_S) -> "DriftMonitor":
+        """Save changed state from a background thread every ``interval_s`` seconds and at exit.
+
+        Keeps the joblib dump off the request path (e.g. the dashboard's Analyze button).
+        """
+        if self._autosave_thread is None and self.state_path is not None:
+            def run():
+                while True:
+                    time.sleep(interval_s)
+                    try:
+                        self.save_if_changed()
+                    except Exception as e:
+                        print(f" Drift state save error: {e}")
+
+            self._autosave_thread = threading.Thread(target=run, name="drift-autosave", daemon=True)
+            self._autosave_thread.start()
+            atexit.register(self.save_if_changed)
+        return self
+
+    @classmethod
+    def load(cls, profile: Optional[ReferenceProfile] = None, state_path: str = DRIFT_STATE_PATH):
+        """Restore saved counts, starting fresh when the reference bins have changed."""
+        monitor = cls(profile or ReferenceProfile.load_or_build(), state_path)
+        if os.path.exists(state_path):
+            state = joblib.load(state_path)
+            shapes_match = state["columns"] == monitor.profile.columns and all(
+                len(saved) == len(counts) for saved, counts in zip(state["counts"], monitor.counts)
+            )
+            if shapes_match:
+                monitor.counts = state["counts"]
+                monitor.n_rows = state["n_rows"]
+                monitor.n_batches = state["n_batches"]
+                monitor.sums = state["sums"]
+                monitor.sq_sums = state["sq_sums"]
+                monitor.ingested_segments = set(state.get("ingested_segments", []))
+        monitor._saved_changes = monitor._changes
+        return monitor
+
+def population_stability_index(expected: np.ndarray, actual: np.ndarray, epsilon: float = 1e-4) -> float:
+    expected = np.clip(expected, epsilon, None)
+    actual = np.clip(actual, epsilon, None)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+def load_logged_inputs(start=None, end=None, log_dir: Optional[str] = None) -> pd.DataFrame:
+    """Raw input records stored in the prediction log for a time window."""
+    import json
+    from src.prediction_log import PREDICTION_LOG_DIR, read_log
+
+    logged = read_log(log_dir or PREDICTION_LOG_DIR, start, end, columns=["inputs"])["inputs"].dropna()
+    return pd.DataFrame([json.loads(record) for record in logged])
+
+def generate_drift_report(current_data: Optional[pd.DataFrame] = None):
     """
-    Generate Evidently AI Data Drift Report.
+    Generate Evidently AI Data Drift Report (full export, on demand).
+    current_data: raw production records (e.g. ``load_logged_inputs()``);
+    a simulated drifted sample is used when omitted.
     Returns: HTML string of the report.
     """
+    from evidently.report import Report
+    from evidently.metric_preset import DataDriftPreset
+
     # 1. Load Reference Data (Training Data)
     reference_data = load_reference_data()
     
-    # 2. Simulate Production Data (With Drift)
-    current_data = reference_data.sample(n=300, random_state=42).copy()
-    current_data['Age'] = current_data['Age'] + 10          
-    current_data['MonthlyIncome'] = current_data['MonthlyIncome'] * 1.5  
+    # 2. Simulate Production Data (With Drift) unless real rows are given
+    if current_data is None or current_data.empty:
+        current_data = simulate_production_data(reference_data)
+    else:
+        shared_columns = [col for col in reference_data.columns if col in current_data.columns]
+        reference_data = reference_data[shared_columns]
+        current_data = current_data[shared_columns]
     
     # 3. Build Report
     report = Report(metrics=[
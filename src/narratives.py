@@ -0,0 +1,144 @@
+import asyncio
+import random
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from src import metrics
+
+NARRATIVE_COLUMN = "AI_Narrative"
+DEFAULT_CONCURRENCY = 8
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None and getattr(error, "response", None) is not None:
+        status = getattr(error.response, "status_code", None)
+    return status
+
+
+def is_retryable(error: Exception) -> bool:
+    """Rate limits, 5xx responses, timeouts and dropped connections are worth retrying."""
+    if _status_code(error) in RETRYABLE_STATUS:
+        return True
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    # LLM SDKs (groq, openai) name their transport errors consistently
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """The server's ``Retry-After`` hint in seconds, if the error carries one."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+async def call_with_retry(
+    fn: Callable[[], Awaitable[str]],
+    max_retries: int = 5,
+    base_delay_s: float = 1.0,
+    max_delay_s: float = 30.0,
+) -> str:
+    """Await ``fn()``, retrying retryable errors with exponential backoff and jitter.
+
+    A ``Retry-After`` header from a 429 takes precedence over the computed delay.
+    """
+    attempt = 0
+    while True:
+        try:
+            return await fn()
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable(e):
+                raise
+            delay = retry_after_seconds(e)
+            if delay is None:
+                delay = min(max_delay_s, base_delay_s * 2 ** attempt) * random.uniform(0.5, 1.0)
+            attempt += 1
+            metrics.count("llm_retry")
+            await asyncio.sleep(delay)
+
+
+async def iter_narratives(agent, jobs: Dict, concurrency: int = DEFAULT_CONCURRENCY, **retry_kwargs):
+    """Generate explanations concurrently, yielding ``(key, text)`` as each completes.
+
+    Args:
+        agent (HRAgent): Agent whose ``agenerate_explanation`` is called.
+        jobs (Dict): Maps a row key to ``(employee_name, risk_score, factors)``.
+        concurrency (int): Maximum LLM calls in flight at once.
+        **retry_kwargs: Passed to ``call_with_retry``.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(key, name, risk_score, factors):
+        async with semaphore:
+            try:
+                text = await call_with_retry(
+                    lambda: agent.agenerate_explanation(name, risk_score, factors), **retry_kwargs
+                )
+            except Exception as e:
+                metrics.count("llm_narrative_error")
+                text = f"Error: {e}"
+        return key, text
+
+    tasks = [asyncio.create_task(run(key, *job)) for key, job in jobs.items()]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def generate_narratives(
+    agent,
+    results_df: pd.DataFrame,
+    factors: Dict[object, List[str]],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    on_result: Optional[Callable[[object, str, int, int], None]] = None,
+    column: str = NARRATIVE_COLUMN,
+    **retry_kwargs,
+) -> pd.DataFrame:
+    """Fill ``column`` of ``results_df`` with one narrative per row in ``factors``.
+
+    Rows are written as soon as their narrative arrives; ``on_result(index, text,
+    done, total)`` is called after each one so a UI can redraw progressively.
+
+    Args:
+        agent (HRAgent): Agent used to write the narratives.
+        results_df (pd.DataFrame): Scored batch (needs ``Risk_Score_Pct``); modified in place.
+        factors (Dict): Maps a ``results_df`` index to that row's top risk factors.
+        concurrency (int): Maximum LLM calls in flight at once.
+        on_result (Optional[Callable]): Progress callback.
+        column (str): Column receiving the narratives.
+
+    Returns:
+        pd.DataFrame: ``results_df`` with the narrative column filled for the given rows.
+    """
+    if column not in results_df.columns:
+        results_df[column] = pd.Series(pd.NA, index=results_df.index, dtype="object")
+
+    jobs = {}
+    for index, row_factors in factors.items():
+        if "employee_id" in results_df.columns and pd.notna(results_df.at[index, "employee_id"]):
+            name = str(results_df.at[index, "employee_id"])
+        else:
+            name = f"Employee {index}"
+        jobs[index] = (name, float(results_df.at[index, "Risk_Score_Pct"]), row_factors)
+
+    async def run_all():
+        done = 0
+        async for index, text in iter_narratives(agent, jobs, concurrency, **retry_kwargs):
+            results_df.at[index, column] = text
+            done += 1
+            if on_result is not None:
+                on_result(index, text, done, len(jobs))
+
+    asyncio.run(run_all())
+    return results_df
@@ -0,0 +1,130 @@
+"""Multi-process batch scoring with one read-only model per worker.
+
+Each worker loads ``models/xgboost_model.json`` once in its initializer, so the
+model is never pickled along with a task; only the raw input chunk and the
+scored chunk cross process boundaries. Results are yielded in input order.
+
+With a feature store as input (``score_store``) tasks are just row ranges:
+every worker memory-maps the same store files, so the encoded matrix is read
+from the shared page cache instead of being pickled to each process.
+"""
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, Optional
+
+import pandas as pd
+
+from src.batch_score import attach_scores, score_frame, score_store_range
+from src.inference import JSON_MODEL_PATH, load_booster_model
+
+# Per-process model, set by _init_worker, and memory-mapped stores opened by this worker
+_WORKER_MODEL = None
+_WORKER_STORES = {}
+
+
+def _init_worker(model_path: str, nthread: int) -> None:
+    global _WORKER_MODEL
+    _WORKER_MODEL = load_booster_model(model_path, nthread=nthread)
+
+
+def _score_partition(chunk: pd.DataFrame, threshold: float):
+    start = time.perf_counter()
+    results_df = score_frame(_WORKER_MODEL, chunk, threshold)
+    return results_df, os.getpid(), len(chunk), time.perf_counter() - start
+
+
+def _score_store_partition(store_path: str, start: int, stop: int, threshold: float):
+    from src.feature_store import FeatureStore
+
+    begin = time.perf_counter()
+    store = _WORKER_STORES.get(store_path)
+    if store is None:
+        store = _WORKER_STORES[store_path] = FeatureStore(store_path)
+    results_df = score_store_range(_WORKER_MODEL, store, start, stop, threshold)
+    return results_df, os.getpid(), len(results_df), time.perf_counter() - begin
+
+
+class ParallelScorer:
+    """Score chunks of raw employee records across a process pool.
+
+    Args:
+        workers (int): Number of worker processes.
+        threshold (float): Decision threshold passed to ``score_frame``.
+        model_path (str): Booster JSON each worker loads once.
+        max_in_flight (Optional[int]): Chunks submitted ahead of the one being
+            consumed; bounds memory when the input is streamed. Defaults to 2x workers.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        threshold: float,
+        model_path: str = JSON_MODEL_PATH,
+        max_in_flight: Optional[int] = None,
+    ):
+        self.workers = max(1, int(workers))
+        self.threshold = threshold
+        self.model_path = model_path
+        self.max_in_flight = max_in_flight or 2 * self.workers
+        # Split the cores between workers so XGBoost threads do not oversubscribe
+        self.nthread = max(1, (os.cpu_count() or 1) // self.workers)
+        self.stats: Dict[int, Dict[str, float]] = {}
+
+    def score_chunks(self, chunks: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        """Yield scored chunks in the same order as ``chunks``."""
+        return self._run((_score_partition, chunk, self.threshold) for chunk in chunks)
+
+    def score_store(self, store_path: str, chunksize: int = 50_000) -> Iterator[pd.DataFrame]:
+        """Yield scored row ranges of a feature store, in row order."""
+        from src.feature_store import FeatureStore
+
+        n_rows = len(FeatureStore(store_path))
+        return self._run(
+            (_score_store_partition, store_path, start, min(start + chunksize, n_rows), self.threshold)
+            for start in range(0, n_rows, chunksize)
+        )
+
+    def _run(self, tasks) -> Iterator[pd.DataFrame]:
+        self.stats = {}
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.model_path, self.nthread),
+        ) as pool:
+            pending = deque()
+            for fn, *args in tasks:
+                pending.append(pool.submit(fn, *args))
+                if len(pending) >= self.max_in_flight:
+                    yield self._collect(pending.popleft())
+            while pending:
+                yield self._collect(pending.popleft())
+
+    def score_frame(self, batch_df: pd.DataFrame, chunksize: int = 10_000) -> pd.DataFrame:
+        """Score an in-memory frame by splitting it into ``chunksize`` partitions."""
+        chunks = (batch_df.iloc[i:i + chunksize] for i in range(0, len(batch_df), chunksize))
+        results = list(self.score_chunks(chunks))
+        return pd.concat(results) if results else attach_scores(batch_df.iloc[:0], [], self.threshold)
+
+    def _collect(self, future) -> pd.DataFrame:
+        results_df, pid, n_rows, elapsed = future.result()
+        worker = self.stats.setdefault(pid, {"rows": 0, "chunks": 0, "busy_s": 0.0})
+        worker["rows"] += n_rows
+        worker["chunks"] += 1
+        worker["busy_s"] += elapsed
+        return results_df
+
+    def worker_throughput(self) -> pd.DataFrame:
+        """Rows, chunks, busy time and rows/s for each worker process of the last run."""
+        rows = [
+            {
+                "worker_pid": pid,
+                "rows": int(stat["rows"]),
+                "chunks": int(stat["chunks"]),
+                "busy_s": round(stat["busy_s"], 3),
+                "rows_per_s": round(stat["rows"] / stat["busy_s"], 1) if stat["busy_s"] > 0 else 0.0,
+            }
+            for pid, stat in sorted(self.stats.items())
+        ]
+        return pd.DataFrame(rows, columns=["worker_pid", "rows", "chunks", "busy_s", "rows_per_s"])
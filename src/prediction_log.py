@@ -0,0 +1,294 @@
+import glob
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from src.data_processing import MODEL_COLUMNS
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PREDICTION_LOG_DIR = os.getenv("HR_PREDICTION_LOG_DIR", os.path.join(BASE_DIR, "logs", "predictions"))
+SEGMENT_SUFFIX = ".parquet"
+IN_PROGRESS_SUFFIX = ".parquet.inprogress"
+META_COLUMNS = ["timestamp", "source", "latency_ms", "batch_size", "probability", "inputs"]
+
+_STOP = object()
+
+
+class PredictionLogger:
+    """Append scored rows to a rotating, zstd-compressed Parquet log off the request path.
+
+    ``log`` only copies the batch into a bounded queue and returns; a background
+    thread buffers rows, writes them as row groups and rotates to a new segment
+    by size or age. If the queue is full the batch is dropped and counted rather
+    than blocking the caller. Segments are written as ``*.parquet.inprogress``
+    and renamed to ``*.parquet`` when closed, so readers only see complete files.
+
+    Each row holds the UTC timestamp, a source tag, the scoring call's latency and
+    batch size, the probability, the raw input record as JSON (when given) and
+    the encoded features as float32, one column per ``feature_names`` entry.
+    Serving passes its model's pipeline feature names and updates them with
+    ``set_feature_names`` when a model with a different schema is swapped in;
+    the writer then starts a new segment.
+
+    Args:
+        log_dir (str): Directory for the segments.
+        max_queue (int): Batches waiting for the writer before new ones are dropped.
+        flush_rows (int): Buffered rows that trigger a row-group write.
+        flush_interval_s (float): Maximum age of buffered rows before they are written.
+        rotate_rows (int): Rows per segment.
+        rotate_interval_s (float): Maximum age of a segment before it is closed.
+        feature_names (Sequence[str]): Encoded feature columns, in the order
+            ndarray batches are given in.
+    """
+
+    def __init__(
+        self,
+        log_dir: str = PREDICTION_LOG_DIR,
+        max_queue: int = 1024,
+        flush_rows: int = 5_000,
+        flush_interval_s: float = 2.0,
+        rotate_rows: int = 250_000,
+        rotate_interval_s: float = 300.0,
+        feature_names: Sequence[str] = MODEL_COLUMNS,
+    ):
+        self.log_dir = log_dir
+        self.flush_rows = flush_rows
+        self.flush_interval_s = flush_interval_s
+        self.rotate_rows = rotate_rows
+        self.rotate_interval_s = rotate_interval_s
+        self.feature_names = list(feature_names)
+        os.makedirs(log_dir, exist_ok=True)
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._buffer = []
+        self._buffered_rows = 0
+        self._buffer_feature_names = self.feature_names
+        self._writer = None
+        self._segment_path = None
+        self._segment_rows = 0
+        self._segment_opened = 0.0
+        self._segment_seq = 0
+
+        self.logged_rows = 0
+        self.written_rows = 0
+        self.dropped_batches = 0
+        self.segments_closed = 0
+
+        self._thread = threading.Thread(target=self._run, name="prediction-log-writer", daemon=True)
+        self._thread.start()
+
+    def set_feature_names(self, feature_names: Sequence[str]) -> None:
+        """Log batches with these feature columns from now on (e.g. after a model swap)."""
+        feature_names = list(feature_names)
+        if feature_names != self.feature_names:
+            # Replaced, never mutated: queued batches keep the names they were logged with
+            self.feature_names = feature_names
+
+    def log(
+        self,
+        features,
+        probabilities,
+        latency_ms: float,
+        source: str = "",
+        inputs: Optional[Union[List[dict], pd.DataFrame]] = None,
+    ) -> bool:
+        """Queue one scored batch. Never blocks; returns False if the batch was dropped.
+
+        DataFrames are aligned to ``feature_names`` by column name; arrays must
+        already be in that order. Raw ``inputs`` may be a frame (one row per
+        record): it is converted to JSON in the writer thread, not here.
+        """
+        if isinstance(inputs, pd.DataFrame):
+            inputs = inputs.copy()
+        feature_names = self.feature_names
+        if isinstance(features, pd.DataFrame):
+            if list(features.columns) != feature_names:
+                features = features.reindex(columns=feature_names, fill_value=0)
+            features = features.to_numpy(dtype=np.float32)
+        item = (
+            time.time(),
+            source,
+            float(latency_ms),
+            np.array(features, dtype=np.float32, ndmin=2),
+            np.asarray(probabilities, dtype=np.float32).ravel(),
+            inputs,
+            feature_names,
+        )
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.dropped_batches += 1
+            return False
+        self.logged_rows += len(item[4])
+        return True
+
+    def flush(self, timeout: float = 10.0) -> None:
+        """Write everything queued so far and close the current segment so it can be read."""
+        done = threading.Event()
+        self._queue.put(done, timeout=timeout)
+        done.wait(timeout)
+
+    def close(self, timeout: float = 10.0) -> None:
+        if self._thread.is_alive():
+            self._queue.put(_STOP, timeout=timeout)
+            self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        return {
+            "log_dir": self.log_dir,
+            "queued_batches": self._queue.qsize(),
+            "logged_rows": self.logged_rows,
+            "written_rows": self.written_rows,
+            "dropped_batches": self.dropped_batches,
+            "segments_closed": self.segments_closed,
+        }
+
+    def _run(self) -> None:
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval_s)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                self._write_buffer()
+                self._close_segment()
+                return
+            if isinstance(item, threading.Event):
+                self._write_buffer()
+                self._close_segment()
+                item.set()
+                continue
+            if item is not None:
+                if item[6] is not self._buffer_feature_names:
+                    # New feature schema: the current segment cannot hold it
+                    self._write_buffer()
+                    self._close_segment()
+                    self._buffer_feature_names = item[6]
+                self._buffer.append(item)
+                self._buffered_rows += len(item[4])
+
+            now = time.monotonic()
+            if self._buffered_rows >= self.flush_rows or (self._buffer and now - last_flush >= self.flush_interval_s):
+                self._write_buffer()
+                last_flush = now
+            if self._writer is not None and (
+                self._segment_rows >= self.rotate_rows or now - self._segment_opened >= self.rotate_interval_s
+            ):
+                self._close_segment()
+
+    def _write_buffer(self) -> None:
+        if not self._buffer:
+            return
+        try:
+            table = self._to_table(self._buffer)
+            if self._writer is None:
+                self._open_segment(table.schema)
+            self._writer.write_table(table)
+            self._segment_rows += table.num_rows
+            self.written_rows += table.num_rows
+        except Exception as e:
+            print(f" Prediction log write error: {e}")
+        self._buffer = []
+        self._buffered_rows = 0
+
+    def _to_table(self, items):
+        import pyarrow as pa
+
+        timestamps, sources, latencies, sizes, probabilities, inputs, features = [], [], [], [], [], [], []
+        for ts, source, latency_ms, batch_features, batch_probabilities, batch_inputs, _ in items:
+            n = len(batch_probabilities)
+            timestamps.append(np.full(n, int(ts * 1000), dtype="int64"))
+            sources.extend([source] * n)
+            latencies.append(np.full(n, latency_ms, dtype=np.float32))
+            sizes.append(np.full(n, n, dtype=np.int32))
+            probabilities.append(batch_probabilities)
+            if isinstance(batch_inputs, pd.DataFrame):
+                inputs.extend(batch_inputs.to_json(orient="records", lines=True, date_format="iso").splitlines())
+            elif batch_inputs:
+                inputs.extend(json.dumps(record, default=str) for record in batch_inputs)
+            else:
+                inputs.extend([None] * n)
+            features.append(batch_features)
+
+        feature_matrix = np.concatenate(features)
+        columns = {
+            "timestamp": pa.array(np.concatenate(timestamps)).cast(pa.timestamp("ms", tz="UTC")),
+            "source": pa.array(sources, pa.string()),
+            "latency_ms": pa.array(np.concatenate(latencies)),
+            "batch_size": pa.array(np.concatenate(sizes)),
+            "probability": pa.array(np.concatenate(probabilities)),
+            "inputs": pa.array(inputs, pa.string()),
+        }
+        for j, name in enumerate(items[0][6]):
+            columns[name] = pa.array(feature_matrix[:, j])
+        return pa.table(columns)
+
+    def _open_segment(self, schema) -> None:
+        import pyarrow.parquet as pq
+
+        self._segment_seq += 1
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        base = os.path.join(self.log_dir, f"predictions-{stamp}-{os.getpid()}-{self._segment_seq:05d}")
+        self._segment_path = base + IN_PROGRESS_SUFFIX
+        self._writer = pq.ParquetWriter(self._segment_path, schema, compression="zstd")
+        self._segment_rows = 0
+        self._segment_opened = time.monotonic()
+
+    def _close_segment(self) -> None:
+        if self._writer is None:
+            return
+        self._writer.close()
+        os.replace(self._segment_path, self._segment_path[: -len(IN_PROGRESS_SUFFIX)] + SEGMENT_SUFFIX)
+        self._writer = None
+        self._segment_path = None
+        self.segments_closed += 1
+
+
+def list_segments(log_dir: str = PREDICTION_LOG_DIR) -> List[str]:
+    """Closed log segments, oldest first."""
+    return sorted(glob.glob(os.path.join(log_dir, "*" + SEGMENT_SUFFIX)))
+
+
+def read_log(
+    log_dir: str = PREDICTION_LOG_DIR,
+    start=None,
+    end=None,
+    columns: Optional[Iterable[str]] = None,
+    segments: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    """Read logged rows with ``start <= timestamp < end`` from the closed segments.
+
+    Args:
+        log_dir (str): Log directory.
+        start, end: Window bounds (anything ``pd.Timestamp`` accepts; naive means UTC).
+        columns (Optional[Iterable[str]]): Subset of columns to load.
+        segments (Optional[List[str]]): Explicit segment files instead of all of ``log_dir``.
+
+    Returns:
+        pd.DataFrame: Matching rows (empty if there are none).
+    """
+    import pyarrow.dataset as ds
+
+    segments = list_segments(log_dir) if segments is None else segments
+    if not segments:
+        return pd.DataFrame(columns=list(columns) if columns is not None else META_COLUMNS)
+
+    dataset = ds.dataset(segments, format="parquet")
+    condition = None
+    for bound, op in ((start, "ge"), (end, "lt")):
+        if bound is None:
+            continue
+        bound = pd.Timestamp(bound)
+        bound = bound.tz_localize("UTC") if bound.tzinfo is None else bound.tz_convert("UTC")
+        clause = getattr(ds.field("timestamp"), f"__{op}__")(bound.to_pydatetime())
+        condition = clause if condition is None else condition & clause
+    return dataset.to_table(columns=list(columns) if columns is not None else None, filter=condition).to_pandas()
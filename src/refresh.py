@@ -0,0 +1,230 @@
+"""Incremental model refresh from newly labeled attrition outcomes.
+
+Instead of retraining on the full history, boosting continues from
+``models/xgboost_model.json``: new trees are fitted to the residuals of the
+current model on the new rows only. The new rows are split three ways: trees
+are fitted on one part, early stopping watches a second, and the third is
+never seen during fitting. The candidate is promoted only if recall at the
+stored threshold on the holdout (the training holdout split plus that third
+part) does not regress. A promoted model becomes
+a new registry version, so ``python -m src.registry rollback`` restores the
+previous one.
+
+Usage:
+    python -m src.refresh new_outcomes.csv --rounds 50
+    python -m src.refresh data/feature_store/new_outcomes --dry-run
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict
+
+import joblib
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.metrics import average_precision_score, precision_score, recall_score
+from sklearn.model_selection import train_test_split
+
+from src.data_processing import legacy_pipeline
+from src.feature_pipeline import load_pipeline
+from src.feature_store import FeatureStore, build_store
+from src.model import ARTIFACT_PATH, DEFAULT_THRESHOLD, JSON_MODEL_PATH, META_PATH, MODEL_PARAMS, save_model
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REFRESH_STORE_PATH = os.path.join(BASE_DIR, "data", "feature_store", "refresh")
+DEFAULT_ROUNDS = 50
+EARLY_STOPPING_ROUNDS = 10
+
+
+def _split(rows: np.ndarray, y: np.ndarray, test_size: float, random_state: int):
+    """Stratified split of ``rows`` when both classes have at least two members."""
+    labels = y[rows]
+    positives = int(labels.sum())
+    stratify = labels if min(positives, len(labels) - positives) >= 2 else None
+    return train_test_split(rows, test_size=test_size, random_state=random_state, stratify=stratify)
+
+
+def _holdout_metrics(model, X, y, threshold: float) -> Dict[str, float]:
+    probabilities = model.predict_proba(X)[:, 1]
+    predicted = probabilities >= threshold
+    return {
+        "recall": float(recall_score(y, predicted, zero_division=0)),
+        "precision": float(precision_score(y, predicted, zero_division=0)),
+        "pr_auc": float(average_precision_score(y, probabilities)) if y.any() else float("nan"),
+    }
+
+
+def _artifact_extras() -> Dict[str, Any]:
+    """Extra ``artifacts.pkl`` entries (params, CV metrics, refresh history) to carry forward."""
+    artifacts = joblib.load(ARTIFACT_PATH) if os.path.exists(ARTIFACT_PATH) else {}
+    return {
+        key: value for key, value in artifacts.items()
+        if key not in ("features", "sklearn_model", "threshold", "feature_pipeline")
+    }
+
+
+def _current_model():
+    """Current booster (as a classifier), its params, threshold and feature pipeline.
+
+    Read from the booster JSON and ``model_meta.json``; ``artifacts.pkl`` is
+    only unpickled for models whose metadata predates the stored params.
+    """
+    if not os.path.exists(JSON_MODEL_PATH):
+        raise FileNotFoundError(f"Model file not found at {JSON_MODEL_PATH}")
+    meta = {}
+    if os.path.exists(META_PATH):
+        with open(META_PATH) as f:
+            meta = json.load(f)
+    if "params" in meta:
+        threshold, saved_params = meta.get("threshold", DEFAULT_THRESHOLD), meta["params"]
+    else:
+        artifacts = joblib.load(ARTIFACT_PATH) if os.path.exists(ARTIFACT_PATH) else {}
+        threshold = meta.get("threshold", artifacts.get("threshold", DEFAULT_THRESHOLD))
+        saved_params = artifacts.get("params", {})
+
+    params = {**MODEL_PARAMS, **saved_params}
+    model = xgb.XGBClassifier(**params)
+    model.load_model(JSON_MODEL_PATH)
+    # Models saved before the pipeline existed were trained on the legacy serving schema
+    pipeline = load_pipeline(META_PATH, ARTIFACT_PATH) or legacy_pipeline()
+    return model, params, float(threshold), pipeline
+
+
+def refresh_model(
+    new_data_path: str,
+    n_rounds: int = DEFAULT_ROUNDS,
+    holdout_size: float = 0.2,
+    validation_size: float = 0.2,
+    recall_tolerance: float = 0.0,
+    promote: bool = True,
+    random_state: int = 42,
+) -> Dict[str, Any]:
+    """Continue boosting on newly labeled rows and promote the result if recall holds.
+
+    Args:
+        new_data_path (str): CSV in the raw training layout (with ``Attrition``)
+            or a feature store built from one.
+        n_rounds (int): Maximum trees to add; early stopping on the validation rows may add fewer.
+        holdout_size (float): Share of the new rows held out for the promotion gate
+            (never used for fitting or early stopping).
+        validation_size (float): Share of the remaining new rows used for early stopping.
+        recall_tolerance (float): Allowed drop in holdout recall (0 = must not regress).
+        promote (bool): Save the candidate when it passes; ``False`` only reports.
+        random_state (int): Seed for the new-row splits.
+
+    Returns:
+        Dict[str, Any]: Refresh record (row counts, trees added, holdout metrics
+        before/after, ``promoted``). Also appended to ``refresh_history`` in
+        ``artifacts.pkl`` when promoted.
+    """
+    start = time.perf_counter()
+    model, params, threshold, pipeline = _current_model()
+    if os.path.isdir(new_data_path):
+        store = FeatureStore(new_data_path)
+    else:
+        # Encode the new rows exactly as the model being refreshed expects
+        store = build_store(new_data_path, REFRESH_STORE_PATH, pipeline=pipeline)
+    labels = store.labels()
+    if labels is None:
+        raise ValueError(f"No Attrition labels in {new_data_path}")
+
+    features = model.get_booster().feature_names or store.feature_names
+    X_new = store.frame(features)
+    y_new = labels.astype(int)
+
+    # Gate rows are judged only by the promotion check, so early stopping cannot favour the candidate on them
+    train_rows, gate_rows = _split(np.arange(len(y_new)), y_new, holdout_size, random_state)
+    fit_rows, val_rows = _split(train_rows, y_new, validation_size, random_state)
+
+    # Reference holdout: the training split src.model reports on (fixed size, so cost does not grow)
+    from src.tuning import split_training_store
+
+    training_store, _, test_rows = split_training_store()
+    X_holdout = pd.concat([training_store.frame(features).iloc[test_rows], X_new.iloc[gate_rows]], ignore_index=True)
+    y_holdout = np.concatenate([training_store.labels()[test_rows].astype(int), y_new[gate_rows]])
+
+    # New trees are fitted on the new rows only, starting from the current model's margins
+    trees_before = model.get_booster().num_boosted_rounds()
+    candidate = xgb.XGBClassifier(**{
+        **params,
+        "n_estimators": n_rounds,
+        "early_stopping_rounds": EARLY_STOPPING_ROUNDS,
+    })
+    candidate.fit(
+        X_new.iloc[fit_rows], y_new[fit_rows],
+        eval_set=[(X_new.iloc[val_rows], y_new[val_rows])],
+        xgb_model=model.get_booster(),
+        verbose=False,
+    )
+    # Keep only the rounds up to the best validation score
+    best_rounds = candidate.best_iteration + 1
+    booster = candidate.get_booster()[:best_rounds]
+    candidate = xgb.XGBClassifier(**params)
+    candidate.load_model(bytearray(booster.save_raw("json")))
+
+    before = _holdout_metrics(model, X_holdout, y_holdout, threshold)
+    after = _holdout_metrics(candidate, X_holdout, y_holdout, threshold)
+    passed = after["recall"] >= before["recall"] - recall_tolerance
+    record = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "source": os.path.abspath(new_data_path),
+        "source_sha256": store.meta.get("source_sha256"),
+        "new_rows": len(y_new),
+        "new_positive_rows": int(y_new.sum()),
+        "fit_rows": len(fit_rows),
+        "validation_rows": len(val_rows),
+        "gate_rows": len(gate_rows),
+        "trees_before": trees_before,
+        "trees_added": booster.num_boosted_rounds() - trees_before,
+        "threshold": threshold,
+        "holdout_rows": len(y_holdout),
+        "before": before,
+        "after": after,
+        "passed": bool(passed),
+        "promoted": False,
+        "elapsed_s": round(time.perf_counter() - start, 3),
+    }
+
+    print(f"Refresh on {len(y_new)} new rows: +{record['trees_added']} trees (had {trees_before})")
+    print(f"   • Holdout recall @ {threshold:.2f}: {before['recall']:.2%} -> {after['recall']:.2%}")
+    print(f"   • Holdout precision: {before['precision']:.2%} -> {after['precision']:.2%}")
+    if not passed:
+        print(" Candidate rejected: holdout recall regressed.")
+    elif promote:
+        record["promoted"] = True
+        extra = _artifact_extras()
+        extra["refresh_history"] = extra.get("refresh_history", []) + [record]
+        record["model_version"] = save_model(
+            candidate, list(features), threshold, notes=f"refresh on {len(y_new)} new rows", pipeline=pipeline, **extra
+        )
+        print("Candidate promoted; roll back with: python -m src.registry rollback")
+    return record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Continue boosting the current model on newly labeled rows.")
+    parser.add_argument("input", help="CSV with new outcomes (raw training layout) or a feature store directory.")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS, help="Maximum trees to add.")
+    parser.add_argument("--holdout-size", type=float, default=0.2, help="Share of new rows held out for the promotion gate.")
+    parser.add_argument("--validation-size", type=float, default=0.2,
+                        help="Share of the remaining new rows used for early stopping.")
+    parser.add_argument("--recall-tolerance", type=float, default=0.0, help="Allowed drop in holdout recall.")
+    parser.add_argument("--dry-run", action="store_true", help="Evaluate the candidate without promoting it.")
+    args = parser.parse_args(argv)
+
+    record = refresh_model(
+        args.input,
+        n_rounds=args.rounds,
+        holdout_size=args.holdout_size,
+        validation_size=args.validation_size,
+        recall_tolerance=args.recall_tolerance,
+        promote=not args.dry_run,
+    )
+    print(f"Done in {record['elapsed_s']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
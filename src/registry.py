@@ -0,0 +1,382 @@
+"""File-based model registry with checksummed versions and hot-swapping.
+
+Each version is an immutable directory ``models/registry/vNNNN/`` holding the
+booster JSON, ``model_meta.json``, ``artifacts.pkl`` and a ``manifest.json``
+with their sha256 checksums. The served version is named by the ``CURRENT``
+file, which is replaced atomically on promotion; every promotion is appended
+to ``history.jsonl`` so it can be rolled back. Promotion (and rollback) also
+copies the version's files into ``models/``, so offline consumers that read
+``models/`` directly (batch scoring, the risk index, refresh) follow the
+registry too.
+
+Serving processes hold a ``ModelWatcher``: it polls ``CURRENT`` in a
+background thread, loads and verifies a newly promoted version off the
+request path and then swaps a single reference. Requests read that reference
+once, so in-flight requests finish on the model they started with.
+
+Usage:
+    python -m src.registry list
+    python -m src.registry register models --notes "manual retrain"
+    python -m src.registry promote v0003
+    python -m src.registry rollback
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from src import metrics
+from src.data_processing import legacy_pipeline
+from src.feature_pipeline import FeaturePipeline, load_pipeline
+from src.inference import load_serving_model, load_threshold
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODELS_DIR = os.path.join(BASE_DIR, "models")
+REGISTRY_DIR = os.getenv("HR_MODEL_REGISTRY", os.path.join(MODELS_DIR, "registry"))
+# Seconds between checks of the CURRENT pointer in serving processes
+POLL_INTERVAL_S = float(os.getenv("HR_MODEL_POLL_S", "2"))
+
+MODEL_FILES = ("xgboost_model.json", "model_meta.json", "artifacts.pkl")
+CURRENT_FILE = "CURRENT"
+HISTORY_FILE = "history.jsonl"
+MANIFEST_FILE = "manifest.json"
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+class ModelRegistry:
+    """Versioned model directories under ``root`` plus the ``CURRENT`` pointer.
+
+    Args:
+        root (str): Registry directory.
+        models_dir (Optional[str]): Directory the current version's files are
+            published to on promotion (``None`` to only move the pointer).
+    """
+
+    def __init__(self, root: str = REGISTRY_DIR, models_dir: Optional[str] = MODELS_DIR):
+        self.root = root
+        self.models_dir = models_dir
+
+    def versions(self) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            name for name in os.listdir(self.root)
+            if name.startswith("v") and os.path.exists(os.path.join(self.root, name, MANIFEST_FILE))
+        )
+
+    def version_dir(self, version: str) -> str:
+        return os.path.join(self.root, version)
+
+    def manifest(self, version: str) -> Dict[str, object]:
+        path = os.path.join(self.version_dir(version), MANIFEST_FILE)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Model version {version} not found in {self.root}")
+        with open(path) as f:
+            return json.load(f)
+
+    def current_version(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.root, CURRENT_FILE)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def register(self, source_dir: str = MODELS_DIR, promote: bool = True, notes: Optional[str] = None) -> str:
+        """Copy the model files of ``source_dir`` into a new version.
+
+        Args:
+            source_dir (str): Directory containing ``MODEL_FILES`` (``artifacts.pkl`` optional).
+            promote (bool): Make the new version current.
+            notes (Optional[str]): Free text stored in the manifest.
+
+        Returns:
+            str: The new version, e.g. ``"v0004"``.
+        """
+        json_path = os.path.join(source_dir, MODEL_FILES[0])
+        if not os.path.exists(json_path):
+            raise FileNotFoundError(f"Model file not found at {json_path}")
+
+        os.makedirs(self.root, exist_ok=True)
+        staging = os.path.join(self.root, f".staging-{uuid.uuid4().hex}")
+        os.makedirs(staging)
+        checksums = {}
+        for name in MODEL_FILES:
+            source = os.path.join(source_dir, name)
+            if os.path.exists(source):
+                shutil.copy2(source, os.path.join(staging, name))
+                checksums[name] = _sha256(os.path.join(staging, name))
+
+        # Claim the next free version number; rename fails if another writer got there first
+        while True:
+            existing = self.versions()
+            version = f"v{int(existing[-1][1:]) + 1 if existing else 1:04d}"
+            manifest = {
+                "version": version,
+                "created_at": _now(),
+                "parent": self.current_version(),
+                "source": os.path.abspath(source_dir),
+                "files": checksums,
+                "notes": notes,
+            }
+            with open(os.path.join(staging, MANIFEST_FILE), "w") as f:
+                json.dump(manifest, f, indent=2)
+            try:
+                os.rename(staging, self.version_dir(version))
+                break
+            except OSError:
+                if not os.path.exists(self.version_dir(version)):
+                    raise
+
+        if promote:
+            self.promote(version)
+        return version
+
+    def verify(self, version: str) -> None:
+        """Raise ``ValueError`` if any file of ``version`` no longer matches its checksum."""
+        for name, expected in self.manifest(version)["files"].items():
+            path = os.path.join(self.version_dir(version), name)
+            if not os.path.exists(path) or _sha256(path) != expected:
+                raise ValueError(f"Checksum mismatch for {name} in model version {version}")
+
+    def publish(self, version: str) -> None:
+        """Copy the files of ``version`` into ``models_dir``, each replaced atomically.
+
+        The booster JSON goes last, so readers keyed on its hash
+        (``inference.model_version``) never pair it with the previous metadata.
+        Files the version does not have are removed rather than left stale.
+        """
+        if self.models_dir is None:
+            return
+        files = self.manifest(version)["files"]
+        os.makedirs(self.models_dir, exist_ok=True)
+        for name in reversed(MODEL_FILES):
+            target = os.path.join(self.models_dir, name)
+            if name not in files:
+                if os.path.exists(target):
+                    os.remove(target)
+                continue
+            if os.path.exists(target) and _sha256(target) == files[name]:
+                continue
+            tmp_path = os.path.join(self.models_dir, f".{uuid.uuid4().hex}.{name}")
+            shutil.copy2(os.path.join(self.version_dir(version), name), tmp_path)
+            os.replace(tmp_path, target)
+
+    def promote(self, version: str, action: str = "promote") -> None:
+        """Verify ``version``, publish its files and atomically point ``CURRENT`` at it."""
+        self.verify(version)
+        self.publish(version)
+        tmp_path = os.path.join(self.root, f".{CURRENT_FILE}.{uuid.uuid4().hex}")
+        with open(tmp_path, "w") as f:
+            f.write(version + "\n")
+        os.replace(tmp_path, os.path.join(self.root, CURRENT_FILE))
+        with open(os.path.join(self.root, HISTORY_FILE), "a") as f:
+            f.write(json.dumps({"version": version, "promoted_at": _now(), "action": action}) + "\n")
+
+    def history(self) -> List[Dict[str, str]]:
+        try:
+            with open(os.path.join(self.root, HISTORY_FILE)) as f:
+                return [json.loads(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            return []
+
+    def _promotion_stack(self) -> List[str]:
+        """Versions in promotion order, with the ones already rolled back from removed."""
+        stack: List[str] = []
+        for entry in self.history():
+            version = entry["version"]
+            if entry.get("action") == "rollback" and version in stack:
+                while stack[-1] != version:
+                    stack.pop()
+            elif not stack or stack[-1] != version:
+                stack.append(version)
+        return stack
+
+    def rollback(self) -> str:
+        """Promote the version that was current before the present one.
+
+        Repeated rollbacks keep stepping back through the promotion history
+        instead of alternating between the last two versions.
+        """
+        current = self.current_version()
+        for version in reversed(self._promotion_stack()):
+            if version != current:
+                self.promote(version, action="rollback")
+                return version
+        raise ValueError("No earlier promoted version to roll back to.")
+
+    def bootstrap(self, source_dir: str = MODELS_DIR) -> Optional[str]:
+        """Register the model files in ``source_dir`` if nothing is current yet."""
+        if self.current_version() is None and os.path.exists(os.path.join(source_dir, MODEL_FILES[0])):
+            return self.register(source_dir, notes="bootstrapped from existing model files")
+        return self.current_version()
+
+
+class ServingModel:
+    """One loaded model version; replaced as a whole, never mutated."""
+
+    __slots__ = ("version", "model", "threshold", "pipeline", "model_dir", "loaded_at")
+
+    def __init__(self, version: str, model, threshold: float, model_dir: str, pipeline: Optional[FeaturePipeline] = None):
+        self.version = version
+        self.model = model
+        self.threshold = threshold
+        # Encoding the version was trained with; older versions use the legacy serving schema
+        self.pipeline = pipeline or legacy_pipeline()
+        self.model_dir = model_dir
+        self.loaded_at = _now()
+
+    @property
+    def model_path(self) -> str:
+        return os.path.join(self.model_dir, MODEL_FILES[0])
+
+
+class ModelWatcher:
+    """Keep the current registry version loaded and hot-swap it when ``CURRENT`` changes.
+
+    Args:
+        registry (ModelRegistry): Registry to follow.
+        backend (Optional[str]): Inference backend passed to ``load_serving_model``.
+        poll_interval_s (float): Seconds between pointer checks in the background thread.
+        on_swap (Optional[Callable[[ServingModel], None]]): Called after each swap
+            (e.g. to re-key a result cache).
+    """
+
+    def __init__(
+        self,
+        registry: Optional[ModelRegistry] = None,
+        backend: Optional[str] = None,
+        poll_interval_s: float = POLL_INTERVAL_S,
+        on_swap: Optional[Callable[[ServingModel], None]] = None,
+    ):
+        self.registry = registry or ModelRegistry()
+        self.backend = backend
+        self.poll_interval_s = poll_interval_s
+        self.on_swap = on_swap
+        self.current: Optional[ServingModel] = None
+        self.swaps = 0
+        self.swap_errors = 0
+        self.last_error: Optional[str] = None
+        self._check_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _load(self, version: str) -> ServingModel:
+        self.registry.verify(version)
+        model_dir = self.registry.version_dir(version)
+        model = load_serving_model(self.backend, model_dir=model_dir)
+        meta_path, artifact_path = os.path.join(model_dir, "model_meta.json"), os.path.join(model_dir, "artifacts.pkl")
+        threshold = load_threshold(meta_path, artifact_path)
+        pipeline = load_pipeline(meta_path, artifact_path)
+        return ServingModel(version, model, threshold, model_dir, pipeline)
+
+    def load(self) -> ServingModel:
+        """Load the current version (bootstrapping the registry from ``models/`` if empty)."""
+        version = self.registry.bootstrap()
+        if version is None:
+            raise FileNotFoundError(f"No model registered in {self.registry.root}. Please run the training script first.")
+        self.current = self._load(version)
+        return self.current
+
+    def check(self) -> bool:
+        """Swap in the current registry version if it changed; returns True on a swap."""
+        with self._check_lock:
+            version = self.registry.current_version()
+            if version is None or (self.current is not None and version == self.current.version):
+                return False
+            try:
+                serving = self._load(version)
+            except Exception as e:
+                # Keep serving the old model; retried on the next poll
+                self.swap_errors += 1
+                self.last_error = f"{version}: {e}"
+                metrics.count("model_swap_error")
+                print(f" Model swap to {version} failed: {e}")
+                return False
+            self.current = serving
+            self.swaps += 1
+            metrics.count("model_swap")
+        if self.on_swap is not None:
+            self.on_swap(serving)
+        return True
+
+    def start(self) -> "ModelWatcher":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="model-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.poll_interval_s):
+            self.check()
+
+    def stats(self) -> Dict[str, object]:
+        current = self.current
+        return {
+            "model_version": current.version if current is not None else None,
+            "threshold": current.threshold if current is not None else None,
+            "loaded_at": current.loaded_at if current is not None else None,
+            "swaps": self.swaps,
+            "swap_errors": self.swap_errors,
+            "last_error": self.last_error,
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the local model registry.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="List versions; * marks the current one.")
+    register = sub.add_parser("register", help="Register the model files of a directory.")
+    register.add_argument("source", nargs="?", default=MODELS_DIR)
+    register.add_argument("--notes", default=None)
+    register.add_argument("--no-promote", action="store_true")
+    promote = sub.add_parser("promote", help="Make a version current.")
+    promote.add_argument("version")
+    sub.add_parser("rollback", help="Return to the previously promoted version.")
+    verify = sub.add_parser("verify", help="Check a version's checksums.")
+    verify.add_argument("version")
+    args = parser.parse_args(argv)
+
+    registry = ModelRegistry()
+    if args.command == "list":
+        current = registry.current_version()
+        for version in registry.versions():
+            manifest = registry.manifest(version)
+            marker = "*" if version == current else " "
+            print(f"{marker} {version}  {manifest['created_at']}  {manifest['files'][MODEL_FILES[0]][:12]}  {manifest.get('notes') or ''}")
+    elif args.command == "register":
+        version = registry.register(args.source, promote=not args.no_promote, notes=args.notes)
+        print(f"Registered {version}" + ("" if args.no_promote else " (current)"))
+    elif args.command == "promote":
+        registry.promote(args.version)
+        print(f"Current model: {args.version}")
+    elif args.command == "rollback":
+        print(f"Current model: {registry.rollback()}")
+    elif args.command == "verify":
+        registry.verify(args.version)
+        print(f"{args.version}: checksums OK")
+
+
+if __name__ == "__main__":
+    main()
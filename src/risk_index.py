@@ -0,0 +1,546 @@
+"""Persistent index of the scored population for fast segment queries.
+
+Every batch run upserts its scores into the index, keyed by employee ID; a
+run over the whole workforce (``full_population``) replaces it instead, so
+employees who have left drop out. Rows
+are stored sorted by Department, JobRole, risk band and probability (highest
+first), so each (Department, JobRole, band) bucket is a contiguous slice
+already in risk order. Per-bucket counts, probability sums and histograms are
+computed once when the index is built. Queries then read the small bucket
+tables plus the first rows of the selected buckets, never the whole population:
+
+- ``top(50, department="Sales")``: highest-risk employees of a segment;
+- ``histogram(by="JobRole")``: risk distribution per segment;
+- ``crossers()``: who crossed the threshold since the previous run;
+- ``summary()``: segment summaries for ``HRAgent.generate_batch_report``.
+
+The index is a directory of ``.npy`` arrays, memory-mapped on load, plus
+``meta.json``. Usage:
+
+    python -m src.batch_score employees.csv -o scored.parquet --index
+    python -m src.risk_index top --department Sales -n 50
+    python -m src.risk_index histogram --by JobRole
+    python -m src.risk_index crossers
+"""
+import argparse
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.feature_store import ID_COLUMNS, replace_directory
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RISK_INDEX_PATH = os.getenv("HR_RISK_INDEX", os.path.join(BASE_DIR, "data", "risk_index"))
+FORMAT_VERSION = 1
+
+SEGMENT_COLUMNS = ("Department", "JobRole")
+UNKNOWN_SEGMENT = "Unknown"
+# Bands split at threshold/2, threshold and halfway to 1; "High" and "Critical" are "High Risk"
+RISK_BANDS = ["Low", "Elevated", "High", "Critical"]
+HIGH_RISK_BAND = RISK_BANDS.index("High")
+HISTOGRAM_BINS = 20
+
+ROW_ARRAYS = ("employee_id", "probability", "previous_probability", "department", "job_role", "id_order")
+TABLE_ARRAYS = ("bucket_keys", "bucket_offsets", "bucket_histograms", "bucket_sums", "bucket_crossed", "crossed_up", "crossed_down")
+
+
+def band_codes(probabilities: np.ndarray, threshold: float) -> np.ndarray:
+    """Risk band of each probability (index into ``RISK_BANDS``)."""
+    edges = np.array([threshold / 2, threshold, (1 + threshold) / 2])
+    return np.searchsorted(edges, probabilities, side="right").astype(np.int8)
+
+
+def histogram_labels() -> List[str]:
+    width = 100 // HISTOGRAM_BINS
+    return [f"{low}-{low + width}%" for low in range(0, 100, width)]
+
+
+def _as_ids(values) -> np.ndarray:
+    ids = np.asarray(values)
+    if ids.dtype.kind in "iu":
+        return ids.astype(np.int64)
+    return ids.astype(str)
+
+
+def _encode(values, vocabulary: List[str]) -> np.ndarray:
+    """Integer codes of ``values``, extending ``vocabulary`` with unseen ones in place."""
+    values = pd.Series(values, dtype=object).fillna(UNKNOWN_SEGMENT).astype(str)
+    for value in pd.unique(values):
+        if value not in vocabulary:
+            vocabulary.append(value)
+    return pd.Categorical(values, categories=vocabulary).codes.astype(np.int16)
+
+
+class RiskIndex:
+    """Scored population sorted into (Department, JobRole, risk band) buckets.
+
+    Built with ``RiskIndex.build`` (or ``update_index``), persisted with ``save``
+    and reopened with ``RiskIndex.load``.
+
+    Args:
+        arrays (Dict[str, np.ndarray]): Row arrays (``ROW_ARRAYS``) and bucket tables (``TABLE_ARRAYS``).
+        meta (Dict): Vocabularies, threshold and run information.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], meta: Dict):
+        self.meta = meta
+        self.threshold: float = meta["threshold"]
+        self.departments: List[str] = meta["departments"]
+        self.job_roles: List[str] = meta["job_roles"]
+        for name in ROW_ARRAYS + TABLE_ARRAYS:
+            setattr(self, name, arrays[name])
+
+    def __len__(self) -> int:
+        return len(self.probability)
+
+    @classmethod
+    def build(
+        cls,
+        employee_ids,
+        probabilities,
+        departments=None,
+        job_roles=None,
+        threshold: float = 0.3,
+        previous: Optional["RiskIndex"] = None,
+        model_version: Optional[str] = None,
+        full_population: bool = False,
+    ) -> "RiskIndex":
+        """Index one run's scores, upserted over ``previous`` when given.
+
+        Employees of ``previous`` that are not in this run keep their last score,
+        unless ``full_population`` says the run covers everyone: they are then
+        dropped. Rescored employees keep their last probability as
+        ``previous_probability``, which is what ``crossers`` compares against.
+        Rows that failed to score (NaN probability) are not indexed; those
+        employees keep their previous entry, even in a full-population run.
+
+        Args:
+            employee_ids: One ID per scored row (the last row wins for duplicates).
+            probabilities: Attrition probabilities.
+            departments: Department per row (``UNKNOWN_SEGMENT`` when omitted or missing).
+            job_roles: JobRole per row.
+            threshold (float): Decision threshold; sets the bands and the crossings.
+            previous (Optional[RiskIndex]): The index of the previous run.
+            model_version (Optional[str]): Stored in the metadata.
+            full_population (bool): The run scored the whole workforce; employees
+                missing from it are removed instead of carried over.
+        """
+        ids = _as_ids(employee_ids)
+        probability = np.asarray(probabilities, dtype=np.float32)
+        n_rows = len(ids)
+        department_vocab = list(previous.departments) if previous is not None else []
+        role_vocab = list(previous.job_roles) if previous is not None else []
+        department = _encode(departments if departments is not None else [None] * n_rows, department_vocab)
+        job_role = _encode(job_roles if job_roles is not None else [None] * n_rows, role_vocab)
+
+        # Last occurrence of each ID in this run
+        _, last = np.unique(ids[::-1], return_index=True)
+        keep = np.sort(n_rows - 1 - last)
+        ids, probability, department, job_role = ids[keep], probability[keep], department[keep], job_role[keep]
+        unscored = np.isnan(probability)
+        failed_ids = ids[unscored]
+        if unscored.any():
+            ids, probability, department, job_role = (
+                ids[~unscored], probability[~unscored], department[~unscored], job_role[~unscored]
+            )
+        previous_probability = np.full(len(ids), np.nan, dtype=np.float32)
+        removed = 0
+
+        if previous is not None and len(previous):
+            old_ids, old_order = np.asarray(previous.employee_id), np.asarray(previous.id_order)
+            if old_ids.dtype.kind != ids.dtype.kind:
+                # Integer IDs meeting string IDs: compare everything as strings
+                old_ids, ids, failed_ids = old_ids.astype(str), ids.astype(str), failed_ids.astype(str)
+                old_order = np.argsort(old_ids, kind="stable")
+            old_sorted = old_ids[old_order]
+            position = np.minimum(np.searchsorted(old_sorted, ids), len(old_sorted) - 1)
+            found = old_sorted[position] == ids
+            old_rows = old_order[position[found]]
+            previous_probability[found] = np.asarray(previous.probability)[old_rows]
+
+            # Employees not rescored in this run are carried over unchanged (or removed)
+            carried = np.ones(len(old_ids), dtype=bool)
+            carried[old_rows] = False
+            if full_population:
+                # Only employees whose scoring failed in this run keep their old entry
+                still_here = np.isin(old_ids, failed_ids)
+                removed = int((carried & ~still_here).sum())
+                carried &= still_here
+            carried_probability = np.asarray(previous.probability)[carried]
+            ids = np.concatenate([ids, old_ids[carried]])
+            probability = np.concatenate([probability, carried_probability])
+            previous_probability = np.concatenate([previous_probability, carried_probability])
+            # Vocabularies only grow, so the previous codes stay valid
+            department = np.concatenate([department, np.asarray(previous.department)[carried]])
+            job_role = np.concatenate([job_role, np.asarray(previous.job_role)[carried]])
+
+        band = band_codes(probability, threshold)
+        order = np.lexsort((-probability, -band, job_role, department))
+        ids, probability, previous_probability = ids[order], probability[order], previous_probability[order]
+        department, job_role, band = department[order], job_role[order], band[order]
+
+        # Bucket boundaries: wherever (department, job_role, band) changes
+        keys = np.column_stack([department, job_role, band]).astype(np.int16)
+        starts = np.flatnonzero(np.r_[True, (keys[1:] != keys[:-1]).any(axis=1)]) if len(keys) else np.zeros(0, dtype=np.int64)
+        offsets = np.r_[starts, len(keys)].astype(np.int64)
+        bucket_of_row = np.repeat(np.arange(len(starts)), np.diff(offsets))
+
+        bins = np.minimum((probability * HISTOGRAM_BINS).astype(np.int64), HISTOGRAM_BINS - 1)
+        histograms = np.zeros((len(starts), HISTOGRAM_BINS), dtype=np.int64)
+        np.add.at(histograms, (bucket_of_row, bins), 1)
+        sums = np.bincount(bucket_of_row, weights=probability, minlength=len(starts))
+
+        was_high = previous_probability >= threshold
+        is_high = probability >= threshold
+        rescored = ~np.isnan(previous_probability)
+        crossed_up = np.flatnonzero(rescored & ~was_high & is_high)
+        crossed_down = np.flatnonzero(rescored & was_high & ~is_high)
+        bucket_crossed = np.column_stack([
+            np.bincount(bucket_of_row[crossed_up], minlength=len(starts)),
+            np.bincount(bucket_of_row[crossed_down], minlength=len(starts)),
+        ]).astype(np.int64)
+
+        arrays = {
+            "employee_id": ids,
+            "probability": probability,
+            "previous_probability": previous_probability,
+            "department": department,
+            "job_role": job_role,
+            "id_order": np.argsort(ids, kind="stable"),
+            "bucket_keys": keys[starts] if len(keys) else np.zeros((0, 3), dtype=np.int16),
+            "bucket_offsets": offsets,
+            "bucket_histograms": histograms,
+            "bucket_sums": sums,
+            "bucket_crossed": bucket_crossed,
+            # Row numbers, highest probability first (rows are in risk order within a bucket only)
+            "crossed_up": crossed_up[np.argsort(-probability[crossed_up], kind="stable")],
+            "crossed_down": crossed_down[np.argsort(probability[crossed_down], kind="stable")],
+        }
+        meta = {
+            "format_version": FORMAT_VERSION,
+            "n_rows": len(ids),
+            "run_rows": len(keep),
+            "unscored_rows": len(failed_ids),
+            "full_population": bool(full_population),
+            "removed_rows": removed,
+            "threshold": float(threshold),
+            "departments": department_vocab,
+            "job_roles": role_vocab,
+            "model_version": model_version,
+            "built_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "previous_built_at": previous.meta.get("built_at") if previous is not None else None,
+            "runs": (previous.meta.get("runs", 0) if previous is not None else 0) + 1,
+        }
+        return cls(arrays, meta)
+
+    @classmethod
+    def from_results(
+        cls,
+        results_df: pd.DataFrame,
+        threshold: float,
+        previous: Optional["RiskIndex"] = None,
+        model_version: Optional[str] = None,
+    ) -> "RiskIndex":
+        """Index a scored frame (``attach_scores`` output); IDs from ``ID_COLUMNS``, else row numbers."""
+        id_col = next((col for col in ID_COLUMNS if col in results_df.columns), None)
+        return cls.build(
+            results_df[id_col].to_numpy() if id_col else np.arange(len(results_df)),
+            results_df["Attrition_Probability"].to_numpy(),
+            *[results_df[col].to_numpy() if col in results_df.columns else None for col in SEGMENT_COLUMNS],
+            threshold=threshold,
+            previous=previous,
+            model_version=model_version,
+        )
+
+    # --- Persistence ---
+
+    def save(self, path: str = RISK_INDEX_PATH) -> str:
+        """Write the index next to ``path`` and swap it in (see ``replace_directory``)."""
+        tmp_path = path + ".building"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        for name in ROW_ARRAYS + TABLE_ARRAYS:
+            np.save(os.path.join(tmp_path, f"{name}.npy"), np.asarray(getattr(self, name)))
+        with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+            json.dump(self.meta, f, indent=2)
+
+        replace_directory(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path: str = RISK_INDEX_PATH) -> "RiskIndex":
+        """Open a saved index; the per-row arrays are memory-mapped, not read."""
+        meta_path = os.path.join(path, "meta.json")
+        if not os.path.exists(meta_path):
+            raise FileNotFoundError(f"Risk index not found at {path}")
+        with open(meta_path) as f:
+            meta = json.load(f)
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in ROW_ARRAYS}
+        arrays.update({name: np.load(os.path.join(path, f"{name}.npy")) for name in TABLE_ARRAYS})
+        return cls(arrays, meta)
+
+    # --- Queries ---
+
+    def _code(self, vocabulary: List[str], value: Optional[str]) -> Optional[int]:
+        if value is None:
+            return None
+        return vocabulary.index(value) if value in vocabulary else -1
+
+    def _buckets(self, department: Optional[str] = None, job_role: Optional[str] = None, band: Optional[str] = None) -> np.ndarray:
+        """Bucket numbers matching the filters (``None`` = any)."""
+        mask = np.ones(len(self.bucket_keys), dtype=bool)
+        for axis, code in enumerate((
+            self._code(self.departments, department),
+            self._code(self.job_roles, job_role),
+            self._code(RISK_BANDS, band),
+        )):
+            if code is not None:
+                mask &= self.bucket_keys[:, axis] == code
+        return np.flatnonzero(mask)
+
+    def _rows(self, rows: np.ndarray) -> pd.DataFrame:
+        rows = np.asarray(rows, dtype=np.int64)
+        probability = np.asarray(self.probability[rows], dtype=float)
+        return pd.DataFrame({
+            "employee_id": np.asarray(self.employee_id[rows]),
+            "Department": pd.Categorical.from_codes(np.asarray(self.department[rows]), categories=self.departments),
+            "JobRole": pd.Categorical.from_codes(np.asarray(self.job_role[rows]), categories=self.job_roles),
+            "risk_band": pd.Categorical.from_codes(band_codes(probability, self.threshold), categories=RISK_BANDS),
+            "probability": probability,
+            "previous_probability": np.asarray(self.previous_probability[rows], dtype=float),
+        })
+
+    def top(self, n: int = 50, department: Optional[str] = None, job_role: Optional[str] = None, band: Optional[str] = None) -> pd.DataFrame:
+        """The ``n`` highest-risk employees of a segment, highest first.
+
+        Reads at most ``n`` rows from each matching bucket (each is already in risk order).
+        """
+        buckets = self._buckets(department, job_role, band)
+        starts, stops = self.bucket_offsets[buckets], self.bucket_offsets[buckets + 1]
+        candidates = np.concatenate([np.arange(start, min(start + n, stop)) for start, stop in zip(starts, stops)] or [np.zeros(0, dtype=np.int64)])
+        best = candidates[np.argsort(-np.asarray(self.probability[candidates]), kind="stable")[:n]]
+        return self._rows(best)
+
+    def lookup(self, employee_id) -> Optional[Dict[str, object]]:
+        """One employee's indexed entry, or ``None``."""
+        ids = self.employee_id
+        if ids.dtype.kind == "U":
+            key = str(employee_id)
+        else:
+            try:
+                key = int(employee_id)
+            except (TypeError, ValueError):
+                return None
+        # Binary search over the ID order: touches log2(n) rows of the mapped arrays
+        low, high = 0, len(ids)
+        while low < high:
+            middle = (low + high) // 2
+            if ids[self.id_order[middle]] < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low >= len(ids) or ids[self.id_order[low]] != key:
+            return None
+        return self._rows([self.id_order[low]]).iloc[0].to_dict()
+
+    def _axis(self, by: Optional[str]):
+        if by is None:
+            return None, ["All"]
+        if by == "Department":
+            return 0, self.departments
+        if by == "JobRole":
+            return 1, self.job_roles
+        if by == "risk_band":
+            return 2, RISK_BANDS
+        raise ValueError(f"Unknown segment {by!r}. Use Department, JobRole or risk_band.")
+
+    def _group(self, table: np.ndarray, by: Optional[str]) -> pd.DataFrame:
+        """Sum a per-bucket table into one row per segment value."""
+        axis, labels = self._axis(by)
+        groups = np.zeros(len(self.bucket_keys), dtype=np.int64) if axis is None else self.bucket_keys[:, axis]
+        totals = np.zeros((len(labels),) + table.shape[1:], dtype=table.dtype)
+        np.add.at(totals, groups, table)
+        return pd.DataFrame(totals.reshape(len(labels), int(np.prod(table.shape[1:]))), index=pd.Index(labels, name=by or "population"))
+
+    def histogram(self, by: Optional[str] = "JobRole") -> pd.DataFrame:
+        """Employee counts per probability bin (``HISTOGRAM_BINS`` of equal width) for each segment value."""
+        frame = self._group(self.bucket_histograms, by)
+        frame.columns = histogram_labels()
+        return frame
+
+    def segments(self, by: Optional[str] = "Department") -> pd.DataFrame:
+        """Per segment value: employees, high-risk count and share, mean risk and threshold crossings."""
+        counts = np.diff(self.bucket_offsets)
+        high = np.where(self.bucket_keys[:, 2] >= HIGH_RISK_BAND, counts, 0) if len(counts) else counts
+        frame = self._group(np.column_stack([counts, high, self.bucket_crossed]).astype(np.int64), by)
+        frame.columns = ["employees", "high_risk", "crossed_up", "crossed_down"]
+        sums = self._group(self.bucket_sums[:, None], by).iloc[:, 0].to_numpy()
+        employees = frame["employees"].to_numpy()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            frame.insert(2, "high_risk_pct", np.round(100 * frame["high_risk"].to_numpy() / employees, 2))
+            frame.insert(3, "mean_risk_pct", np.round(100 * sums / employees, 2))
+        frame = frame[employees > 0]
+        return frame.sort_values(["high_risk_pct", "mean_risk_pct"], ascending=False)
+
+    def crossers(self, direction: str = "up", n: Optional[int] = None) -> pd.DataFrame:
+        """Employees who crossed the threshold since the previous run.
+
+        Args:
+            direction (str): "up" (became high risk, highest first) or "down" (dropped below, lowest first).
+            n (Optional[int]): Return only the first ``n``.
+        """
+        if direction not in ("up", "down"):
+            raise ValueError("direction must be 'up' or 'down'")
+        rows = self.crossed_up if direction == "up" else self.crossed_down
+        return self._rows(rows[:n] if n is not None else rows)
+
+    def summary(self, max_segments: int = 5) -> Dict[str, str]:
+        """Segment summaries to add to the ``generate_batch_report`` input."""
+        def describe(frame: pd.DataFrame) -> str:
+            return "; ".join(
+                f"{row.Index}: {row.high_risk_pct:.1f}% high risk ({row.high_risk:,} of {row.employees:,}), avg {row.mean_risk_pct:.1f}%"
+                for row in frame.head(max_segments).itertuples()
+            )
+
+        bands = self.segments("risk_band").reindex(RISK_BANDS)["employees"].fillna(0)
+        total = max(len(self), 1)
+        summary = {
+            "highest_risk_departments": describe(self.segments("Department")),
+            "highest_risk_job_roles": describe(self.segments("JobRole")),
+            "risk_band_distribution": ", ".join(f"{band} {100 * count / total:.1f}%" for band, count in bands.items()),
+        }
+        if self.meta.get("previous_built_at"):
+            up = self.crossers("up", n=max_segments)
+            roles = self.segments("JobRole")
+            roles = roles[roles["crossed_up"] > 0].sort_values("crossed_up", ascending=False)
+            summary["crossed_threshold_since_last_run"] = (
+                f"{len(self.crossed_up):,} became high risk, {len(self.crossed_down):,} dropped below "
+                f"the {self.threshold:.0%} threshold"
+                + (f" (most in {', '.join(f'{name} ({count})' for name, count in roles['crossed_up'].head(3).items())})" if len(roles) else "")
+            )
+            if len(up):
+                summary["newly_high_risk_examples"] = ", ".join(
+                    f"{row.employee_id} ({row.JobRole}, {row.previous_probability:.0%} -> {row.probability:.0%})"
+                    for row in up.itertuples()
+                )
+        if self.meta.get("removed_rows"):
+            summary["left_since_last_run"] = f"{self.meta['removed_rows']:,} employees no longer in the scored population"
+        return summary
+
+
+def update_index(
+    employee_ids,
+    probabilities,
+    departments=None,
+    job_roles=None,
+    threshold: float = 0.3,
+    path: str = RISK_INDEX_PATH,
+    model_version: Optional[str] = None,
+    full_population: bool = False,
+) -> RiskIndex:
+    """Upsert one run's scores into the index at ``path`` and save it (see ``RiskIndex.build``).
+
+    With ``full_population`` the run replaces the index: employees it did not
+    score are removed (the previous scores still feed ``crossers``).
+    """
+    previous = None
+    if os.path.exists(os.path.join(path, "meta.json")):
+        previous = RiskIndex.load(path)
+        if previous.meta.get("format_version") != FORMAT_VERSION:
+            previous = None
+    index = RiskIndex.build(
+        employee_ids, probabilities, departments, job_roles,
+        threshold=threshold, previous=previous, model_version=model_version, full_population=full_population,
+    )
+    index.save(path)
+    return RiskIndex.load(path)
+
+
+class RiskIndexBuilder:
+    """Collect scored chunks of a streaming run, then ``update_index`` once at the end."""
+
+    def __init__(self):
+        self._ids: List[np.ndarray] = []
+        self._probabilities: List[np.ndarray] = []
+        self._segments: Dict[str, List[np.ndarray]] = {col: [] for col in SEGMENT_COLUMNS}
+        self._offset = 0
+
+    def add(self, results_df: pd.DataFrame, segments: Optional[Dict[str, Sequence]] = None) -> None:
+        """Add a scored chunk; ``segments`` supplies Department/JobRole when the chunk lacks them."""
+        id_col = next((col for col in ID_COLUMNS if col in results_df.columns), None)
+        n_rows = len(results_df)
+        self._ids.append(results_df[id_col].to_numpy() if id_col else np.arange(self._offset, self._offset + n_rows))
+        self._probabilities.append(results_df["Attrition_Probability"].to_numpy(dtype=np.float32))
+        for col in SEGMENT_COLUMNS:
+            if col in results_df.columns:
+                values = results_df[col].to_numpy(dtype=object)
+            elif segments is not None and col in segments:
+                values = np.asarray(segments[col], dtype=object)
+            else:
+                values = np.full(n_rows, None, dtype=object)
+            self._segments[col].append(values)
+        self._offset += n_rows
+
+    def finish(
+        self,
+        threshold: float,
+        path: str = RISK_INDEX_PATH,
+        model_version: Optional[str] = None,
+        full_population: bool = False,
+    ) -> RiskIndex:
+        def join(parts, dtype=None):
+            return np.concatenate(parts) if parts else np.zeros(0, dtype=dtype)
+
+        return update_index(
+            join(self._ids, np.int64),
+            join(self._probabilities, np.float32),
+            *[join(self._segments[col], object) for col in SEGMENT_COLUMNS],
+            threshold=threshold,
+            path=path,
+            model_version=model_version,
+            full_population=full_population,
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the scored-population risk index.")
+    parser.add_argument("--index", default=RISK_INDEX_PATH, help="Index directory.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    top = commands.add_parser("top", help="Highest-risk employees of a segment.")
+    top.add_argument("-n", type=int, default=50)
+    top.add_argument("--department", default=None)
+    top.add_argument("--job-role", default=None)
+    top.add_argument("--band", choices=RISK_BANDS, default=None)
+    histogram = commands.add_parser("histogram", help="Risk histogram per segment.")
+    histogram.add_argument("--by", choices=["Department", "JobRole", "risk_band"], default="JobRole")
+    segments = commands.add_parser("segments", help="High-risk share and mean risk per segment.")
+    segments.add_argument("--by", choices=["Department", "JobRole", "risk_band"], default="Department")
+    crossers = commands.add_parser("crossers", help="Employees who crossed the threshold since the previous run.")
+    crossers.add_argument("--direction", choices=["up", "down"], default="up")
+    crossers.add_argument("-n", type=int, default=None)
+    commands.add_parser("summary", help="Segment summary passed to the batch report.")
+    args = parser.parse_args(argv)
+
+    index = RiskIndex.load(args.index)
+    print(f"{len(index):,} employees, threshold {index.threshold:.2f}, built {index.meta['built_at']}")
+    pd.set_option("display.width", 200)
+    if args.command == "top":
+        print(index.top(args.n, department=args.department, job_role=args.job_role, band=args.band).to_string(index=False))
+    elif args.command == "histogram":
+        print(index.histogram(args.by).to_string())
+    elif args.command == "segments":
+        print(index.segments(args.by).to_string())
+    elif args.command == "crossers":
+        print(index.crossers(args.direction, args.n).to_string(index=False))
+    else:
+        for key, value in index.summary().items():
+            print(f"   • {key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+"""Synthetic workforces sampled from distributions learned on the raw IBM dataset.
+
+``WorkforceGenerator.fit`` learns, from ``data/raw/WA_Fn-UseC_-HR-Employee-Attrition.csv``:
+
+* the observed (Department, JobRole) pairs and their frequencies, so only valid
+  combinations are generated (e.g. no "Sales Representative" in R&D);
+* the other categorical fields conditional on JobRole;
+* per-JobRole empirical marginals of the numeric fields, joined by a Gaussian
+  copula whose correlation is estimated within roles, so Age, TotalWorkingYears,
+  YearsAtCompany and MonthlyIncome move together as in the real data.
+
+Sampled rows also satisfy ``TotalWorkingYears <= Age - 18`` and
+``YearsAtCompany <= TotalWorkingYears``. Drift can be injected as a numeric
+scale factor or as target category shares, optionally ramped in over the rows.
+``write_workforce`` streams millions of rows to CSV/Parquet in fixed-size
+chunks (memory stays at a few chunks), optionally generated in worker
+processes; the output depends only on the seed and the chunk size.
+
+Usage (via ``data_gen.py``):
+    python data_gen.py --rows 5000000 -o data/workforce_5m.parquet --workers 4
+    python data_gen.py --rows 200000 -o drifted.csv --drift MonthlyIncome=0.8 OverTime:Yes=0.6 --ramp
+"""
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr, ndtri
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RAW_DATA_PATH = os.path.join(BASE_DIR, "data", "raw", "WA_Fn-UseC_-HR-Employee-Attrition.csv")
+DEFAULT_CHUNKSIZE = 100_000
+
+NUMERIC_COLUMNS = [
+    'Age', 'MonthlyIncome', 'TotalWorkingYears', 'YearsAtCompany', 'NumCompaniesWorked',
+    'DistanceFromHome', 'EnvironmentSatisfaction', 'JobSatisfaction', 'WorkLifeBalance',
+]
+# Sampled conditional on JobRole; Department comes with the role
+CONDITIONAL_COLUMNS = ['OverTime', 'Gender', 'BusinessTravel', 'MaritalStatus']
+# The raw input fields the dashboard, batch scoring and the API accept
+INPUT_COLUMNS = NUMERIC_COLUMNS + ['OverTime', 'Gender', 'BusinessTravel', 'Department', 'JobRole', 'MaritalStatus']
+
+# Interpolated between observed values instead of repeating them
+CONTINUOUS_COLUMNS = {'MonthlyIncome'}
+# Ordinal survey scores stay on their scale even under drift
+BOUNDED_COLUMNS = {'EnvironmentSatisfaction': (1, 4), 'JobSatisfaction': (1, 4), 'WorkLifeBalance': (1, 4)}
+MIN_WORKING_AGE = 18
+# Pseudo-count added to each category of the per-role conditional tables
+SMOOTHING = 0.5
+
+# Drift spec: numeric column -> scale factor, categorical column -> {category: target share}
+DriftSpec = Dict[str, Union[float, Dict[str, float]]]
+
+
+def _draw(rng: np.random.Generator, probabilities: np.ndarray) -> np.ndarray:
+    """One category index per row of ``probabilities`` (rows sum to 1)."""
+    cumulative = probabilities.cumsum(axis=1)
+    draws = (rng.random(len(probabilities))[:, None] > cumulative).sum(axis=1)
+    return np.minimum(draws, probabilities.shape[1] - 1)
+
+
+class WorkforceGenerator:
+    """Fitted joint distribution of the raw input fields; see the module docstring.
+
+    Build with ``WorkforceGenerator.fit()``; the instance is small and picklable.
+    """
+
+    def __init__(self, roles: List[str], departments: List[str], pair_counts: np.ndarray,
+                 vocabularies: Dict[str, List[str]], conditionals: Dict[str, np.ndarray],
+                 marginals: List[List[np.ndarray]], correlation: np.ndarray):
+        self.roles = roles
+        self.departments = departments
+        # pair_counts[d, r]: employees with department d and role r
+        self.pair_counts = pair_counts
+        self.vocabularies = vocabularies
+        # conditionals[col][r]: P(category | role r)
+        self.conditionals = conditionals
+        # marginals[role][j]: sorted observed values of NUMERIC_COLUMNS[j] for that role
+        self.marginals = marginals
+        self.correlation = correlation
+        self._cholesky = np.linalg.cholesky(correlation)
+
+    @classmethod
+    def fit(cls, data_path: str = RAW_DATA_PATH) -> "WorkforceGenerator":
+        """Learn the distributions from the raw training CSV."""
+        df = pd.read_csv(data_path, usecols=INPUT_COLUMNS, encoding="utf-8-sig")
+        roles = sorted(df['JobRole'].unique())
+        departments = sorted(df['Department'].unique())
+        role_idx = df['JobRole'].map({role: i for i, role in enumerate(roles)}).to_numpy()
+        dept_idx = df['Department'].map({dept: i for i, dept in enumerate(departments)}).to_numpy()
+        pair_counts = np.zeros((len(departments), len(roles)))
+        np.add.at(pair_counts, (dept_idx, role_idx), 1)
+
+        vocabularies, conditionals = {}, {}
+        for col in CONDITIONAL_COLUMNS:
+            vocabulary = sorted(df[col].unique())
+            codes = df[col].map({value: i for i, value in enumerate(vocabulary)}).to_numpy()
+            counts = np.full((len(roles), len(vocabulary)), SMOOTHING)
+            np.add.at(counts, (role_idx, codes), 1)
+            vocabularies[col] = vocabulary
+            conditionals[col] = counts / counts.sum(axis=1, keepdims=True)
+
+        # Normal scores of the within-role ranks; their pooled correlation is the copula
+        numeric = df[NUMERIC_COLUMNS].to_numpy(dtype=float)
+        scores = np.empty_like(numeric)
+        marginals = []
+        for r in range(len(roles)):
+            rows = role_idx == r
+            group = numeric[rows]
+            marginals.append([np.sort(group[:, j]) for j in range(len(NUMERIC_COLUMNS))])
+            ranks = pd.DataFrame(group).rank(method="average").to_numpy()
+            scores[rows] = ndtri((ranks - 0.5) / len(group))
+        correlation = np.corrcoef(scores, rowvar=False)
+        # Clip tiny negative eigenvalues so the Cholesky factor exists
+        eigenvalues, eigenvectors = np.linalg.eigh(correlation)
+        correlation = eigenvectors @ np.diag(np.maximum(eigenvalues, 1e-6)) @ eigenvectors.T
+        scale = np.sqrt(np.diag(correlation))
+        correlation = correlation / scale[:, None] / scale[None, :]
+
+        return cls(roles, departments, pair_counts, vocabularies, conditionals, marginals, correlation)
+
+    # --- Drift ---
+
+    def _marginal(self, col: str) -> np.ndarray:
+        """Overall category shares of ``col`` in the fitted data."""
+        role_shares = self.pair_counts.sum(axis=0) / self.pair_counts.sum()
+        if col == 'JobRole':
+            return role_shares
+        if col == 'Department':
+            return self.pair_counts.sum(axis=1) / self.pair_counts.sum()
+        return role_shares @ self.conditionals[col]
+
+    def _vocabulary(self, col: str) -> List[str]:
+        if col == 'JobRole':
+            return self.roles
+        if col == 'Department':
+            return self.departments
+        return self.vocabularies[col]
+
+    def drifted_shares(self, col: str, targets: Dict[str, float]) -> np.ndarray:
+        """Category shares of ``col`` with ``targets`` set and the rest rescaled to fill up.
+
+        Raises:
+            ValueError: For unknown categories or target shares that do not fit in [0, 1].
+        """
+        vocabulary = self._vocabulary(col)
+        unknown = set(targets) - set(vocabulary)
+        if unknown:
+            raise ValueError(f"Unknown {col} categories in drift spec: {sorted(unknown)}. Use: {vocabulary}")
+        fixed = sum(targets.values())
+        if any(share < 0 for share in targets.values()) or fixed > 1 + 1e-9:
+            raise ValueError(f"Drift shares for {col} must be >= 0 and sum to at most 1.")
+        base = self._marginal(col).copy()
+        free = np.array([value not in targets for value in vocabulary])
+        base[~free] = 0
+        shares = base / base.sum() * (1 - fixed) if base.sum() > 0 else base
+        for i, value in enumerate(vocabulary):
+            if value in targets:
+                shares[i] = targets[value]
+        return shares / shares.sum()
+
+    def check_drift(self, drift: Optional[DriftSpec]) -> None:
+        """Raise ``ValueError`` if ``drift`` names unknown columns or categories."""
+        for col, spec in (drift or {}).items():
+            if col in NUMERIC_COLUMNS:
+                if isinstance(spec, dict) or float(spec) <= 0:
+                    raise ValueError(f"Drift for numeric column {col} must be a positive scale factor.")
+            elif col in CONDITIONAL_COLUMNS or col in ('Department', 'JobRole'):
+                if not isinstance(spec, dict):
+                    raise ValueError(f"Drift for categorical column {col} must map categories to shares.")
+                self.drifted_shares(col, spec)
+            else:
+                raise ValueError(f"Cannot drift unknown column {col!r}. Use one of: {', '.join(INPUT_COLUMNS)}")
+        if drift and 'Department' in drift and 'JobRole' in drift:
+            raise ValueError("Drift Department or JobRole, not both (the other follows from the valid pairs).")
+
+    # --- Sampling ---
+
+    def sample(self, n_rows: int, rng: Optional[np.random.Generator] = None, start: int = 0,
+               total: Optional[int] = None, drift: Optional[DriftSpec] = None, ramp: bool = False) -> pd.DataFrame:
+        """Sample ``n_rows`` employees in the batch input layout.
+
+        Args:
+            n_rows (int): Number of rows.
+            rng (Optional[np.random.Generator]): Random source (a fresh unseeded one by default).
+            start (int): Global index of the first row (sets ``EmployeeNumber`` and the drift ramp).
+            total (Optional[int]): Rows in the whole workforce, for the drift ramp.
+            drift (Optional[DriftSpec]): Numeric column -> scale factor, or
+                categorical column -> {category: target share}.
+            ramp (bool): Grow the drift linearly from none at row 0 to full at the last row.
+
+        Returns:
+            pd.DataFrame: ``EmployeeNumber`` (start + 1, ...) followed by ``INPUT_COLUMNS``.
+        """
+        rng = rng if rng is not None else np.random.default_rng()
+        drift = drift or {}
+        self.check_drift(drift)
+        index = start + np.arange(n_rows)
+        if drift and ramp:
+            weight = index / max((total or start + n_rows) - 1, 1)
+        else:
+            weight = np.ones(n_rows) if drift else np.zeros(n_rows)
+        drifted = rng.random(n_rows) < weight
+
+        # Valid (Department, JobRole) pairs in their observed proportions
+        pair_shares = (self.pair_counts / self.pair_counts.sum()).ravel()
+        pair = _draw(rng, np.broadcast_to(pair_shares, (n_rows, len(pair_shares))))
+        dept, role = np.divmod(pair, len(self.roles))
+        if drifted.any() and 'Department' in drift:
+            shares = self.drifted_shares('Department', drift['Department'])
+            dept[drifted] = _draw(rng, np.broadcast_to(shares, (drifted.sum(), len(shares))))
+            role_given_dept = self.pair_counts / self.pair_counts.sum(axis=1, keepdims=True)
+            role[drifted] = _draw(rng, role_given_dept[dept[drifted]])
+        elif drifted.any() and 'JobRole' in drift:
+            shares = self.drifted_shares('JobRole', drift['JobRole'])
+            role[drifted] = _draw(rng, np.broadcast_to(shares, (drifted.sum(), len(shares))))
+            dept_given_role = (self.pair_counts / self.pair_counts.sum(axis=0, keepdims=True)).T
+            dept[drifted] = _draw(rng, dept_given_role[role[drifted]])
+
+        columns = {}
+        for col in CONDITIONAL_COLUMNS:
+            codes = _draw(rng, self.conditionals[col][role])
+            if drifted.any() and col in drift:
+                shares = self.drifted_shares(col, drift[col])
+                codes[drifted] = _draw(rng, np.broadcast_to(shares, (drifted.sum(), len(shares))))
+            columns[col] = np.asarray(self.vocabularies[col], dtype=object)[codes]
+
+        # Correlated uniforms from the copula, mapped through each role's marginals
+        uniforms = ndtr(rng.standard_normal((n_rows, len(NUMERIC_COLUMNS))) @ self._cholesky.T)
+        numeric = np.empty_like(uniforms)
+        for r in np.unique(role):
+            rows = role == r
+            for j, col in enumerate(NUMERIC_COLUMNS):
+                observed = self.marginals[r][j]
+                if col in CONTINUOUS_COLUMNS:
+                    positions = (np.arange(len(observed)) + 0.5) / len(observed)
+                    numeric[rows, j] = np.interp(uniforms[rows, j], positions, observed)
+                else:
+                    numeric[rows, j] = observed[np.minimum((uniforms[rows, j] * len(observed)).astype(int), len(observed) - 1)]
+
+        for j, col in enumerate(NUMERIC_COLUMNS):
+            if col in drift:
+                numeric[:, j] *= 1 + (float(drift[col]) - 1) * weight
+        numeric = np.round(numeric)
+        for col, (low, high) in BOUNDED_COLUMNS.items():
+            j = NUMERIC_COLUMNS.index(col)
+            numeric[:, j] = np.clip(numeric[:, j], low, high)
+        numeric = np.maximum(numeric, 0)
+        age, working, at_company = (NUMERIC_COLUMNS.index(col) for col in ('Age', 'TotalWorkingYears', 'YearsAtCompany'))
+        numeric[:, age] = np.maximum(numeric[:, age], MIN_WORKING_AGE)
+        numeric[:, working] = np.minimum(numeric[:, working], numeric[:, age] - MIN_WORKING_AGE)
+        numeric[:, at_company] = np.minimum(numeric[:, at_company], numeric[:, working])
+
+        frame = pd.DataFrame(numeric.astype(np.int64), columns=NUMERIC_COLUMNS)
+        for col in CONDITIONAL_COLUMNS:
+            frame[col] = columns[col]
+        frame['Department'] = np.asarray(self.departments, dtype=object)[dept]
+        frame['JobRole'] = np.asarray(self.roles, dtype=object)[role]
+        frame.insert(0, 'EmployeeNumber', index + 1)
+        return frame[['EmployeeNumber'] + INPUT_COLUMNS]
+
+    def chunk(self, chunk_index: int, n_rows: int, chunksize: int, seed: int = 0,
+              drift: Optional[DriftSpec] = None, ramp: bool = False) -> pd.DataFrame:
+        """Chunk ``chunk_index`` of an ``n_rows`` workforce; depends only on its arguments."""
+        start = chunk_index * chunksize
+        rng = np.random.default_rng([seed, chunk_index])
+        return self.sample(min(chunksize, n_rows - start), rng, start=start, total=n_rows, drift=drift, ramp=ramp)
+
+    def iter_chunks(self, n_rows: int, chunksize: int = DEFAULT_CHUNKSIZE, seed: int = 0,
+                    drift: Optional[DriftSpec] = None, ramp: bool = False) -> Iterator[pd.DataFrame]:
+        """Yield the workforce in ``chunksize`` pieces, in row order."""
+        for chunk_index in range((n_rows + chunksize - 1) // chunksize):
+            yield self.chunk(chunk_index, n_rows, chunksize, seed, drift, ramp)
+
+
+def generate_workforce(n_rows: int, seed: int = 0, drift: Optional[DriftSpec] = None, ramp: bool = False,
+                       chunksize: int = DEFAULT_CHUNKSIZE, data_path: str = RAW_DATA_PATH) -> pd.DataFrame:
+    """In-memory workforce; the same rows ``write_workforce`` streams for these arguments."""
+    generator = WorkforceGenerator.fit(data_path)
+    chunks = list(generator.iter_chunks(n_rows, chunksize, seed, drift, ramp))
+    return pd.concat(chunks, ignore_index=True) if chunks else generator.sample(0)
+
+
+# Per-process generator, set by _init_worker
+_WORKER_GENERATOR = None
+
+
+def _init_worker(generator: WorkforceGenerator) -> None:
+    global _WORKER_GENERATOR
+    _WORKER_GENERATOR = generator
+
+
+def _render_chunk(chunk_index: int, n_rows: int, chunksize: int, seed: int, drift, ramp: bool, as_csv: bool):
+    chunk = _WORKER_GENERATOR.chunk(chunk_index, n_rows, chunksize, seed, drift, ramp)
+    # CSV text is formatted in the worker, the slow part of writing CSV
+    return chunk.to_csv(index=False, header=False) if as_csv else chunk
+
+
+def write_workforce(
+    output_path: str,
+    n_rows: int,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    seed: int = 0,
+    drift: Optional[DriftSpec] = None,
+    ramp: bool = False,
+    workers: int = 1,
+    data_path: str = RAW_DATA_PATH,
+) -> Dict[str, float]:
+    """Stream a synthetic workforce to ``.csv`` or ``.parquet`` with bounded memory.
+
+    Args:
+        output_path (str): Destination file (replaced).
+        n_rows (int): Number of employees.
+        chunksize (int): Rows generated and written at a time.
+        seed (int): Random seed; with ``chunksize`` it fully determines the output.
+        drift (Optional[DriftSpec]): See ``WorkforceGenerator.sample``.
+        ramp (bool): Ramp the drift in over the rows.
+        workers (int): Generator processes; 1 generates in this process.
+        data_path (str): Raw training CSV to learn from.
+
+    Returns:
+        Dict[str, float]: ``rows``, ``chunks``, ``elapsed_s`` and ``rows_per_s``.
+    """
+    from src.batch_score import ResultWriter
+
+    start = time.perf_counter()
+    generator = WorkforceGenerator.fit(data_path)
+    generator.check_drift(drift)
+    n_chunks = (n_rows + chunksize - 1) // chunksize
+    tasks = [(i, n_rows, chunksize, seed, drift, ramp) for i in range(n_chunks)]
+
+    with ResultWriter(output_path) as writer:
+        as_csv = writer.format == "csv"
+        if as_csv:
+            with open(output_path, "w", newline="") as f:
+                f.write(",".join(['EmployeeNumber'] + INPUT_COLUMNS) + "\n")
+
+        def emit(chunk) -> None:
+            if as_csv:
+                with open(output_path, "a", newline="") as f:
+                    f.write(chunk)
+            else:
+                writer.write(chunk)
+
+        if workers <= 1:
+            _init_worker(generator)
+            for task in tasks:
+                emit(_render_chunk(*task, as_csv))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(generator,)) as pool:
+                # At most 2 chunks per worker in flight, written in order
+                pending = deque()
+                for task in tasks:
+                    pending.append(pool.submit(_render_chunk, *task, as_csv))
+                    if len(pending) >= 2 * workers:
+                        emit(pending.popleft().result())
+                while pending:
+                    emit(pending.popleft().result())
+
+    elapsed = time.perf_counter() - start
+    return {"rows": n_rows, "chunks": n_chunks, "elapsed_s": round(elapsed, 3),
+            "rows_per_s": round(n_rows / elapsed, 1) if elapsed > 0 else 0.0}
+
+
+def parse_drift(items: List[str]) -> DriftSpec:
+    """Parse CLI drift items: ``Column=factor`` or ``Column:Category=share``."""
+    drift: DriftSpec = {}
+    for item in items or []:
+        key, _, value = item.partition("=")
+        if not value:
+            raise ValueError(f"Bad drift item {item!r}; use Column=factor or Column:Category=share")
+        if ":" in key:
+            col, category = key.split(":", 1)
+            drift.setdefault(col, {})[category] = float(value)
+        else:
+            drift[key] = float(value)
+    return drift
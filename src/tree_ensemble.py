@@ -0,0 +1,185 @@
+import json
+import os
+import numpy as np
+
+# Define the path to the native booster saved by src/model.py
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+JSON_MODEL_PATH = os.path.join(BASE_DIR, "models", "xgboost_model.json")
+
+# Objectives whose base_score is stored as a probability and must be mapped to log-odds
+LOGISTIC_OBJECTIVES = ("binary:logistic", "reg:logistic")
+
+
+class TreeEnsemble:
+    """Flat NumPy view of an XGBoost booster saved as JSON.
+
+    Each tree keeps the arrays XGBoost itself writes (split feature, split
+    condition, child pointers, default direction); leaves store their value in
+    ``split_conditions``. A row goes left when ``value < split_condition`` and
+    follows ``default_left`` when the value is missing.
+
+    The trees are also concatenated into one set of node arrays in which leaves
+    point to themselves, so a row is scored by ``max_depth`` vectorized steps
+    over all trees at once. This makes the ensemble a drop-in ``predict_proba``
+    model with no DMatrix or DataFrame on the hot path.
+    """
+
+    def __init__(self, trees, feature_names, base_margin, objective):
+        self.trees = trees
+        self.feature_names = list(feature_names)
+        self.base_margin = float(base_margin)
+        self.objective = objective
+        self._compile()
+
+    def _compile(self) -> None:
+        features, thresholds, lefts, rights, default_lefts, values, roots = [], [], [], [], [], [], []
+        offset, max_depth = 0, 0
+        for tree in self.trees:
+            n_nodes = len(tree["left"])
+            is_leaf = tree["left"] == -1
+            node_ids = np.arange(n_nodes, dtype=np.int32)
+            roots.append(offset)
+            features.append(np.where(is_leaf, 0, tree["feature"]))
+            thresholds.append(tree["threshold"])
+            lefts.append(np.where(is_leaf, node_ids, tree["left"]) + offset)
+            rights.append(np.where(is_leaf, node_ids, tree["right"]) + offset)
+            default_lefts.append(tree["default_left"])
+            values.append(np.where(is_leaf, tree["threshold"], 0.0))
+            max_depth = max(max_depth, _tree_depth(tree))
+            offset += n_nodes
+
+        self.node_feature = np.concatenate(features).astype(np.intp)
+        self.node_threshold = np.concatenate(thresholds).astype(np.float32)
+        self.node_left = np.concatenate(lefts).astype(np.intp)
+        self.node_right = np.concatenate(rights).astype(np.intp)
+        self.node_default_left = np.concatenate(default_lefts)
+        self.node_value = np.concatenate(values).astype(np.float64)
+        self.roots = np.asarray(roots, dtype=np.intp)
+        self.max_depth = max_depth
+
+    @classmethod
+    def from_json(cls, model_path: str = JSON_MODEL_PATH):
+        """Parse a booster JSON file (as written by ``Booster.save_model``)."""
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f" Booster file not found at: {model_path}. Please run the training script first.")
+
+        with open(model_path, "r", encoding="utf-8") as f:
+            learner = json.load(f)["learner"]
+
+        objective = learner["objective"]["name"]
+        # XGBoost >= 3.1 writes base_score as a vector string, e.g. "[6.311357E-1]"
+        base_score = float(str(learner["learner_model_param"]["base_score"]).strip("[]"))
+        if objective in LOGISTIC_OBJECTIVES:
+            base_margin = np.log(base_score / (1.0 - base_score))
+        else:
+            base_margin = base_score
+
+        trees = []
+        for tree in learner["gradient_booster"]["model"]["trees"]:
+            trees.append({
+                "left": np.asarray(tree["left_children"], dtype=np.int32),
+                "right": np.asarray(tree["right_children"], dtype=np.int32),
+                "feature": np.asarray(tree["split_indices"], dtype=np.int32),
+                "threshold": np.asarray(tree["split_conditions"], dtype=np.float32),
+                "default_left": np.asarray(tree["default_left"], dtype=bool),
+            })
+
+        return cls(trees, learner.get("feature_names", []), base_margin, objective)
+
+    def predict_margin(self, input_data) -> np.ndarray:
+        """Raw (log-odds) scores for a 2-D feature matrix or DataFrame."""
+        if hasattr(input_data, "columns"):
+            if list(input_data.columns) != self.feature_names:
+                input_data = input_data[self.feature_names]
+            input_data = input_data.to_numpy()
+        rows = np.asarray(input_data, dtype=np.float32)
+        if rows.ndim == 1:
+            rows = rows[None, :]
+
+        row_index = np.arange(len(rows))[:, None]
+        node = np.broadcast_to(self.roots, (len(rows), len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            value = rows[row_index, self.node_feature[node]]
+            go_left = np.where(np.isnan(value), self.node_default_left[node], value < self.node_threshold[node])
+            node = np.where(go_left, self.node_left[node], self.node_right[node])
+        return self.base_margin + self.node_value[node].sum(axis=1)
+
+    def predict_proba(self, input_data) -> np.ndarray:
+        """Class probabilities [[P(No), P(Yes)], ...], like the sklearn wrapper."""
+        positive = self._link(self.predict_margin(input_data))
+        return np.column_stack([1.0 - positive, positive])
+
+    def predict_proba_row(self, row: np.ndarray) -> float:
+        """Attrition probability for one encoded row given as a 1-D array in feature order."""
+        x = np.asarray(row, dtype=np.float32)
+        node = self.roots
+        for _ in range(self.max_depth):
+            value = x[self.node_feature[node]]
+            go_left = value < self.node_threshold[node]
+            missing = np.isnan(value)
+            if missing.any():
+                go_left = np.where(missing, self.node_default_left[node], go_left)
+            node = np.where(go_left, self.node_left[node], self.node_right[node])
+        return float(self._link(self.base_margin + self.node_value[node].sum()))
+
+    def _link(self, margin):
+        if self.objective in LOGISTIC_OBJECTIVES:
+            return 1.0 / (1.0 + np.exp(-margin))
+        return margin
+
+    def leaf_paths(self):
+        """Enumerate every root-to-leaf path, padded to the deepest tree.
+
+        Returns:
+            dict: Arrays of shape (n_leaves, max_depth) for ``feature``, ``threshold``,
+            ``go_left``, ``default_left`` and ``valid`` (False for padding), plus
+            ``value`` of shape (n_leaves,) holding each leaf's output.
+        """
+        paths, values = [], []
+        for tree in self.trees:
+            # Depth-first walk, carrying the (node, went_left) steps taken so far
+            stack = [(0, [])]
+            while stack:
+                node, steps = stack.pop()
+                left, right = tree["left"][node], tree["right"][node]
+                if left == -1:
+                    paths.append(steps)
+                    values.append(tree["threshold"][node])
+                    continue
+                stack.append((right, steps + [(node, False)]))
+                stack.append((left, steps + [(node, True)]))
+
+        max_depth = max(1, max(len(p) for p in paths))
+        n_leaves = len(paths)
+        out = {
+            "feature": np.zeros((n_leaves, max_depth), dtype=np.int32),
+            "threshold": np.zeros((n_leaves, max_depth), dtype=np.float32),
+            "go_left": np.zeros((n_leaves, max_depth), dtype=bool),
+            "default_left": np.zeros((n_leaves, max_depth), dtype=bool),
+            "valid": np.zeros((n_leaves, max_depth), dtype=bool),
+            "value": np.asarray(values, dtype=np.float64),
+        }
+
+        # Walk the same trees again to resolve node ids to split arrays
+        leaf = 0
+        for tree in self.trees:
+            n_tree_leaves = int(np.sum(tree["left"] == -1))
+            for steps in paths[leaf:leaf + n_tree_leaves]:
+                for depth, (node, went_left) in enumerate(steps):
+                    out["feature"][leaf, depth] = tree["feature"][node]
+                    out["threshold"][leaf, depth] = tree["threshold"][node]
+                    out["go_left"][leaf, depth] = went_left
+                    out["default_left"][leaf, depth] = tree["default_left"][node]
+                    out["valid"][leaf, depth] = True
+                leaf += 1
+
+        return out
+
+
+def _tree_depth(tree) -> int:
+    depth, frontier = 0, [0]
+    while True:
+        frontier = [child for node in frontier for child in (tree["left"][node], tree["right"][node]) if child != -1]
+        if not frontier:
+            return depth
+        depth += 1
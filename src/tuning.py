@@ -0,0 +1,281 @@
+"""Cross-validated, parallel hyperparameter and threshold search.
+
+Trials (one XGBoost configuration each) run in a process pool. Every worker
+reads the training split from the memory-mapped feature store once in its
+initializer, so the data is never pickled with a task, and gets ``cpu_count // workers`` XGBoost threads so
+the pool does not oversubscribe the cores. Inside a trial each stratified fold
+trains with early stopping on its validation fold; after every fold the
+running PR-AUC is compared with the median of completed trials at the same
+fold and the trial is pruned if it falls behind.
+
+The best trial is refit on the training split with the averaged early-stopping
+round count; its decision threshold is tuned on the out-of-fold probabilities
+(maximum F-beta, recall-weighted by default) and checked on the same holdout
+split ``src.model`` reports on. Run from the repository root:
+
+    python -m src.model --search --trials 40 --workers 8
+"""
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.metrics import average_precision_score, fbeta_score, log_loss, precision_score, recall_score, roc_auc_score
+from sklearn.model_selection import StratifiedKFold, train_test_split
+
+from src.feature_store import open_training_store
+from src.model import DEFAULT_THRESHOLD, MODEL_PARAMS, save_model
+
+MAX_ESTIMATORS = 1000
+EARLY_STOPPING_ROUNDS = 50
+THRESHOLD_GRID = np.round(np.arange(0.05, 0.951, 0.01), 2)
+# Completed trials needed before pruning starts
+PRUNE_STARTUP_TRIALS = 5
+
+# Per-process training data, set by _init_worker
+_WORKER_DATA = None
+
+
+def sample_trials(n_trials: int, seed: int = 42) -> List[Dict[str, object]]:
+    """Random search around ``MODEL_PARAMS``; trial 0 is the current configuration."""
+    rng = np.random.RandomState(seed)
+    trials = [{key: MODEL_PARAMS[key] for key in (
+        "learning_rate", "max_depth", "min_child_weight", "gamma", "subsample", "colsample_bytree", "scale_pos_weight"
+    )}]
+    for _ in range(n_trials - 1):
+        trials.append({
+            "learning_rate": float(np.exp(rng.uniform(np.log(0.01), np.log(0.3)))),
+            "max_depth": int(rng.choice([2, 3, 4, 5, 6])),
+            "min_child_weight": int(rng.choice([1, 2, 4, 8])),
+            "gamma": float(rng.choice([0.0, 0.1, 0.2, 0.5, 1.0])),
+            "subsample": float(rng.uniform(0.6, 1.0)),
+            "colsample_bytree": float(rng.uniform(0.5, 1.0)),
+            "scale_pos_weight": float(rng.choice([1, 3, 5, 9, 15])),
+            "reg_lambda": float(np.exp(rng.uniform(np.log(0.5), np.log(10.0)))),
+        })
+    return trials[:n_trials]
+
+
+def best_threshold(y_true: np.ndarray, probabilities: np.ndarray, beta: float = 2.0) -> float:
+    """Threshold on ``THRESHOLD_GRID`` with the highest F-beta (ties go to the lower threshold)."""
+    scores = [fbeta_score(y_true, probabilities >= t, beta=beta, zero_division=0) for t in THRESHOLD_GRID]
+    return float(THRESHOLD_GRID[int(np.argmax(scores))])
+
+
+def split_training_store(test_size: float = 0.2, random_state: int = 42):
+    """Row indices of the train and holdout splits (same split as ``src.model``)."""
+    store = open_training_store()
+    y = store.labels().astype(int)
+    train_rows, test_rows = train_test_split(
+        np.arange(len(store)), test_size=test_size, random_state=random_state, stratify=y
+    )
+    return store, train_rows, test_rows
+
+
+def _init_worker(train_rows: np.ndarray, n_splits: int, seed: int) -> None:
+    global _WORKER_DATA
+    store = open_training_store()
+    X = store.frame().iloc[train_rows].reset_index(drop=True)
+    y = store.labels()[train_rows].astype(int)
+    folds = list(StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=seed).split(X, y))
+    _WORKER_DATA = (X, y, folds)
+
+
+def _run_trial(trial_id: int, params: Dict[str, object], nthread: int, prune_medians: Optional[List[float]], beta: float):
+    X, y, folds = _WORKER_DATA
+    start = time.perf_counter()
+    oof = np.full(len(y), np.nan)
+    fold_pr_auc, fold_roc_auc, fold_logloss, best_iterations = [], [], [], []
+    status = "complete"
+
+    for k, (fit_idx, val_idx) in enumerate(folds):
+        model = xgb.XGBClassifier(**{
+            **MODEL_PARAMS,
+            **params,
+            "n_estimators": MAX_ESTIMATORS,
+            "early_stopping_rounds": EARLY_STOPPING_ROUNDS,
+            "n_jobs": nthread,
+        })
+        model.fit(X.iloc[fit_idx], y[fit_idx], eval_set=[(X.iloc[val_idx], y[val_idx])], verbose=False)
+        probabilities = model.predict_proba(X.iloc[val_idx])[:, 1]
+        oof[val_idx] = probabilities
+        fold_pr_auc.append(average_precision_score(y[val_idx], probabilities))
+        fold_roc_auc.append(roc_auc_score(y[val_idx], probabilities))
+        fold_logloss.append(log_loss(y[val_idx], probabilities))
+        best_iterations.append(model.best_iteration + 1)
+
+        # Median pruning: stop once the running mean trails the other trials at this fold
+        if prune_medians is not None and k < len(folds) - 1 and np.mean(fold_pr_auc) < prune_medians[k]:
+            status = "pruned"
+            break
+
+    result = {
+        "trial": trial_id,
+        "status": status,
+        "params": params,
+        "folds_run": len(fold_pr_auc),
+        "running_pr_auc": list(np.cumsum(fold_pr_auc) / np.arange(1, len(fold_pr_auc) + 1)),
+        "cv_pr_auc": float(np.mean(fold_pr_auc)),
+        "cv_pr_auc_std": float(np.std(fold_pr_auc)),
+        "cv_roc_auc": float(np.mean(fold_roc_auc)),
+        "cv_logloss": float(np.mean(fold_logloss)),
+        "n_estimators": int(round(np.mean(best_iterations))),
+        "elapsed_s": time.perf_counter() - start,
+        "worker_pid": os.getpid(),
+    }
+    if status == "complete":
+        threshold = best_threshold(y, oof, beta)
+        predicted = oof >= threshold
+        result.update({
+            "threshold": threshold,
+            "cv_recall": float(recall_score(y, predicted)),
+            "cv_precision": float(precision_score(y, predicted, zero_division=0)),
+            "cv_fbeta": float(fbeta_score(y, predicted, beta=beta)),
+        })
+    return result
+
+
+class HyperparameterSearch:
+    """Run trials across a process pool with median pruning.
+
+    Args:
+        n_splits (int): Stratified CV folds per trial.
+        workers (int): Worker processes (concurrent trials).
+        beta (float): F-beta used to tune the threshold (2 favours recall, like the 0.30 default).
+        seed (int): Seed for the trial sampler and the fold assignment.
+        prune (bool): Enable median pruning.
+    """
+
+    def __init__(self, n_splits: int = 5, workers: int = 1, beta: float = 2.0, seed: int = 42, prune: bool = True):
+        self.n_splits = n_splits
+        self.workers = max(1, int(workers))
+        self.beta = beta
+        self.seed = seed
+        self.prune = prune
+        # Split the cores between workers so XGBoost threads do not oversubscribe
+        self.nthread = max(1, (os.cpu_count() or 1) // self.workers)
+        self.results: List[Dict[str, object]] = []
+
+    def _prune_medians(self) -> Optional[List[float]]:
+        completed = [r["running_pr_auc"] for r in self.results if r["status"] == "complete"]
+        if not self.prune or len(completed) < PRUNE_STARTUP_TRIALS:
+            return None
+        return list(np.median(np.array(completed), axis=0))
+
+    def run(self, trials: List[Dict[str, object]], train_rows: np.ndarray) -> pd.DataFrame:
+        """Evaluate ``trials`` on the ``train_rows`` of the training store.
+
+        Returns:
+            pd.DataFrame: One row per trial, best (highest CV PR-AUC) first.
+        """
+        self.results = []
+        queue = list(enumerate(trials))
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(train_rows, self.n_splits, self.seed),
+        ) as pool:
+            pending = set()
+            while queue or pending:
+                # Submit lazily so later trials are pruned against more completed ones
+                while queue and len(pending) < self.workers:
+                    trial_id, params = queue.pop(0)
+                    pending.add(pool.submit(_run_trial, trial_id, params, self.nthread, self._prune_medians(), self.beta))
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    self.results.append(result)
+                    print(
+                        f"   trial {result['trial']:>3} {result['status']:>8} after {result['folds_run']} folds: "
+                        f"PR-AUC {result['cv_pr_auc']:.4f} ({result['elapsed_s']:.1f}s)"
+                    )
+        return self.leaderboard()
+
+    def leaderboard(self) -> pd.DataFrame:
+        if not self.results:
+            return pd.DataFrame()
+        board = pd.DataFrame(self.results).drop(columns=["running_pr_auc"])
+        board["complete"] = board["status"] == "complete"
+        board = board.sort_values(["complete", "cv_pr_auc"], ascending=[False, False]).drop(columns=["complete"])
+        return board.reset_index(drop=True)
+
+
+def tune_and_save_model(
+    n_trials: int = 40,
+    n_splits: int = 5,
+    workers: int = 1,
+    beta: float = 2.0,
+    seed: int = 42,
+    prune: bool = True,
+    save: bool = True,
+) -> Dict[str, object]:
+    """Search, refit the best configuration and save it like ``train_and_save_model``.
+
+    Besides the usual entries, ``artifacts.pkl`` gets ``params``, ``cv_metrics``
+    (the winning trial's CV and holdout figures) and ``search`` (the leaderboard).
+
+    Returns:
+        Dict[str, object]: The saved ``cv_metrics``.
+    """
+    store, train_rows, test_rows = split_training_store()
+    print(f"Searching {n_trials} trials x {n_splits} folds on {len(train_rows)} rows with {workers} workers...")
+    start = time.perf_counter()
+    search = HyperparameterSearch(n_splits=n_splits, workers=workers, beta=beta, seed=seed, prune=prune)
+    board = search.run(sample_trials(n_trials, seed), train_rows)
+    search_s = time.perf_counter() - start
+    best = board.iloc[0]
+
+    # Refit on the whole training split with the averaged early-stopping round count
+    X = store.frame()
+    y = store.labels().astype(int)
+    model = xgb.XGBClassifier(**{**MODEL_PARAMS, **best["params"], "n_estimators": int(best["n_estimators"])})
+    model.fit(X.iloc[train_rows], y[train_rows])
+
+    threshold = float(best["threshold"])
+    holdout_probabilities = model.predict_proba(X.iloc[test_rows])[:, 1]
+    holdout_predicted = holdout_probabilities >= threshold
+    cv_metrics = {
+        "n_splits": n_splits,
+        "beta": beta,
+        "cv_pr_auc": float(best["cv_pr_auc"]),
+        "cv_pr_auc_std": float(best["cv_pr_auc_std"]),
+        "cv_roc_auc": float(best["cv_roc_auc"]),
+        "cv_logloss": float(best["cv_logloss"]),
+        "cv_recall": float(best["cv_recall"]),
+        "cv_precision": float(best["cv_precision"]),
+        "cv_fbeta": float(best["cv_fbeta"]),
+        "holdout_recall": float(recall_score(y[test_rows], holdout_predicted)),
+        "holdout_precision": float(precision_score(y[test_rows], holdout_predicted, zero_division=0)),
+        "holdout_pr_auc": float(average_precision_score(y[test_rows], holdout_probabilities)),
+        "search_wall_s": round(search_s, 2),
+        "workers": search.workers,
+        "trials": n_trials,
+        "trials_pruned": int((board["status"] == "pruned").sum()),
+    }
+
+    print("\n" + "="*40)
+    print(f"Best trial {best['trial']} (threshold {threshold:.2f}, default {DEFAULT_THRESHOLD:.2f})")
+    print("="*40)
+    for key, value in best["params"].items():
+        print(f"   • {key}: {value}")
+    print(f"   • n_estimators: {int(best['n_estimators'])}")
+    print(f"CV PR-AUC {cv_metrics['cv_pr_auc']:.4f} ± {cv_metrics['cv_pr_auc_std']:.4f}, "
+          f"recall {cv_metrics['cv_recall']:.2%}, precision {cv_metrics['cv_precision']:.2%}")
+    print(f"Holdout recall {cv_metrics['holdout_recall']:.2%}, precision {cv_metrics['holdout_precision']:.2%}")
+    print(f"Search took {search_s:.1f}s ({cv_metrics['trials_pruned']} of {n_trials} trials pruned)")
+
+    if save:
+        save_model(
+            model,
+            X.columns.tolist(),
+            threshold,
+            notes=f"hyperparameter search: best of {n_trials} trials",
+            pipeline=store.pipeline,
+            params={**best["params"], "n_estimators": int(best["n_estimators"])},
+            cv_metrics=cv_metrics,
+            search=board,
+        )
+    return cv_metrics
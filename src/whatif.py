@@ -0,0 +1,248 @@
+"""Pre-scored what-if grids for one employee profile.
+
+``WhatIfSurface.build`` varies one or two input fields of a base profile over a
+grid (e.g. MonthlyIncome x OverTime), encodes every grid point with the
+model's ``FeaturePipeline`` and scores them all in a single ``predict_proba`` call.
+The dashboard's what-if sliders then read probabilities from the surface
+instead of re-running the model, and ``minimum_change`` reports the smallest
+move that brings the employee below the decision threshold.
+
+Missing profile values (``None``/NaN) take the pipeline's default, as in
+scoring. A varied categorical field must hold one of the model's categories.
+"""
+import itertools
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src import metrics
+from src.data_processing import CATEGORICAL_DEFAULTS, get_pipeline, preprocess_batch
+from src.feature_pipeline import FeaturePipeline
+
+# (min, max, step) of each numeric field; matches the dashboard sliders
+NUMERIC_RANGES = {
+    'Age': (18, 60, 1),
+    'MonthlyIncome': (1000, 20000, 250),
+    'TotalWorkingYears': (0, 40, 1),
+    'YearsAtCompany': (0, 20, 1),
+    'NumCompaniesWorked': (0, 10, 1),
+    'DistanceFromHome': (1, 29, 1),
+    'EnvironmentSatisfaction': (1, 4, 1),
+    'JobSatisfaction': (1, 4, 1),
+    'WorkLifeBalance': (1, 4, 1),
+}
+
+WHATIF_FEATURES = list(NUMERIC_RANGES) + list(CATEGORICAL_DEFAULTS)
+
+
+def feature_grid(feature: str, points: Optional[int] = None, pipeline: Optional[FeaturePipeline] = None) -> List[object]:
+    """Values a feature takes on the grid: every category, or its numeric range.
+
+    Args:
+        feature (str): Input field (see ``WHATIF_FEATURES``).
+        points (Optional[int]): Number of evenly spaced numeric values; by default
+            every slider step.
+        pipeline (Optional[FeaturePipeline]): Source of the category vocabularies;
+            defaults to the serving pipeline.
+    """
+    pipeline = pipeline or get_pipeline()
+    if pipeline.is_categorical(feature):
+        return list(pipeline.vocabularies[feature])
+    if feature not in NUMERIC_RANGES:
+        raise ValueError(f"Unknown what-if feature {feature!r}. Use one of: {', '.join(WHATIF_FEATURES)}")
+    low, high, step = NUMERIC_RANGES[feature]
+    if points is None:
+        values = np.arange(low, high + step, step)
+    else:
+        values = np.unique(np.round(np.linspace(low, high, points) / step) * step)
+    return [int(v) if float(v).is_integer() else float(v) for v in values]
+
+
+def _is_missing(value) -> bool:
+    return value is None or (isinstance(value, float) and np.isnan(value))
+
+
+class WhatIfSurface:
+    """Attrition probability over a grid of one or two features, all else fixed at the base profile.
+
+    Args:
+        base_profile (Dict): The employee's raw input fields (missing values are dropped).
+        features (List[str]): The varied features (one or two).
+        grids (List[list]): Grid values of each feature.
+        probabilities (np.ndarray): Scores with one axis per feature.
+        threshold (float): Decision threshold used by ``minimum_change``.
+        pipeline (Optional[FeaturePipeline]): Encoding the grid was scored with
+            (supplies the values of omitted fields); defaults to the serving pipeline.
+    """
+
+    def __init__(
+        self,
+        base_profile: Dict,
+        features: List[str],
+        grids: List[list],
+        probabilities: np.ndarray,
+        threshold: float,
+        pipeline: Optional[FeaturePipeline] = None,
+    ):
+        self.base_profile = {field: value for field, value in base_profile.items() if not _is_missing(value)}
+        self.features = list(features)
+        self.grids = grids
+        self.probabilities = probabilities
+        self.threshold = threshold
+        self.pipeline = pipeline or get_pipeline()
+
+    @classmethod
+    def build(
+        cls,
+        model,
+        base_profile: Dict,
+        features: Sequence[str],
+        threshold: float,
+        grids: Optional[Sequence[list]] = None,
+        points: Optional[int] = None,
+        pipeline: Optional[FeaturePipeline] = None,
+    ) -> "WhatIfSurface":
+        """Score the full grid in one ``predict_proba`` call.
+
+        Args:
+            model: Any model exposing ``predict_proba`` (e.g. ``load_serving_model()``).
+            base_profile (Dict): The employee's raw input fields.
+            features (Sequence[str]): One or two features to vary.
+            threshold (float): Decision threshold.
+            grids (Optional[Sequence[list]]): Explicit values per feature; defaults to ``feature_grid``.
+            points (Optional[int]): Numeric grid resolution when ``grids`` is omitted.
+            pipeline (Optional[FeaturePipeline]): The model's encoding (e.g.
+                ``ServingModel.pipeline``); defaults to the serving pipeline.
+
+        Raises:
+            ValueError: A varied categorical field's base value is not one of its categories.
+        """
+        pipeline = pipeline or get_pipeline()
+        base_profile = {field: value for field, value in base_profile.items() if not _is_missing(value)}
+        features = list(features)
+        if not 1 <= len(features) <= 2 or len(set(features)) != len(features):
+            raise ValueError("Choose one or two different features.")
+        if grids is None:
+            grids = []
+            for feature in features:
+                grid = feature_grid(feature, points, pipeline)
+                # Include the employee's own value so the base point is scored exactly
+                base = base_profile.get(feature, pipeline.default(feature))
+                if feature in NUMERIC_RANGES:
+                    base = float(base)
+                    base = int(base) if base.is_integer() else base
+                    if base not in grid:
+                        grid = sorted(grid + [base])
+                grids.append(grid)
+        grids = [list(g) for g in grids]
+        for feature, grid in zip(features, grids):
+            base = base_profile.get(feature, pipeline.default(feature))
+            if pipeline.is_categorical(feature) and base not in grid:
+                raise ValueError(f"Unknown {feature} {base!r}. Use one of: {', '.join(map(str, grid))}")
+
+        with metrics.timer("whatif_build"):
+            shape = tuple(len(g) for g in grids)
+            n_points = int(np.prod(shape))
+            # Base profile repeated once per grid point, varied columns overwritten (C order)
+            input_columns = set(pipeline.input_columns)
+            columns = {
+                field: np.repeat(np.asarray([value], dtype=object if isinstance(value, str) else None), n_points)
+                for field, value in base_profile.items() if field in input_columns
+            }
+            mesh = np.meshgrid(*[np.asarray(g, dtype=object) for g in grids], indexing="ij")
+            for feature, values in zip(features, mesh):
+                column = values.ravel()
+                columns[feature] = column if pipeline.is_categorical(feature) else column.astype(float)
+            encoded, _ = preprocess_batch(pd.DataFrame(columns), pipeline)
+            probabilities = np.asarray(model.predict_proba(encoded)[:, 1], dtype=float).reshape(shape)
+        return cls(base_profile, features, grids, probabilities, threshold, pipeline)
+
+    def base_value(self, feature: str):
+        """The profile's value of ``feature``, or what the pipeline assumes when it is omitted."""
+        if feature in self.base_profile:
+            return self.base_profile[feature]
+        return self.pipeline.default(feature)
+
+    def _index(self, feature_pos: int, value) -> int:
+        grid = self.grids[feature_pos]
+        if self.pipeline.is_categorical(self.features[feature_pos]):
+            if value not in grid:
+                raise ValueError(f"Unknown {self.features[feature_pos]} {value!r}. Use one of: {', '.join(map(str, grid))}")
+            return grid.index(value)
+        return int(np.argmin(np.abs(np.asarray(grid, dtype=float) - float(value))))
+
+    def lookup(self, **values) -> float:
+        """Probability at the grid point nearest to ``values`` (base profile for omitted features)."""
+        index = tuple(
+            self._index(i, values.get(feature, self.base_value(feature)))
+            for i, feature in enumerate(self.features)
+        )
+        return float(self.probabilities[index])
+
+    def base_probability(self) -> float:
+        return self.lookup()
+
+    def to_frame(self) -> pd.DataFrame:
+        """Long format: one row per grid point with the feature values and ``probability``."""
+        rows = itertools.product(*self.grids)
+        frame = pd.DataFrame(list(rows), columns=self.features)
+        frame["probability"] = self.probabilities.ravel()
+        return frame
+
+    def _cost(self, feature_pos: int, value) -> float:
+        # Categorical switch = 1; numeric move = share of the feature's full range
+        feature = self.features[feature_pos]
+        base = self.base_value(feature)
+        if self.pipeline.is_categorical(feature):
+            return 0.0 if value == base else 1.0
+        low, high, _ = NUMERIC_RANGES[feature]
+        return abs(float(value) - float(base)) / (high - low)
+
+    def minimum_change(self) -> pd.DataFrame:
+        """Smallest moves that bring the probability below the threshold.
+
+        One row per varied feature (that feature alone, the other at its base
+        value) plus, for two features, the cheapest joint change. Cost is the
+        numeric move as a share of the feature's range, or 1 for switching a
+        category. Empty if the base is already below the threshold; a row has
+        ``reachable=False`` when no grid point gets there.
+        """
+        if self.base_probability() < self.threshold:
+            return pd.DataFrame(columns=["change", "to", "probability", "cost", "reachable"])
+
+        costs = [np.array([self._cost(i, v) for v in grid]) for i, grid in enumerate(self.grids)]
+        total_cost = costs[0] if len(costs) == 1 else costs[0][:, None] + costs[1][None, :]
+        below = self.probabilities < self.threshold
+        base_index = [self._index(i, self.base_value(feature)) for i, feature in enumerate(self.features)]
+
+        rows = []
+        candidates = [(f"{feature} only", [i]) for i, feature in enumerate(self.features)]
+        if len(self.features) == 2:
+            candidates.append(("joint", [0, 1]))
+        for label, varied in candidates:
+            mask = below.copy()
+            # Hold the features that are not varied at their base value
+            for i in range(len(self.features)):
+                if i not in varied:
+                    keep = np.zeros(len(self.grids[i]), dtype=bool)
+                    keep[base_index[i]] = True
+                    mask &= keep.reshape([-1 if axis == i else 1 for axis in range(len(self.features))])
+            if not mask.any():
+                rows.append({"change": label, "to": None, "probability": None, "cost": None, "reachable": False})
+                continue
+            # Cheapest point, ties broken by the lower probability
+            order = np.lexsort((self.probabilities[mask], total_cost[mask]))
+            index = tuple(axis[order[0]] for axis in np.nonzero(mask))
+            rows.append({
+                "change": label,
+                "to": {self.features[i]: _plain(self.grids[i][index[i]]) for i in varied},
+                "probability": float(self.probabilities[index]),
+                "cost": round(float(total_cost[index]), 4),
+                "reachable": True,
+            })
+        return pd.DataFrame(rows)
+
+
+def _plain(value):
+    return value.item() if isinstance(value, np.generic) else value
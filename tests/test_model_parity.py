@@ -0,0 +1,135 @@
+"""Correctness checks behind the fast paths that replace library calls.
+
+The benchmarks time these paths; the tests here pin the results they must
+reproduce, so a refactor cannot silently change them.
+
+Run from the repository root:
+    python -m pytest tests
+"""
+import math
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+import pytest
+import xgboost as xgb
+
+from src.data_loader import load_data, preprocess_data
+from src.explainability import DATA_PATH, TreeShapEngine
+from src.feature_pipeline import DROP_COLUMNS, TARGET_COLUMN, FeaturePipeline
+from src.inference import JSON_MODEL_PATH
+from src.tree_ensemble import TreeEnsemble
+
+
+@pytest.fixture(scope="module")
+def training_features():
+    X, _, _ = preprocess_data(load_data(DATA_PATH))
+    return X
+
+
+# --- TreeShapEngine ---
+
+def brute_force_shap(ensemble, x, background):
+    """Interventional Shapley values of the margin by enumerating every coalition."""
+    n_features = len(x)
+    value = {}
+    for size in range(n_features + 1):
+        for coalition in combinations(range(n_features), size):
+            mixed = background.copy()
+            mixed[:, list(coalition)] = x[list(coalition)]
+            value[coalition] = ensemble.predict_margin(mixed).mean()
+
+    phi = np.zeros(n_features)
+    for coalition, v in value.items():
+        for i in range(n_features):
+            if i in coalition:
+                continue
+            weight = math.factorial(len(coalition)) * math.factorial(n_features - len(coalition) - 1)
+            phi[i] += weight / math.factorial(n_features) * (value[tuple(sorted(coalition + (i,)))] - v)
+    return phi
+
+
+@pytest.mark.parametrize("n_background", [5, 50])
+def test_tree_shap_matches_brute_force(tmp_path, n_background):
+    # Small enough to enumerate all 2**5 coalitions; 5 background rows keep every
+    # row, 50 exercise the collapsed background patterns
+    rng = np.random.default_rng(0)
+    feature_names = [f"f{i}" for i in range(5)]
+    X = rng.normal(size=(500, 5))
+    y = (X[:, 0] + X[:, 1] * X[:, 2] - X[:, 3] + rng.normal(scale=0.5, size=500) > 0).astype(int)
+    X[rng.random(X.shape) < 0.05] = np.nan
+    booster = xgb.train(
+        {"objective": "binary:logistic", "max_depth": 3, "eta": 0.3},
+        xgb.DMatrix(X, label=y, feature_names=feature_names),
+        num_boost_round=20,
+    )
+    model_path = str(tmp_path / "model.json")
+    booster.save_model(model_path)
+
+    ensemble = TreeEnsemble.from_json(model_path)
+    background = pd.DataFrame(X[:n_background], columns=feature_names)
+    engine = TreeShapEngine(ensemble, feature_names, background)
+
+    rows = X[n_background:n_background + 10]
+    values = engine.shap_values(pd.DataFrame(rows, columns=feature_names))
+    background_values = background.to_numpy(dtype=np.float32)
+    for x, phi in zip(rows.astype(np.float32), values):
+        np.testing.assert_allclose(phi, brute_force_shap(ensemble, x, background_values), atol=1e-6)
+
+
+def test_tree_shap_is_additive(training_features):
+    # Saved model, 100-row background (BACKGROUND_SIZE), as in bench_explainability
+    engine = TreeShapEngine.from_saved_model(list(training_features.columns))
+    rows = training_features.sample(n=200, random_state=0)
+
+    values = engine.shap_values(rows)
+    booster = xgb.Booster(model_file=JSON_MODEL_PATH)
+    margin = booster.predict(xgb.DMatrix(rows[booster.feature_names]), output_margin=True)
+    np.testing.assert_allclose(values.sum(axis=1) + engine.expected_value, margin, atol=1e-5)
+
+
+# --- TreeEnsemble ---
+
+def test_tree_ensemble_matches_xgboost(training_features):
+    # Training rows, then the same rows with noise and ~5% missing values, as in bench_tree_evaluator
+    compiled = TreeEnsemble.from_json()
+    booster = xgb.Booster(model_file=JSON_MODEL_PATH)
+    X = training_features[compiled.feature_names]
+    rng = np.random.default_rng(0)
+    perturbed = X.astype(float) * rng.uniform(0.8, 1.2, size=X.shape)
+    perturbed = perturbed.mask(rng.random(X.shape) < 0.05)
+
+    for data in (X, perturbed):
+        expected = booster.predict(xgb.DMatrix(data))
+        np.testing.assert_allclose(compiled.predict_proba(data)[:, 1], expected, atol=1e-6)
+        for i in range(0, len(data), 100):
+            row = data.iloc[i].to_numpy(dtype=np.float32)
+            assert compiled.predict_proba_row(row) == pytest.approx(expected[i], abs=1e-6)
+
+
+# --- FeaturePipeline ---
+
+@pytest.fixture(scope="module")
+def fitted_pipeline():
+    return FeaturePipeline.fit(load_data(DATA_PATH))
+
+
+def test_pipeline_matches_get_dummies(fitted_pipeline):
+    raw = load_data(DATA_PATH)
+    pipeline = fitted_pipeline
+    expected = pd.get_dummies(raw.drop(columns=[*DROP_COLUMNS, TARGET_COLUMN]), drop_first=True).astype(np.int64)
+
+    encoded = pipeline.transform(raw)
+    pd.testing.assert_frame_equal(encoded, expected)
+
+    records = np.stack([pipeline.transform_record(record) for record in raw.to_dict(orient="records")])
+    np.testing.assert_array_equal(records, encoded.to_numpy())
+
+
+@pytest.mark.parametrize("value", [None, np.nan, np.float32("nan"), pd.NA, "x", "41", "41.5", 33, np.int32(35), np.float32(30.7)])
+def test_transform_record_matches_transform(fitted_pipeline, value):
+    pipeline = fitted_pipeline
+    records = [{"Age": value, "JobRole": "Sales Executive"}, {"Age": value, "JobRole": "Unknown Role"}]
+    expected = pipeline.transform(pd.DataFrame(records)).to_numpy()
+    actual = np.stack([pipeline.transform_record(record) for record in records])
+    np.testing.assert_array_equal(actual, expected)